@@ -32,16 +32,26 @@ if mongodb_user and mongodb_password:
 else:
     mongodb_uri = f"mongodb://{mongodb_host}:{mongodb_port}/{mongodb_db}"
 
-# Connect to MongoDB
-try:
-    me.connect(mongodb_db, host=mongodb_uri)
-except Exception as e:
-    print(f"Warning: Could not connect to MongoDB at startup: {e}")
-    print("Attempting to connect with default settings...")
+def connect_db():
+    """
+    Register the MongoDB connection
+    
+    connect=False defers the actual connection to the first query, so
+    importing the app does no network I/O and a client created in the
+    gunicorn master is never used across a fork.
+    """
     try:
-        me.connect(mongodb_db, host=f"mongodb://{mongodb_host}:{mongodb_port}/{mongodb_db}")
-    except Exception as e2:
-        print(f"MongoDB connection failed: {e2}")
+        me.connect(mongodb_db, host=mongodb_uri, connect=False)
+    except Exception as e:
+        print(f"Warning: Could not connect to MongoDB at startup: {e}")
+        print("Attempting to connect with default settings...")
+        try:
+            me.connect(mongodb_db, host=f"mongodb://{mongodb_host}:{mongodb_port}/{mongodb_db}", connect=False)
+        except Exception as e2:
+            print(f"MongoDB connection failed: {e2}")
+
+# Connect to MongoDB
+connect_db()
 
 # Configure logging
 logging.basicConfig(
@@ -63,6 +73,34 @@ def health_check():
     """Health check endpoint"""
     return jsonify({'status': 'healthy', 'message': 'TrueLine News API is running'}), 200
 
+def warm_up():
+    """
+    Load NLP resources, the similarity model and the verification service
+
+    Everything also loads lazily on first use. Calling this in the gunicorn
+    master (see gunicorn.conf.py) loads it once, before the workers fork,
+    so they share those pages copy-on-write.
+    """
+    from app.utils.nlp_processor import get_nlp_resources
+    from app.utils.tfidf_model import tfidf_model
+    from app.services.verification_service import get_verification_service
+    
+    get_nlp_resources()
+    tfidf_model.is_fitted
+    get_verification_service()
+
+def start_workers():
+    """
+    Start this process's verification job workers
+
+    They would otherwise start on the first job request, leaving jobs
+    queued by other processes idle until then. Called once per serving
+    process: from gunicorn's post_fork, or before the development server runs.
+    """
+    from app.routes.verification import verification_jobs
+    
+    verification_jobs.ensure_started()
+
 # Error handling
 @app.errorhandler(404)
 def not_found(error):
@@ -74,6 +112,7 @@ def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
 if __name__ == '__main__':
+    start_workers()
     app.run(
         debug=os.getenv('FLASK_DEBUG', False),
         host=os.getenv('FLASK_HOST', '0.0.0.0'),
@@ -23,9 +23,25 @@ class Article(Document):
     is_verified = BooleanField(default=False)
     cross_checked = BooleanField(default=False)
     
-    # Content analysis
+    # Content analysis; keywords_computed and sentiment_computed mark values
+    # derived from the content (recomputed when it changes) rather than supplied by a client
     keywords = ListField(StringField())
+    keywords_computed = BooleanField(default=False)
     sentiment_score = FloatField(min_value=-1.0, max_value=1.0)
+    sentiment_computed = BooleanField(default=False)
+    
+    # Sparse TF-IDF vector ({'indices': [...], 'values': [...]}) and the model version that produced it
+    tfidf_vector = DictField()
+    tfidf_version = StringField()
+    
+    # MinHash signature of the content and its LSH band keys, for near-duplicate lookup
+    minhash = ListField(IntField())
+    lsh_bands = ListField(StringField())
+    
+    # Misinformation indicators found in the content, and when the derived
+    # content features were last computed (None until enriched, and again after a content edit)
+    indicators = DictField()
+    enriched_at = DateTimeField()
     
     # Sourcing information
     reporting_sources = ListField(StringField())
@@ -41,7 +57,13 @@ class Article(Document):
     
     meta = {
         'collection': 'articles',
-        'indexes': ['url', 'source', 'verified_date', 'credibility_score']
+        'indexes': ['url', 'source', 'verified_date', 'credibility_score', 'lsh_bands', 'enriched_at',
+                    # Case-insensitive, for the aggregate retrieval engine's keyword match
+                    {'fields': ['status', 'keywords'], 'name': 'status_keywords_ci',
+                     'collation': {'locale': 'en', 'strength': 2}},
+                    # Newest-first listing and keyset pages, with and without a source filter
+                    ('status', '-verified_date', '-id'),
+                    ('status', 'source', '-verified_date', '-id')]
     }
 
     def to_dict(self):
@@ -59,6 +81,8 @@ class Article(Document):
             'cross_checked': self.cross_checked,
             'keywords': self.keywords,
             'sentiment_score': self.sentiment_score,
+            'indicators': self.indicators,
+            'enriched_at': self.enriched_at.isoformat() if self.enriched_at else None,
             'reporting_sources': self.reporting_sources,
             'published_date': self.published_date.isoformat() if self.published_date else None,
             'verified_date': self.verified_date.isoformat(),
@@ -87,6 +111,51 @@ class VerificationLog(Document):
         'indexes': ['timestamp', 'query']
     }
 
+class VerificationJob(Document):
+    """
+    Queued verification request, run by the local job workers
+    """
+    query = StringField(required=True)
+    depth = StringField(default='standard')
+    include_timings = BooleanField(default=False)
+    
+    status = StringField(choices=['queued', 'running', 'done', 'failed'], default='queued')
+    result = DictField()
+    error = StringField()
+    
+    # Claiming: the worker holding the job and when its claim lapses
+    worker = StringField()
+    lease_expires = DateTimeField()
+    attempts = IntField(default=0)
+    
+    created_at = DateTimeField(default=datetime.utcnow)
+    started_at = DateTimeField()
+    finished_at = DateTimeField()
+    
+    meta = {
+        'collection': 'verification_jobs',
+        'indexes': [
+            ('status', 'created_at'),
+            {'fields': ['finished_at'], 'expireAfterSeconds': 86400}
+        ]
+    }
+
+    def to_dict(self):
+        data = {
+            'job_id': str(self.id),
+            'status': self.status,
+            'query': self.query,
+            'depth': self.depth,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+        if self.status == 'done':
+            data['result'] = self.result
+        if self.status == 'failed':
+            data['error'] = self.error
+        return data
+
 class TrustedSource(Document):
     """
     Registry of trusted news sources
@@ -96,9 +165,10 @@ class TrustedSource(Document):
     description = StringField()
     domain = StringField(required=True, unique=True)
     
-    # Trust metrics
+    # Trust metrics; the article counters are maintained by app.services.source_stats
     trustworthiness_score = FloatField(default=0.5, min_value=0.0, max_value=1.0)
     article_count = IntField(default=0)
+    verified_count = IntField(default=0)
     verification_rate = FloatField(default=0.0)
     
     # Metadata
@@ -123,6 +193,7 @@ class TrustedSource(Document):
             'domain': self.domain,
             'trustworthiness_score': self.trustworthiness_score,
             'article_count': self.article_count,
+            'verified_count': self.verified_count,
             'verification_rate': self.verification_rate,
             'category': self.category,
             'country': self.country,
@@ -2,29 +2,71 @@
 Routes for article management
 """
 
-from flask import Blueprint, request, jsonify
-from app.models import Article, TrustedSource
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from mongoengine.errors import NotUniqueError
+from mongoengine.queryset.visitor import Q
+from bson import ObjectId
+from app.models import Article
+from app.services.bulk_ingest import BulkIngestor
+from app.services.keyword_index import keyword_index
+from app.services.result_cache import result_cache
+from app.services.source_registry import source_registry
+from app.services.source_stats import source_stats
+from app.utils.credibility_analyzer import CredibilityAnalyzer
+from app.utils.minhash import minhasher
+from app.utils.tfidf_model import tfidf_model
+from datetime import datetime
+import base64
+import json
 import logging
+import os
+import threading
+import time
 
 articles_bp = Blueprint('articles', __name__, url_prefix='/api/articles')
 logger = logging.getLogger(__name__)
 
+# Short-lived per-filter article counts: (status, source) -> (count, expires_at)
+COUNT_CACHE_TTL = int(os.getenv('ARTICLE_COUNT_CACHE_TTL', 30))
+COUNT_CACHE_MAX_ENTRIES = int(os.getenv('ARTICLE_COUNT_CACHE_SIZE', 1024))
+_count_cache = {}
+_count_lock = threading.Lock()
+
+# Page size bounds for GET /api/articles
+MAX_PAGE_SIZE = 100
+
+credibility_analyzer = CredibilityAnalyzer()
+
 @articles_bp.route('', methods=['GET'])
 def get_articles():
     """
     Get all verified articles with optional filtering
     Query parameters:
-    - limit: Number of articles to return (default: 20)
+    - limit: Number of articles to return (default: 20, clamped to 1-100)
     - offset: Pagination offset (default: 0)
+    - cursor: Opaque cursor from a previous response; enables keyset pagination
+      (pass an empty value to request the first page)
     - source: Filter by source
     - status: Filter by status (verified, pending, unverified)
     """
     try:
-        limit = request.args.get('limit', 20, type=int)
-        offset = request.args.get('offset', 0, type=int)
+        try:
+            limit = min(max(int(request.args.get('limit', 20)), 1), MAX_PAGE_SIZE)
+            offset = int(request.args.get('offset', 0))
+        except ValueError:
+            return jsonify({'error': 'limit and offset must be integers'}), 400
+        if offset < 0:
+            return jsonify({'error': 'offset must not be negative'}), 400
+        cursor = request.args.get('cursor', None)
         source = request.args.get('source', None)
         status = request.args.get('status', 'verified')
         
+        if cursor:
+            try:
+                last_date, last_id = _decode_cursor(cursor)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+        
         # Build query
         query = Article.objects
         
@@ -34,8 +76,27 @@ def get_articles():
         if source:
             query = query.filter(source=source)
         
-        # Get total count
-        total = query.count()
+        # Get total count (cached per filter)
+        total = _get_cached_count(query, status, source)
+        
+        if cursor is not None:
+            # Keyset pagination on (verified_date, _id), newest first
+            if cursor:
+                query = query.filter(
+                    Q(verified_date__lt=last_date) |
+                    Q(verified_date=last_date, id__lt=last_id)
+                )
+            
+            page = list(query.order_by('-verified_date', '-id').limit(limit + 1))
+            articles = page[:limit]
+            next_cursor = _encode_cursor(articles[-1]) if len(page) > limit else None
+            
+            return jsonify({
+                'total': total,
+                'limit': limit,
+                'next_cursor': next_cursor,
+                'articles': [article.to_dict() for article in articles]
+            }), 200
         
         # Get paginated results
         articles = query.order_by('-verified_date').skip(offset).limit(limit)
@@ -51,6 +112,51 @@ def get_articles():
         logger.error(f"Error retrieving articles: {e}")
         return jsonify({'error': 'Failed to retrieve articles'}), 500
 
+def _encode_cursor(article):
+    """Build an opaque cursor pointing just past the given article"""
+    payload = json.dumps({'d': article.verified_date.isoformat(), 'id': str(article.id)})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def _decode_cursor(cursor):
+    """Decode a cursor into its (verified_date, ObjectId) position"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(payload['d']), ObjectId(payload['id'])
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+def _get_cached_count(query, status, source):
+    """
+    Return the article count for a (status, source) filter
+
+    Counts are cached for COUNT_CACHE_TTL seconds, for at most
+    COUNT_CACHE_MAX_ENTRIES filters (source is user-supplied). The
+    unfiltered count comes from collection metadata instead of a scan.
+    """
+    key = (status or None, source or None)
+    now = time.monotonic()
+    
+    with _count_lock:
+        cached = _count_cache.get(key)
+        if cached and cached[1] > now:
+            return cached[0]
+    
+    if key == (None, None):
+        total = Article._get_collection().estimated_document_count()
+    else:
+        total = query.count()
+    
+    with _count_lock:
+        if key not in _count_cache and len(_count_cache) >= COUNT_CACHE_MAX_ENTRIES:
+            for expired in [k for k, (_, expires_at) in _count_cache.items() if expires_at <= now]:
+                del _count_cache[expired]
+            # Still full: drop the oldest entries
+            while len(_count_cache) >= COUNT_CACHE_MAX_ENTRIES:
+                del _count_cache[next(iter(_count_cache))]
+        _count_cache[key] = (total, now + COUNT_CACHE_TTL)
+    
+    return total
+
 @articles_bp.route('/<article_id>', methods=['GET'])
 def get_article(article_id):
     """
@@ -81,10 +187,6 @@ def create_article():
         if not all(field in data for field in required_fields):
             return jsonify({'error': 'Missing required fields'}), 400
         
-        # Check if article already exists
-        if Article.objects(url=data['url']).first():
-            return jsonify({'error': 'Article already exists'}), 409
-        
         # Create new article
         article = Article(
             title=data['title'],
@@ -97,8 +199,18 @@ def create_article():
             reporting_sources=data.get('reporting_sources', []),
             status=data.get('status', 'pending')
         )
+        article.tfidf_vector, article.tfidf_version = tfidf_model.vectorize_for_storage(article.content)
+        article.minhash = minhasher.signature(article.content)
+        article.lsh_bands = minhasher.band_keys(article.minhash)
         
-        article.save()
+        # The unique url index rejects duplicates, without a lookup first
+        try:
+            article.save()
+        except NotUniqueError:
+            return jsonify({'error': 'Article already exists'}), 409
+        keyword_index.add_article(article)
+        source_stats.article_written(after=(article.source, article.status))
+        result_cache.invalidate(keywords=article.keywords, sources=[article.source])
         
         logger.info(f"Article created: {article.id}")
         return jsonify(article.to_dict()), 201
@@ -107,6 +219,32 @@ def create_article():
         logger.error(f"Error creating article: {e}")
         return jsonify({'error': 'Failed to create article'}), 500
 
+@articles_bp.route('/bulk', methods=['POST'])
+def bulk_create_articles():
+    """
+    Create many articles from a streamed NDJSON body (admin only)
+    Query parameters:
+    - mode: insert (default; existing urls are reported as duplicates)
+      or upsert (existing urls are updated)
+    
+    Streams back one NDJSON result per input line, then a summary line.
+    """
+    mode = request.args.get('mode', 'insert')
+    if mode not in BulkIngestor.MODES:
+        return jsonify({'error': f"Invalid mode, expected one of: {', '.join(BulkIngestor.MODES)}"}), 400
+    
+    ingestor = BulkIngestor(mode=mode)
+    
+    def generate():
+        try:
+            for result in ingestor.ingest(request.stream):
+                yield json.dumps(result) + '\n'
+        except Exception as e:
+            logger.error(f"Bulk ingest aborted: {e}")
+            yield json.dumps({'error': 'Bulk ingest aborted'}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @articles_bp.route('/<article_id>', methods=['PUT'])
 def update_article(article_id):
     """
@@ -119,6 +257,7 @@ def update_article(article_id):
             return jsonify({'error': 'Article not found'}), 404
         
         data = request.get_json()
+        before = (article.source, article.status)
         
         # Update fields
         updatable_fields = ['title', 'excerpt', 'content', 'credibility_score', 
@@ -128,8 +267,23 @@ def update_article(article_id):
         for field in updatable_fields:
             if field in data:
                 setattr(article, field, data[field])
+        if 'sentiment_score' in data:
+            # A client-supplied score survives later re-enrichment
+            article.sentiment_computed = False
+        
+        if 'content' in data:
+            article.tfidf_vector, article.tfidf_version = tfidf_model.vectorize_for_storage(article.content)
+            article.minhash = minhasher.signature(article.content)
+            article.lsh_bands = minhasher.band_keys(article.minhash)
+            # The enrichment worker recomputes the remaining content features
+            article.enriched_at = None
         
+        article.last_updated = datetime.utcnow()
         article.save()
+        keyword_index.add_article(article)
+        result_cache.invalidate(keywords=article.keywords, sources=[article.source])
+        if article.status != before[1]:
+            source_stats.article_written(before=before, after=(article.source, article.status))
         
         logger.info(f"Article updated: {article.id}")
         return jsonify(article.to_dict()), 200
@@ -142,13 +296,28 @@ def update_article(article_id):
 def get_trusted_sources():
     """
     Get all trusted sources
+    Query parameters:
+    - include_credibility: Add each source's credibility analysis, from its
+      stored article counters (default: false)
     """
     try:
-        sources = TrustedSource.objects.filter(is_active=True)
+        sources = source_registry.active_sources()
+        include_credibility = request.args.get('include_credibility', 'false').lower() in ('1', 'true', 'yes')
+        
+        results = []
+        for source in sources:
+            data = source.to_dict()
+            if include_credibility:
+                data['credibility'] = credibility_analyzer.analyze_source_credibility(
+                    source.name,
+                    article_count=source.article_count or 0,
+                    verification_rate=source.verification_rate or 0.0
+                )
+            results.append(data)
         
         return jsonify({
-            'total': sources.count(),
-            'sources': [source.to_dict() for source in sources]
+            'total': len(sources),
+            'sources': results
         }), 200
     
     except Exception as e:
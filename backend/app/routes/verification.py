@@ -3,13 +3,41 @@ Routes for news verification
 """
 
 from flask import Blueprint, request, jsonify
-from app.services.verification_service import VerificationService
+from app.services.verification_service import get_verification_service
+from app.services.verification_jobs import VerificationJobQueue
+from app.services.write_behind import verification_log_writer
 from app.models import VerificationLog
+from bson import ObjectId
 import logging
+import os
 
 verification_bp = Blueprint('verification', __name__, url_prefix='/api/verify')
 logger = logging.getLogger(__name__)
-verification_service = VerificationService()
+
+# Depths that always run as background jobs; any request can opt in with "async": true
+ASYNC_DEPTHS = {d.strip() for d in os.getenv('VERIFY_ASYNC_DEPTHS', 'deep').split(',') if d.strip()}
+
+def _verify_and_log(query, depth, include_timings=False):
+    """Run a verification and record it in the verification log"""
+    result = get_verification_service().verify(query, depth, include_timings=include_timings)
+    
+    # Log verification attempt; written in batches off the request path
+    try:
+        log = VerificationLog(
+            query=query,
+            credibility_score=result.get('credibility_score'),
+            verified_sources=result.get('verified_sources'),
+            is_verified=result.get('is_verified'),
+            is_original=result.get('is_original'),
+            found_sources=result.get('sources', [])
+        )
+        verification_log_writer.add(log)
+    except Exception as e:
+        logger.warning(f"Failed to log verification: {e}")
+    
+    return result
+
+verification_jobs = VerificationJobQueue(runner=_verify_and_log)
 
 @verification_bp.route('', methods=['POST'])
 def verify_news():
@@ -18,8 +46,12 @@ def verify_news():
     Request body:
     {
         "query": "news headline or URL to verify",
-        "depth": "basic|standard|deep" (optional, default: standard)
+        "depth": "basic|standard|deep" (optional, default: standard),
+        "timings": true|false (optional, include per-stage timings),
+        "async": true|false (optional, queue as a job; deep requests are always queued)
     }
+    
+    Queued requests return 202 with a job id to poll at /api/verify/jobs/<job_id>.
     """
     try:
         data = request.get_json()
@@ -29,26 +61,22 @@ def verify_news():
         
         query = data['query'].strip()
         depth = data.get('depth', 'standard')
+        include_timings = bool(data.get('timings', False))
         
         if not query:
             return jsonify({'error': 'Query cannot be empty'}), 400
         
+        # Slow verifications run in the job workers instead of holding this worker
+        if depth in ASYNC_DEPTHS or data.get('async') is True:
+            job = verification_jobs.submit(query, depth, include_timings=include_timings)
+            return jsonify({
+                'job_id': str(job.id),
+                'status': job.status,
+                'status_url': f"{verification_bp.url_prefix}/jobs/{job.id}"
+            }), 202
+        
         # Perform verification
-        result = verification_service.verify(query, depth)
-        
-        # Log verification attempt
-        try:
-            log = VerificationLog(
-                query=query,
-                credibility_score=result.get('credibility_score'),
-                verified_sources=result.get('verified_sources'),
-                is_verified=result.get('is_verified'),
-                is_original=result.get('is_original'),
-                found_sources=result.get('sources', [])
-            )
-            log.save()
-        except Exception as e:
-            logger.warning(f"Failed to log verification: {e}")
+        result = _verify_and_log(query, depth, include_timings=include_timings)
         
         return jsonify(result), 200
     
@@ -56,6 +84,35 @@ def verify_news():
         logger.error(f"Error verifying news: {e}")
         return jsonify({'error': 'Verification failed'}), 500
 
+@verification_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_verification_job(job_id):
+    """
+    Status of a queued verification, with its result once done
+    """
+    try:
+        job = verification_jobs.get(job_id) if ObjectId.is_valid(job_id) else None
+        
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        return jsonify(job), 200
+    
+    except Exception as e:
+        logger.error(f"Error retrieving verification job: {e}")
+        return jsonify({'error': 'Failed to retrieve job'}), 500
+
+@verification_bp.route('/jobs/metrics', methods=['GET'])
+def verification_job_metrics():
+    """
+    Job queue depth and wait times
+    """
+    try:
+        return jsonify(verification_jobs.get_metrics()), 200
+    
+    except Exception as e:
+        logger.error(f"Error retrieving job metrics: {e}")
+        return jsonify({'error': 'Failed to retrieve job metrics'}), 500
+
 @verification_bp.route('/analyze-credibility', methods=['POST'])
 def analyze_credibility():
     """
@@ -70,7 +127,7 @@ def analyze_credibility():
         url = data['url']
         
         # Perform deep analysis
-        result = verification_service.analyze_credibility(url)
+        result = get_verification_service().analyze_credibility(url)
         
         return jsonify(result), 200
     
@@ -95,7 +152,7 @@ def compare_sources():
             return jsonify({'error': 'At least 2 URLs are required for comparison'}), 400
         
         # Perform comparison
-        result = verification_service.compare_sources(urls)
+        result = get_verification_service().compare_sources(urls)
         
         return jsonify(result), 200
     
@@ -129,3 +186,10 @@ def verification_history():
     except Exception as e:
         logger.error(f"Error retrieving verification history: {e}")
         return jsonify({'error': 'Failed to retrieve history'}), 500
+
+@verification_bp.route('/history/stats', methods=['GET'])
+def verification_history_stats():
+    """
+    Counters of the verification log writer in this worker process
+    """
+    return jsonify(verification_log_writer.get_stats()), 200
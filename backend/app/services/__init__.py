@@ -2,6 +2,8 @@
 Services module initialization
 """
 
-from app.services.verification_service import VerificationService
+from app.services.verification_service import VerificationService, get_verification_service
+from app.services.keyword_index import KeywordIndex
+from app.services.source_registry import SourceRegistry
 
-__all__ = ['VerificationService']
+__all__ = ['VerificationService', 'get_verification_service', 'KeywordIndex', 'SourceRegistry']
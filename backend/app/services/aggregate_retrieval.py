@@ -0,0 +1,131 @@
+"""
+Candidate retrieval for verify() in a single MongoDB aggregation
+Selects matching articles, groups them by source and joins source trust in one round trip
+"""
+
+from app.models import Article, TrustedSource
+from app.utils.tfidf_model import tfidf_model
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Article fields the verification stages read; content only travels when no features are stored
+CANDIDATE_FIELDS = ('url', 'source', 'tfidf_vector', 'tfidf_version', 'minhash')
+
+# Matches the collation of Article's status_keywords_ci index, so keywords
+# compare case-insensitively (as the keyword index normalizes them) and the
+# $match can still use the index
+KEYWORD_COLLATION = {'locale': 'en', 'strength': 2}
+
+class AggregateRetriever:
+    """
+    Alternative to the in-memory keyword index for finding matching articles
+
+    One pipeline does candidate selection, source grouping and the
+    trustworthiness join:
+
+      $match    verified articles carrying any of the query keywords, in
+                any case
+      $project  the fields scoring needs, plus the overlap of the
+                lowercased keywords with the query as score;
+                raw content only for articles without current stored features
+      $sort / $limit   best overlap first, newest first, top match_limit
+      $group    by source
+      $lookup   the active trusted source with that name or domain
+      $project  source, its articles and its trust score
+
+    Ranking is by keyword overlap rather than the index's BM25, so the
+    candidates can differ from the index engine's on ties and near-ties.
+    Sources the join cannot resolve (e.g. a URL rather than a name) are
+    left for the source registry to resolve.
+    """
+
+    def search(self, keywords, limit=50):
+        """
+        Find matching articles and the trust score of their sources
+
+        Args:
+            keywords (list): Query keywords
+            limit (int): Maximum number of articles
+
+        Returns:
+            tuple: (articles, trust) - article dicts best first, and
+                source -> trustworthiness score (None if unresolved)
+        """
+        terms = sorted({keyword.strip().lower() for keyword in keywords if keyword and keyword.strip()})
+        if not terms:
+            return [], {}
+
+        groups = Article._get_collection().aggregate(
+            self.pipeline(terms, limit, tfidf_model.version), collation=KEYWORD_COLLATION
+        )
+
+        articles = []
+        trust = {}
+        for group in groups:
+            trust[group['source']] = group.get('trust')
+            articles.extend(group['articles'])
+
+        # Groups come back in arbitrary order; restore the ranking
+        articles.sort(key=lambda a: (-a['score'], -a['verified_ts'], str(a['_id'])))
+        return [self._to_candidate(article) for article in articles], trust
+
+    def pipeline(self, terms, limit, model_version):
+        """The aggregation pipeline for normalized query terms"""
+        enriched = {'$and': [
+            {'$gt': [{'$size': {'$ifNull': ['$minhash', []]}}, 0]},
+            {'$gt': ['$tfidf_vector', {}]},
+            {'$eq': ['$tfidf_version', model_version]}
+        ]} if model_version else False
+
+        return [
+            {'$match': {'status': 'verified', 'keywords': {'$in': terms}}},
+            {'$project': {
+                **{field: 1 for field in CANDIDATE_FIELDS},
+                'score': {'$size': {'$setIntersection': [
+                    {'$map': {'input': {'$ifNull': ['$keywords', []]}, 'as': 'keyword', 'in': {'$toLower': '$$keyword'}}},
+                    terms
+                ]}},
+                'verified_ts': {'$ifNull': [{'$toLong': '$verified_date'}, 0]},
+                'content': {'$cond': [enriched, '$$REMOVE', '$content']}
+            }},
+            {'$sort': {'score': -1, 'verified_ts': -1, '_id': 1}},
+            {'$limit': limit},
+            {'$group': {'_id': '$source', 'articles': {'$push': '$$ROOT'}}},
+            {'$lookup': {
+                'from': TrustedSource._get_collection_name(),
+                'let': {'source': {'$toLower': {'$ifNull': ['$_id', '']}}},
+                'pipeline': [
+                    {'$match': {'$expr': {'$and': [
+                        {'$eq': ['$is_active', True]},
+                        {'$or': [
+                            {'$eq': [{'$toLower': '$name'}, '$$source']},
+                            {'$eq': ['$domain', '$$source']}
+                        ]}
+                    ]}}},
+                    {'$project': {'_id': 0, 'trustworthiness_score': 1}},
+                    {'$limit': 1}
+                ],
+                'as': 'trusted'
+            }},
+            {'$project': {
+                '_id': 0,
+                'source': '$_id',
+                'articles': 1,
+                'trust': {'$arrayElemAt': ['$trusted.trustworthiness_score', 0]}
+            }}
+        ]
+
+    @staticmethod
+    def _to_candidate(article):
+        return {
+            'url': article.get('url'),
+            'content': article.get('content', ''),
+            'source': article.get('source'),
+            'tfidf_vector': article.get('tfidf_vector'),
+            'tfidf_version': article.get('tfidf_version'),
+            'minhash': article.get('minhash')
+        }
+
+# Shared per-process retriever used by the verification service
+aggregate_retriever = AggregateRetriever()
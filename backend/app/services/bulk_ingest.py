@@ -0,0 +1,309 @@
+"""
+Bulk article ingest from NDJSON
+Validates line by line, enriches in a process pool and writes in unordered batches
+"""
+
+from app.models import Article
+from app.services.keyword_index import keyword_index
+from app.services.result_cache import result_cache
+from app.services.source_stats import source_stats
+from app.utils.enrichment import enrich_contents, use_standalone_pool
+from collections import Counter
+from datetime import datetime
+from mongoengine.errors import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ('title', 'url', 'content', 'source')
+
+# Fields a bulk line may set; everything else is computed or defaulted
+ACCEPTED_FIELDS = (
+    'title', 'url', 'content', 'excerpt', 'source', 'author', 'keywords',
+    'sentiment_score', 'reporting_sources', 'published_date', 'status'
+)
+
+# Fields computed from the content; an upsert always replaces them
+COMPUTED_FIELDS = (
+    'keywords', 'keywords_computed', 'sentiment_score', 'sentiment_computed', 'minhash', 'lsh_bands',
+    'tfidf_vector', 'tfidf_version', 'indicators', 'enriched_at', 'last_updated'
+)
+
+DUPLICATE_KEY_ERROR = 11000
+
+class BulkIngestor:
+    """
+    Ingests a stream of NDJSON article lines
+
+    Lines are validated as they arrive and collected into batches of
+    BULK_INGEST_BATCH_SIZE. For each batch, keywords, sentiment, MinHash
+    signatures, TF-IDF vectors and indicators are computed in the
+    enrichment process pool, so the articles are stored already enriched.
+    The batch is then written with one unordered insert_many
+    (mode='insert', existing urls are reported as duplicates) or one
+    unordered bulk upsert keyed on url (mode='upsert'). An upsert only
+    overwrites the fields the line supplied and the computed ones; model
+    defaults (status, scores, flags) apply to new articles alone, so
+    re-ingesting a verified article does not reset it. The unique url
+    index settles races with concurrent writers.
+    """
+
+    MODES = ('insert', 'upsert')
+
+    def __init__(self, mode='insert', batch_size=None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown ingest mode: {mode}")
+        self.mode = mode
+        self.batch_size = batch_size or int(os.getenv('BULK_INGEST_BATCH_SIZE', 500))
+
+    def ingest(self, lines):
+        """
+        Ingest NDJSON lines
+
+        Args:
+            lines (iterable): Lines as bytes or str
+
+        Yields:
+            dict: One result per non-blank line,
+                {'line', 'url', 'status': inserted|updated|duplicate|rejected, 'reason'},
+                followed by {'summary': counts per status}. Unparseable lines
+                are reported immediately, the rest when their batch is written.
+        """
+        counts = Counter()
+        batch = []
+
+        for line_number, raw in enumerate(lines, 1):
+            if isinstance(raw, bytes):
+                raw = raw.decode('utf-8', errors='replace')
+            if not raw.strip():
+                continue
+
+            article, supplied, reason = self._parse(raw)
+            if article is None:
+                counts['rejected'] += 1
+                yield {'line': line_number, 'status': 'rejected', 'reason': reason}
+                continue
+
+            batch.append((line_number, article, supplied))
+            if len(batch) >= self.batch_size:
+                yield from self._flush(batch, counts)
+                batch = []
+
+        if batch:
+            yield from self._flush(batch, counts)
+
+        yield {'summary': {status: counts[status] for status in ('inserted', 'updated', 'duplicate', 'rejected')}}
+
+    def _parse(self, raw):
+        """
+        Build an unsaved Article from one line
+
+        Returns:
+            tuple: (article, fields the line supplied, None), or
+                (None, None, the reason the line is rejected)
+        """
+        try:
+            data = json.loads(raw)
+        except ValueError as e:
+            return None, None, f"Invalid JSON: {e}"
+
+        if not isinstance(data, dict):
+            return None, None, 'Line is not a JSON object'
+
+        missing = [field for field in REQUIRED_FIELDS if not data.get(field)]
+        if missing:
+            return None, None, f"Missing required fields: {', '.join(missing)}"
+
+        supplied = frozenset(field for field in ACCEPTED_FIELDS if field in data)
+        article = Article(**{field: data[field] for field in supplied})
+        try:
+            article.validate()
+        except ValidationError as e:
+            return None, None, f"Invalid article: {e}"
+
+        return article, supplied, None
+
+    def _flush(self, batch, counts):
+        """Enrich and write one batch, yielding its per-line results"""
+        articles = [article for _, article, _ in batch]
+
+        try:
+            features = enrich_contents([article.content for article in articles])
+        except Exception as e:
+            logger.error(f"Bulk enrichment failed: {e}")
+            for line_number, article, _ in batch:
+                counts['rejected'] += 1
+                yield {'line': line_number, 'url': article.url, 'status': 'rejected', 'reason': 'Enrichment failed'}
+            return
+
+        enriched_at = datetime.utcnow()
+        documents = []
+        for article, computed in zip(articles, features):
+            if not article.keywords:
+                article.keywords = computed['keywords']
+                article.keywords_computed = True
+            if article.sentiment_score is None:
+                article.sentiment_score = computed['sentiment_score']
+                article.sentiment_computed = True
+            article.minhash = computed['minhash']
+            article.lsh_bands = computed['lsh_bands']
+            article.tfidf_vector = computed['tfidf_vector']
+            article.tfidf_version = computed['tfidf_version']
+            article.indicators = computed['indicators']
+            article.enriched_at = enriched_at
+            article.last_updated = enriched_at
+            documents.append(article.to_mongo().to_dict())
+
+        if self.mode == 'upsert':
+            previous = self._previous_states(documents)
+            outcomes = self._upsert(documents, [supplied for _, _, supplied in batch])
+        else:
+            previous = {}
+            outcomes = self._insert(documents)
+
+        results = []
+        written = []
+        stats_changes = []
+        for (line_number, article, supplied), (status, reason) in zip(batch, outcomes):
+            counts[status] += 1
+            result = {'line': line_number, 'url': article.url, 'status': status}
+            if reason:
+                result['reason'] = reason
+            else:
+                written.append(article)
+                before = previous.get(article.url) if status == 'updated' else None
+                # An update without a status keeps the stored one
+                if before is not None and 'status' not in supplied:
+                    article.status = before[1]
+                stats_changes.extend(source_stats.deltas(before, (article.source, article.status)))
+            results.append(result)
+
+        # Before yielding, so a client that disconnects mid-stream cannot skip it
+        self._after_write(written, documents)
+        source_stats.apply(stats_changes)
+        yield from results
+
+    def _insert(self, documents):
+        outcomes = [('inserted', None)] * len(documents)
+        try:
+            Article._get_collection().insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get('writeErrors', []):
+                if error.get('code') == DUPLICATE_KEY_ERROR:
+                    outcomes[error['index']] = ('duplicate', 'Article already exists')
+                else:
+                    outcomes[error['index']] = ('rejected', error.get('errmsg', 'Write failed'))
+        except PyMongoError as e:
+            logger.error(f"Bulk insert failed: {e}")
+            outcomes = [('rejected', 'Write failed')] * len(documents)
+        return outcomes
+
+    def _previous_states(self, documents):
+        """(source, status) of the stored articles a batch of upserts will update, by url"""
+        try:
+            stored = Article._get_collection().find(
+                {'url': {'$in': [document['url'] for document in documents]}},
+                projection={'url': 1, 'source': 1, 'status': 1}
+            )
+            return {document['url']: (document.get('source'), document.get('status')) for document in stored}
+        except PyMongoError as e:
+            # Source statistics may drift until the next reconciliation
+            logger.warning(f"Could not read stored articles before upsert: {e}")
+            return {}
+
+    def _upsert(self, documents, supplied):
+        operations = []
+        for document, fields in zip(documents, supplied):
+            document.pop('_id', None)
+            replaced = fields.union(COMPUTED_FIELDS)
+            # Defaults only apply to articles the upsert creates
+            update = {'$set': {k: v for k, v in document.items() if k in replaced}}
+            on_insert = {k: v for k, v in document.items() if k not in replaced}
+            if on_insert:
+                update['$setOnInsert'] = on_insert
+            operations.append(UpdateOne({'url': document['url']}, update, upsert=True))
+
+        outcomes = [('updated', None)] * len(documents)
+        try:
+            result = Article._get_collection().bulk_write(operations, ordered=False)
+            upserted = result.upserted_ids
+        except BulkWriteError as e:
+            upserted = {item['index']: item['_id'] for item in e.details.get('upserted', [])}
+            for error in e.details.get('writeErrors', []):
+                # Two lines upserting one new url race on the unique index
+                if error.get('code') == DUPLICATE_KEY_ERROR:
+                    outcomes[error['index']] = ('duplicate', 'Article already exists')
+                else:
+                    outcomes[error['index']] = ('rejected', error.get('errmsg', 'Write failed'))
+        except PyMongoError as e:
+            logger.error(f"Bulk upsert failed: {e}")
+            return [('rejected', 'Write failed')] * len(documents)
+
+        for index, document_id in upserted.items():
+            outcomes[index] = ('inserted', None)
+            documents[index]['_id'] = document_id
+        return outcomes
+
+    def _after_write(self, articles, documents):
+        """Keep the keyword index and result cache in step with the written batch"""
+        if not articles:
+            return
+
+        try:
+            by_url = {document['url']: document.get('_id') for document in documents}
+            missing = [article.url for article in articles if by_url.get(article.url) is None]
+            if missing:
+                for stored in Article.objects(url__in=missing).only('id', 'url'):
+                    by_url[stored.url] = stored.id
+
+            for article in articles:
+                article.id = by_url.get(article.url)
+                if article.id is not None:
+                    keyword_index.add_article(article)
+
+            keywords = {keyword for article in articles for keyword in article.keywords or []}
+            sources = {article.source for article in articles}
+            result_cache.invalidate(keywords=keywords, sources=sources)
+        except Exception as e:
+            logger.warning(f"Could not refresh indexes after bulk write: {e}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk ingest articles from an NDJSON file')
+    parser.add_argument('path', help="NDJSON file, one article per line ('-' for stdin)")
+    parser.add_argument('--mode', choices=BulkIngestor.MODES, default='insert')
+    parser.add_argument('--batch-size', type=int, default=None)
+    args = parser.parse_args()
+
+    # Run as `python -m app.services.bulk_ingest`: the app package is
+    # imported first, which configures logging and the MongoDB connection.
+    # Unlike POST /api/articles/bulk, a load here is not bound by the
+    # gunicorn worker timeout, so use it for large backfills.
+    use_standalone_pool('fork')
+    ingestor = BulkIngestor(mode=args.mode, batch_size=args.batch_size)
+    started = time.perf_counter()
+
+    lines = sys.stdin.buffer if args.path == '-' else open(args.path, 'rb')
+    try:
+        processed = 0
+        for result in ingestor.ingest(lines):
+            if 'summary' in result:
+                logger.info(f"Bulk ingest finished in {time.perf_counter() - started:.1f}s: {result['summary']}")
+                continue
+            processed += 1
+            if result['status'] in ('duplicate', 'rejected'):
+                logger.info(f"Line {result['line']}: {result['status']} ({result.get('reason')})")
+            if processed % 10000 == 0:
+                logger.info(f"Ingested {processed} lines, {processed / (time.perf_counter() - started):.0f} lines/s")
+    finally:
+        if lines is not sys.stdin.buffer:
+            lines.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+"""
+Background enrichment of stored articles
+Computes derived content features off the request path and writes them back in bulk
+"""
+
+from app.models import Article
+from app.services.keyword_index import keyword_index
+from app.services.result_cache import result_cache
+from app.services.tfidf_refit import TfidfRefitJob
+from app.utils.enrichment import enrich_contents, use_standalone_pool
+from datetime import datetime
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure, PyMongoError
+import argparse
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Returned by servers that cannot open change streams (standalone mongod)
+CHANGE_STREAMS_UNSUPPORTED = (40573, 40324)
+
+class EnrichmentWorker:
+    """
+    Fills in the derived features of articles that have none yet
+
+    An article is waiting for enrichment while its enriched_at is unset:
+    new articles (saved as pending by POST /api/articles), articles whose
+    content was edited, and articles stored before enrichment existed.
+    Keywords and sentiment a client supplied are kept; computed ones
+    (keywords_computed, sentiment_computed) are derived again, so an edit
+    never leaves stale values behind.
+    Each pass reads up to ENRICH_BATCH_SIZE of them (pending first),
+    computes keywords, sentiment, MinHash signature, TF-IDF vector and
+    indicators in the enrichment process pool, and writes them back with
+    one unordered bulk update. Each update only applies if the content
+    is still the one that was enriched, so a concurrent edit is never
+    overwritten with stale features. The written articles are then
+    re-indexed and their result cache entries dropped in this process;
+    serving processes pick the new keywords up through the keyword
+    index's periodic sync of recently enriched articles.
+
+    Between passes the worker waits on a change stream of new and edited
+    articles, or, where the server does not support change streams, polls
+    every ENRICH_POLL_INTERVAL seconds. Running several workers is safe;
+    they may enrich an article twice but never write stale features.
+
+    Given a refit_job (the CLI passes one unless --no-refit), the worker
+    also refits the TF-IDF model between passes when it is due, so that
+    work stays out of the serving processes. Let only one worker refit.
+    """
+
+    def __init__(self, batch_size=None, poll_interval=None, use_change_streams=None, refit_job=None):
+        self.batch_size = batch_size or int(os.getenv('ENRICH_BATCH_SIZE', 200))
+        self.poll_interval = poll_interval or float(os.getenv('ENRICH_POLL_INTERVAL', 5.0))
+        self.use_change_streams = use_change_streams if use_change_streams is not None else \
+            os.getenv('ENRICH_CHANGE_STREAMS', 'true').lower() in ('1', 'true', 'yes')
+
+        self._stream = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._thread_pid = None
+        self._lock = threading.Lock()
+        self.stats = {'passes': 0, 'enriched': 0, 'skipped': 0, 'failed_passes': 0}
+        self.mode = 'change_stream' if self.use_change_streams else 'polling'
+        self.refit_job = refit_job
+
+    def run_once(self):
+        """
+        Enrich one batch of waiting articles
+
+        Returns:
+            int: Number of articles read (a full batch means more may be waiting)
+        """
+        collection = Article._get_collection()
+        documents = list(
+            collection.find(
+                {'enriched_at': None},
+                projection={'content': 1, 'keywords': 1, 'keywords_computed': 1, 'sentiment_score': 1,
+                            'sentiment_computed': 1, 'source': 1, 'status': 1}
+            ).sort([('status', 1), ('_id', 1)]).limit(self.batch_size)
+        )
+        if not documents:
+            return 0
+
+        started = time.perf_counter()
+        features = enrich_contents([document.get('content') or '' for document in documents])
+        enriched_at = datetime.utcnow()
+
+        operations = []
+        for document, computed in zip(documents, features):
+            update = {
+                'minhash': computed['minhash'],
+                'lsh_bands': computed['lsh_bands'],
+                'tfidf_vector': computed['tfidf_vector'],
+                'tfidf_version': computed['tfidf_version'],
+                'indicators': computed['indicators'],
+                'enriched_at': enriched_at
+            }
+            # Values supplied by clients are kept
+            if not document.get('keywords') or document.get('keywords_computed'):
+                update['keywords'] = computed['keywords']
+                update['keywords_computed'] = True
+            if document.get('sentiment_score') is None or document.get('sentiment_computed'):
+                update['sentiment_score'] = computed['sentiment_score']
+                update['sentiment_computed'] = True
+
+            operations.append(UpdateOne(
+                {'_id': document['_id'], 'enriched_at': None, 'content': document.get('content')},
+                {'$set': update}
+            ))
+
+        result = collection.bulk_write(operations, ordered=False)
+        self._after_write(documents)
+
+        with self._lock:
+            self.stats['passes'] += 1
+            self.stats['enriched'] += result.modified_count
+            self.stats['skipped'] += len(documents) - result.matched_count
+
+        logger.info(
+            f"Enriched {result.modified_count} of {len(documents)} articles "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        return len(documents)
+
+    def _after_write(self, documents):
+        """Keep this process's keyword index and result cache in step with the written batch"""
+        try:
+            ids = [document['_id'] for document in documents]
+            keywords = {keyword for document in documents for keyword in document.get('keywords') or []}
+            sources = {document.get('source') for document in documents}
+            # Re-read, so skipped updates (a concurrent edit won) index what is stored
+            for article in Article.objects(id__in=ids).only('id', 'keywords', 'status', 'source'):
+                keyword_index.add_article(article)
+                keywords.update(article.keywords or [])
+            result_cache.invalidate(keywords=keywords, sources=sources)
+        except Exception as e:
+            logger.warning(f"Could not refresh indexes after enrichment: {e}")
+
+    def run_forever(self):
+        """Enrich waiting articles until stop() is called"""
+        logger.info(f"Enrichment worker started ({self.mode})")
+        backoff = self.poll_interval
+
+        while not self._stop.is_set():
+            try:
+                read = self.run_once()
+                backoff = self.poll_interval
+            except Exception as e:
+                logger.warning(f"Enrichment pass failed: {e}")
+                with self._lock:
+                    self.stats['failed_passes'] += 1
+                # Back off while the database is failing
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 60.0)
+                continue
+
+            if read < self.batch_size:
+                self._refit_if_due()
+                self._wait_for_work()
+
+        self._close_stream()
+
+    def _refit_if_due(self):
+        if self.refit_job is None:
+            return
+        try:
+            self.refit_job.run_if_due()
+        except Exception as e:
+            logger.warning(f"TF-IDF refit failed: {e}")
+
+    def start(self):
+        """Run the worker in a daemon thread of this process, once per process"""
+        with self._lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name='article-enrichment', daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['mode'] = self.mode
+        try:
+            stats['waiting'] = Article._get_collection().count_documents({'enriched_at': None})
+        except PyMongoError as e:
+            logger.warning(f"Could not count articles waiting for enrichment: {e}")
+        return stats
+
+    def _wait_for_work(self):
+        """Block until an article may need enrichment, or poll_interval passes"""
+        if self.mode == 'change_stream':
+            try:
+                self._wait_for_change()
+                return
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAMS_UNSUPPORTED:
+                    logger.info("Change streams are not supported by this server; polling instead")
+                    self.mode = 'polling'
+                else:
+                    logger.warning(f"Change stream failed, reopening on the next wait: {e}")
+                self._close_stream()
+            except PyMongoError as e:
+                logger.warning(f"Change stream failed, reopening on the next wait: {e}")
+                self._close_stream()
+
+        self._stop.wait(self.poll_interval)
+
+    def _wait_for_change(self):
+        if self._stream is None:
+            self._stream = Article._get_collection().watch(
+                [{'$match': {'$or': [
+                    {'operationType': {'$in': ['insert', 'replace']}},
+                    {'operationType': 'update', 'updateDescription.updatedFields.content': {'$exists': True}}
+                ]}}],
+                max_await_time_ms=int(self.poll_interval * 1000)
+            )
+
+        # Returns at the first change, or None after max_await_time_ms
+        deadline = time.monotonic() + self.poll_interval
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            if self._stream.try_next() is not None:
+                return
+
+    def _close_stream(self):
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except PyMongoError:
+                pass
+            self._stream = None
+
+def main():
+    parser = argparse.ArgumentParser(description='Enrich stored articles in the background')
+    parser.add_argument('--once', action='store_true', help='Enrich everything waiting, then exit')
+    parser.add_argument('--no-refit', action='store_true', help='Leave TF-IDF refits to another worker')
+    args = parser.parse_args()
+
+    # Run as `python -m app.services.enrichment_worker`: the app package is
+    # imported first, which configures logging and the MongoDB connection
+    use_standalone_pool('fork')
+    worker = EnrichmentWorker(refit_job=None if args.no_refit else TfidfRefitJob())
+    if args.once:
+        while worker.run_once() == worker.batch_size:
+            pass
+        logger.info(f"Enrichment finished: {worker.get_stats()}")
+        return
+
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        worker.stop()
+
+if __name__ == '__main__':
+    main()
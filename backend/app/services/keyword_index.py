@@ -0,0 +1,282 @@
+"""
+In-memory inverted keyword index for TrueLine News
+Ranks verified articles against query keywords without scanning the collection
+"""
+
+from app.models import Article
+from app.services.result_cache import result_cache
+from collections import defaultdict
+from datetime import datetime, timedelta
+import heapq
+import logging
+import math
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a failed background rebuild is tried again
+REBUILD_RETRY_DELAY = 30
+
+# Re-read window before the last sync, covering clock skew between the
+# enrichment worker's host and this one
+SYNC_OVERLAP = timedelta(seconds=30)
+
+class KeywordIndex:
+    """
+    Inverted index over Article.keywords with BM25-style ranking
+
+    Posting lists map each keyword to the ids of verified articles that carry
+    it. The index is built from MongoDB on first use and then kept up to date
+    incrementally by the article routes; a periodic rebuild picks up writes
+    made by other worker processes. Only the first build blocks a search;
+    later rebuilds run in a background thread, scanning MongoDB without
+    holding the index lock, so searches keep using the current index
+    meanwhile, and changes made during the scan are replayed onto the
+    rebuilt index.
+
+    Keywords the enrichment worker computes are written from its own
+    process, so between rebuilds the index also re-reads the articles
+    enriched since its last sync, every KEYWORD_INDEX_SYNC_INTERVAL
+    seconds, and drops the result cache entries of those that changed.
+    """
+
+    def __init__(self, k1=1.2, b=0.75, rebuild_interval=None, sync_interval=None):
+        self.k1 = k1
+        self.b = b
+        self.rebuild_interval = rebuild_interval if rebuild_interval is not None else \
+            int(os.getenv('KEYWORD_INDEX_REBUILD_INTERVAL', 300))
+        self.sync_interval = sync_interval if sync_interval is not None else \
+            float(os.getenv('KEYWORD_INDEX_SYNC_INTERVAL', 10))
+
+        self._postings = defaultdict(dict)   # keyword -> {article_id: term frequency}
+        self._doc_keywords = {}              # article_id -> list of normalized keywords
+        self._total_length = 0
+        self._built_at = None
+        self._lock = threading.RLock()
+        # Held for the duration of a rebuild; changes made meanwhile are
+        # collected in _pending (None while no rebuild is running)
+        self._build_lock = threading.Lock()
+        self._pending = None
+        # enriched_at up to which worker writes are reflected, and when that was last checked
+        self._synced_through = None
+        self._synced_at = None
+
+    def search(self, keywords, top_k=50):
+        """
+        Rank indexed articles against a list of query keywords
+
+        Args:
+            keywords (list): Query keywords
+            top_k (int): Maximum number of article ids to return
+
+        Returns:
+            list: Up to top_k (article_id, score) tuples, best first
+        """
+        self._ensure_fresh()
+
+        terms = set(self._normalize(keywords))
+        if not terms:
+            return []
+
+        with self._lock:
+            num_docs = len(self._doc_keywords)
+            if not num_docs:
+                return []
+            avg_length = self._total_length / num_docs
+
+            scores = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+
+                idf = math.log(1 + (num_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for article_id, tf in postings.items():
+                    length = len(self._doc_keywords[article_id])
+                    norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[article_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+    def add_article(self, article):
+        """
+        Index an article, replacing any previous entry for it
+
+        Only verified articles are searchable, so anything else is simply
+        removed from the index.
+        """
+        keywords = self._normalize(article.keywords or []) if article.status == 'verified' else []
+        self._apply(str(article.id), keywords)
+
+    def remove_article(self, article_id):
+        """Drop an article from the index"""
+        self._apply(str(article_id), [])
+
+    def rebuild(self):
+        """Reload the whole index from MongoDB"""
+        with self._build_lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        """Rebuild with _build_lock held"""
+        with self._lock:
+            self._pending = []
+        scan_started = datetime.utcnow()
+
+        try:
+            postings = defaultdict(dict)
+            doc_keywords = {}
+            total_length = 0
+
+            # The scan runs unlocked; searches use the current index meanwhile
+            articles = Article.objects(status='verified').only('id', 'keywords')
+            for article in articles.no_cache():
+                keywords = self._normalize(article.keywords or [])
+                if not keywords:
+                    continue
+
+                article_id = str(article.id)
+                for keyword in keywords:
+                    postings[keyword][article_id] = postings[keyword].get(article_id, 0) + 1
+                doc_keywords[article_id] = keywords
+                total_length += len(keywords)
+
+            with self._lock:
+                self._postings = postings
+                self._doc_keywords = doc_keywords
+                self._total_length = total_length
+                self._built_at = self._synced_at = time.monotonic()
+                self._synced_through = scan_started
+
+                # The scan may have missed changes made while it ran
+                for article_id, keywords in self._pending:
+                    self._remove(article_id)
+                    self._add(article_id, keywords)
+        finally:
+            with self._lock:
+                self._pending = None
+
+        logger.info(f"Keyword index built: {len(doc_keywords)} articles, {len(postings)} keywords")
+
+    def _ensure_fresh(self):
+        """Build the index on first use and rebuild it once it is stale"""
+        built_at = self._built_at
+        if built_at is not None and time.monotonic() - built_at < self.rebuild_interval:
+            self._sync_if_due()
+            return
+
+        # Before the first build there is nothing to search, so callers wait
+        if built_at is None:
+            with self._build_lock:
+                if self._built_at is None:
+                    self._rebuild()
+            return
+
+        # After it, one caller starts a rebuild in the background and every
+        # search keeps using the current index until it is swapped in
+        if not self._build_lock.acquire(blocking=False):
+            return
+        try:
+            threading.Thread(
+                target=self._rebuild_in_background, args=(built_at,), name='keyword-index-rebuild', daemon=True
+            ).start()
+        except Exception:
+            self._build_lock.release()
+            raise
+
+    def _rebuild_in_background(self, built_at):
+        """Rebuild with _build_lock held by the caller, then release it"""
+        try:
+            if self._built_at is built_at:
+                self._rebuild()
+        except Exception as e:
+            logger.warning(f"Keyword index rebuild failed, retrying in {REBUILD_RETRY_DELAY}s: {e}")
+            self._built_at = time.monotonic() - self.rebuild_interval + REBUILD_RETRY_DELAY
+        finally:
+            self._build_lock.release()
+
+    def sync(self):
+        """Apply the keywords of articles enriched since the last sync"""
+        with self._build_lock:
+            self._sync()
+
+    def _sync_if_due(self):
+        synced_at = self._synced_at
+        if not self.sync_interval or (synced_at is not None and time.monotonic() - synced_at < self.sync_interval):
+            return
+        # Skipped while a rebuild (or another sync) runs; it reads the same writes
+        if not self._build_lock.acquire(blocking=False):
+            return
+        try:
+            if self._synced_at is synced_at:
+                self._sync()
+        except Exception as e:
+            logger.warning(f"Keyword index sync failed: {e}")
+        finally:
+            self._build_lock.release()
+
+    def _sync(self):
+        """Sync with _build_lock held"""
+        started = datetime.utcnow()
+        since = (self._synced_through or started) - SYNC_OVERLAP
+
+        changed_keywords = set()
+        sources = set()
+        articles = Article.objects(enriched_at__gte=since).only('id', 'keywords', 'status', 'source')
+        for article in articles.no_cache():
+            article_id = str(article.id)
+            keywords = self._normalize(article.keywords or []) if article.status == 'verified' else []
+            with self._lock:
+                previous = self._doc_keywords.get(article_id, [])
+            if previous == keywords:
+                continue
+            self._apply(article_id, keywords)
+            changed_keywords.update(previous, keywords)
+            sources.add(article.source)
+
+        self._synced_through = started
+        self._synced_at = time.monotonic()
+        if changed_keywords or sources:
+            result_cache.invalidate(keywords=changed_keywords, sources=sources)
+
+    def _apply(self, article_id, keywords):
+        """Replace the entry of an article (an empty keyword list removes it)"""
+        with self._lock:
+            self._remove(article_id)
+            self._add(article_id, keywords)
+            if self._pending is not None:
+                self._pending.append((article_id, keywords))
+
+    def _add(self, article_id, keywords):
+        if not keywords:
+            return
+
+        for keyword in keywords:
+            postings = self._postings[keyword]
+            postings[article_id] = postings.get(article_id, 0) + 1
+
+        self._doc_keywords[article_id] = keywords
+        self._total_length += len(keywords)
+
+    def _remove(self, article_id):
+        keywords = self._doc_keywords.pop(article_id, None)
+        if not keywords:
+            return
+
+        for keyword in set(keywords):
+            postings = self._postings.get(keyword)
+            if postings is None:
+                continue
+            postings.pop(article_id, None)
+            if not postings:
+                del self._postings[keyword]
+        self._total_length -= len(keywords)
+
+    @staticmethod
+    def _normalize(keywords):
+        return [keyword.strip().lower() for keyword in keywords if keyword and keyword.strip()]
+
+# Shared per-process index used by the verification service and article routes
+keyword_index = KeywordIndex()
@@ -0,0 +1,192 @@
+"""
+Corpus-wide recomputation of stored article credibility scores
+Run after changing the scoring weights or source trust scores
+"""
+
+from app.models import Article
+from app.services.source_registry import source_registry
+from app.utils.credibility_analyzer import CredibilityAnalyzer
+from bson import ObjectId
+from datetime import datetime
+from pymongo import UpdateOne
+import argparse
+import json
+import logging
+import numpy as np
+import os
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+# Stored fields the score is derived from
+SCORING_FIELDS = {'source': 1, 'reporting_sources': 1, 'verified_sources': 1, 'is_original': 1, 'credibility_score': 1}
+
+class RescoreJob:
+    """
+    Recomputes Article.credibility_score for the whole collection
+
+    Articles are read in _id order, RESCORE_BATCH_SIZE at a time, with a
+    range query per batch and only the fields scoring needs. Each batch is
+    scored with one CredibilityAnalyzer.calculate_scores call and the
+    scores that changed are written back with one unordered bulk_write.
+
+    Per article the features are: verified_sources (or the number of
+    distinct sources, if larger) as the source count, the mean registry
+    trust of its source and reporting sources, is_original, a healthy
+    spread when there is more than one source, and the default content
+    consistency, which is not stored per article.
+
+    After every batch the last _id is saved to RESCORE_CHECKPOINT_PATH, so
+    an interrupted run resumes where it stopped. A checkpoint written with
+    other weights is discarded, since the articles before it would be
+    scored inconsistently.
+    """
+
+    def __init__(self, batch_size=None, checkpoint_path=None, analyzer=None):
+        self.batch_size = batch_size or int(os.getenv('RESCORE_BATCH_SIZE', 1000))
+        self.checkpoint_path = checkpoint_path if checkpoint_path is not None else \
+            os.getenv('RESCORE_CHECKPOINT_PATH', '/tmp/trueline_rescore_checkpoint.json')
+        self.analyzer = analyzer or CredibilityAnalyzer()
+        self.source_registry = source_registry
+
+    def run(self, restart=False):
+        """
+        Rescore every article after the checkpoint (or all, with restart=True)
+
+        Returns:
+            dict: scanned, updated, seconds and articles_per_second of this run,
+                plus the totals since the checkpoint's run started
+        """
+        checkpoint = None if restart else self._load_checkpoint()
+        if checkpoint is None:
+            checkpoint = {
+                'last_id': None,
+                'scanned': 0,
+                'updated': 0,
+                'weights': self.analyzer.weights,
+                'started_at': datetime.utcnow().isoformat()
+            }
+        else:
+            logger.info(f"Resuming rescore after {checkpoint['last_id']} ({checkpoint['scanned']} articles done)")
+
+        collection = Article._get_collection()
+        stats = {'scanned': 0, 'updated': 0}
+        started = time.perf_counter()
+
+        while True:
+            query = {'_id': {'$gt': ObjectId(checkpoint['last_id'])}} if checkpoint['last_id'] else {}
+            documents = list(collection.find(query, projection=SCORING_FIELDS).sort('_id', 1).limit(self.batch_size))
+            if not documents:
+                break
+
+            updated = self._rescore_batch(collection, documents)
+
+            stats['scanned'] += len(documents)
+            stats['updated'] += updated
+            checkpoint['last_id'] = str(documents[-1]['_id'])
+            checkpoint['scanned'] += len(documents)
+            checkpoint['updated'] += updated
+            self._save_checkpoint(checkpoint)
+
+            elapsed = time.perf_counter() - started
+            logger.info(
+                f"Rescored {stats['scanned']} articles ({stats['updated']} changed), "
+                f"{stats['scanned'] / elapsed:.0f} articles/s"
+            )
+
+        checkpoint['done'] = True
+        self._save_checkpoint(checkpoint)
+
+        stats['seconds'] = round(time.perf_counter() - started, 3)
+        stats['articles_per_second'] = round(stats['scanned'] / stats['seconds'], 1) if stats['seconds'] else 0.0
+        stats['total_scanned'] = checkpoint['scanned']
+        stats['total_updated'] = checkpoint['updated']
+        return stats
+
+    def features(self, documents):
+        """
+        Scoring features of a batch of article documents
+
+        Returns:
+            dict: Keyword arguments for CredibilityAnalyzer.calculate_scores
+        """
+        n = len(documents)
+        num_sources = np.zeros(n)
+        reliability = np.full(n, np.nan)
+        original = np.zeros(n, dtype=bool)
+
+        for i, document in enumerate(documents):
+            sources = list(dict.fromkeys(
+                s for s in [document.get('source')] + (document.get('reporting_sources') or []) if s
+            ))
+            num_sources[i] = max(document.get('verified_sources') or 0, len(sources))
+            if sources:
+                scores = self.source_registry.get_scores(sources)
+                reliability[i] = sum(scores.values()) / len(scores)
+            original[i] = bool(document.get('is_original'))
+
+        return {
+            'num_sources': num_sources,
+            'source_reliability': reliability,
+            'spread_pattern': num_sources > 1,
+            'original_reporting': original
+        }
+
+    def _rescore_batch(self, collection, documents):
+        scores = self.analyzer.calculate_scores(**self.features(documents))
+
+        operations = [
+            UpdateOne({'_id': document['_id']}, {'$set': {'credibility_score': float(score)}})
+            for document, score in zip(documents, scores)
+            if document.get('credibility_score') is None or abs(document['credibility_score'] - score) > 1e-9
+        ]
+        if not operations:
+            return 0
+
+        result = collection.bulk_write(operations, ordered=False)
+        return result.modified_count
+
+    def _load_checkpoint(self):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return None
+        try:
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable rescore checkpoint {self.checkpoint_path}: {e}")
+            return None
+
+        if checkpoint.get('done'):
+            return None
+        if checkpoint.get('weights') != self.analyzer.weights:
+            logger.warning("Scoring weights changed since the checkpoint; rescoring from the start")
+            return None
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint):
+        """Write the checkpoint atomically, so a crash never leaves half a file"""
+        if not self.checkpoint_path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(checkpoint, f)
+            os.replace(tmp_path, self.checkpoint_path)
+        except OSError as e:
+            logger.warning(f"Could not save rescore checkpoint {self.checkpoint_path}: {e}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Recompute stored article credibility scores')
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and rescore everything')
+    parser.add_argument('--batch-size', type=int, default=None)
+    args = parser.parse_args()
+
+    # Run as `python -m app.services.rescore_job`: the app package is
+    # imported first, which configures logging and the MongoDB connection
+    stats = RescoreJob(batch_size=args.batch_size).run(restart=args.restart)
+    logger.info(f"Rescore finished: {stats}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""
+Verification result cache for TrueLine News
+LRU + TTL cache of verify() results with write-driven invalidation and request coalescing
+"""
+
+from app.models import TrustedSource
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future
+from mongoengine import signals
+import copy
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class VerificationResultCache:
+    """
+    Caches verification results per normalized query and depth
+
+    Each entry is tagged with the query keywords and the sources in its
+    result. Writing an article or trusted source invalidates every entry
+    sharing one of its keywords or its source name. Concurrent requests
+    for the same key are coalesced: the first caller computes the result
+    and the others wait for it.
+
+    The cache is per process, so invalidations reach the worker that
+    handled the write immediately and other workers within the TTL.
+    """
+
+    def __init__(self, max_entries=None, ttl=None):
+        self.max_entries = max_entries or int(os.getenv('VERIFY_CACHE_SIZE', 1024))
+        self.ttl = ttl if ttl is not None else int(os.getenv('VERIFY_CACHE_TTL', 300))
+
+        self._entries = OrderedDict()      # key -> (result, expires_at, tags)
+        self._tags = defaultdict(set)      # tag -> keys
+        self._inflight = {}                # key -> Future
+        self._generation = 0               # bumped by every invalidation
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'invalidations': 0}
+
+    @staticmethod
+    def make_key(query, depth):
+        """Normalize a query so trivially different spellings share an entry"""
+        query = query.strip()
+        if query.startswith('http'):
+            normalized = query.rstrip('/')
+        else:
+            normalized = ' '.join(re.findall(r'\w+', query.lower()))
+        return f"{depth}:{normalized}"
+
+    def get_or_compute(self, key, compute, tags_for=None):
+        """
+        Return the cached result for key, computing it at most once
+
+        Args:
+            key (str): Cache key from make_key()
+            compute (callable): Produces the result dict on a miss
+            tags_for (callable): Maps a result to its invalidation tags
+
+        Returns:
+            tuple: (result, cached) where cached is True unless this call computed it
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return copy.deepcopy(entry[0]), True
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                generation = self._generation
+                future = Future()
+                self._inflight[key] = future
+                self.stats['misses'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not owner:
+            return copy.deepcopy(future.result()), True
+
+        try:
+            result = compute()
+        except Exception as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            # Skip storing if a write may have invalidated it mid-computation
+            if 'error' not in result and generation == self._generation:
+                self._store(key, result, tags_for(result) if tags_for else ())
+        future.set_result(result)
+
+        return copy.deepcopy(result), False
+
+    def invalidate(self, keywords=(), sources=()):
+        """Drop every entry tagged with one of the keywords or sources"""
+        tags = [self._keyword_tag(k) for k in keywords if k] + \
+               [self._source_tag(s) for s in sources if s]
+
+        with self._lock:
+            self._generation += 1
+            keys = set()
+            for tag in tags:
+                keys |= self._tags.pop(tag, set())
+            for key in keys:
+                self._remove(key)
+            self.stats['invalidations'] += len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._entries)
+            stats['inflight'] = len(self._inflight)
+        return stats
+
+    @classmethod
+    def tags_for(cls, keywords, sources):
+        return [cls._keyword_tag(k) for k in keywords or [] if k] + \
+               [cls._source_tag(s) for s in sources or [] if s]
+
+    def _store(self, key, result, tags):
+        self._remove(key)
+        tags = set(tags)
+        self._entries[key] = (result, time.monotonic() + self.ttl, tags)
+        for tag in tags:
+            self._tags[tag].add(key)
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    @staticmethod
+    def _keyword_tag(keyword):
+        return 'kw:' + keyword.strip().lower()
+
+    @staticmethod
+    def _source_tag(source):
+        return 'src:' + source.strip().lower()
+
+# Shared per-process cache used by the verification service and write paths
+result_cache = VerificationResultCache()
+
+def _on_trusted_source_changed(sender, document, **kwargs):
+    result_cache.invalidate(sources=[document.name])
+
+signals.post_save.connect(_on_trusted_source_changed, sender=TrustedSource)
+signals.post_delete.connect(_on_trusted_source_changed, sender=TrustedSource)
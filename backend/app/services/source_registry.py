@@ -0,0 +1,160 @@
+"""
+In-process registry of trusted sources
+Resolves source names and URLs to trust scores without a query per source
+"""
+
+from app.models import TrustedSource
+from mongoengine import signals
+from urllib.parse import urlparse
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Second-level suffixes under which registrations happen one label deeper
+MULTI_PART_SUFFIXES = frozenset([
+    'co.uk', 'org.uk', 'ac.uk', 'gov.uk', 'ltd.uk', 'me.uk',
+    'com.au', 'net.au', 'org.au', 'co.nz', 'org.nz', 'co.in', 'co.jp',
+    'co.za', 'com.br', 'com.cn', 'com.mx', 'com.sg', 'com.hk', 'com.tr'
+])
+
+DEFAULT_TRUST_SCORE = 0.5
+
+def registrable_domain(value):
+    """
+    Reduce a URL or host name to its registrable domain
+
+    e.g. https://www.bbc.co.uk/news -> bbc.co.uk, edition.cnn.com -> cnn.com
+
+    Returns:
+        str: The registrable domain, or '' if value has no host
+    """
+    value = (value or '').strip().lower()
+    host = urlparse(value).hostname if '://' in value else value.split('/')[0].split(':')[0]
+    if not host or ' ' in host:
+        return ''
+
+    labels = [label for label in host.split('.') if label]
+    if len(labels) <= 2:
+        return '.'.join(labels)
+    if '.'.join(labels[-2:]) in MULTI_PART_SUFFIXES:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+class SourceRegistry:
+    """
+    Cached view of the TrustedSource documents
+
+    All sources are loaded with one query and indexed by lowercased name,
+    and the active ones also by registrable domain, so a name or an
+    article URL resolves in O(1). Trust scores resolve a deactivated
+    source by its name too, as scoring always has; a deactivated source
+    only stops vouching for URLs on its domain. The snapshot is reloaded
+    after SOURCE_REGISTRY_TTL seconds, or on the next lookup after a
+    TrustedSource is saved or deleted in this process.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else int(os.getenv('SOURCE_REGISTRY_TTL', 60))
+
+        self._sources = []
+        self._by_name = {}
+        self._by_domain = {}
+        self._loaded_at = None
+        self._loaded_version = None
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, source, include_inactive=False):
+        """
+        Find the trusted source for a name, domain or URL
+
+        Args:
+            source (str): Source name, domain or URL
+            include_inactive (bool): Also match deactivated sources by name
+
+        Returns:
+            TrustedSource: The matching source, or None
+        """
+        self._ensure_fresh()
+
+        if not source:
+            return None
+
+        match = self._by_name.get(source.strip().lower())
+        if match is not None and not (match.is_active or include_inactive):
+            match = None
+        if match is None:
+            match = self._by_domain.get(registrable_domain(source))
+        return match
+
+    def get_scores(self, sources):
+        """
+        Trust scores for many sources at once, deactivated sources included
+
+        Returns:
+            dict: source -> trustworthiness score (DEFAULT_TRUST_SCORE if unknown)
+        """
+        scores = {}
+        for source in sources:
+            match = self.lookup(source, include_inactive=True)
+            scores[source] = match.trustworthiness_score if match else DEFAULT_TRUST_SCORE
+        return scores
+
+    def active_sources(self):
+        """All active trusted sources, as loaded"""
+        self._ensure_fresh()
+        return list(self._sources)
+
+    def invalidate(self):
+        """Force a reload on next access"""
+        with self._lock:
+            self._version += 1
+
+    def _ensure_fresh(self):
+        loaded_at = self._loaded_at
+        if loaded_at is not None and self._loaded_version == self._version \
+                and time.monotonic() - loaded_at < self.ttl:
+            return
+
+        with self._lock:
+            if self._loaded_at is loaded_at:
+                self._load()
+
+    def _load(self):
+        version = self._version
+        loaded = list(TrustedSource.objects)
+        sources = [source for source in loaded if source.is_active]
+
+        by_name = {}
+        by_domain = {}
+        for source in loaded:
+            if source.name:
+                # An active source wins a case-insensitive name clash
+                key = source.name.strip().lower()
+                if source.is_active or key not in by_name:
+                    by_name[key] = source
+        for source in sources:
+            for value in (source.domain, source.url):
+                domain = registrable_domain(value)
+                if domain:
+                    by_domain.setdefault(domain, source)
+
+        self._sources = sources
+        self._by_name = by_name
+        self._by_domain = by_domain
+        self._loaded_at = time.monotonic()
+        self._loaded_version = version
+
+        logger.info(f"Source registry loaded: {len(sources)} active of {len(loaded)} sources")
+
+# Shared per-process registry used by the verification service and routes
+source_registry = SourceRegistry()
+
+def _on_trusted_source_changed(sender, document, **kwargs):
+    source_registry.invalidate()
+
+signals.post_save.connect(_on_trusted_source_changed, sender=TrustedSource)
+signals.post_delete.connect(_on_trusted_source_changed, sender=TrustedSource)
@@ -0,0 +1,197 @@
+"""
+Incrementally maintained per-source article statistics
+Keeps TrustedSource.article_count, verified_count and verification_rate in step with the articles
+"""
+
+from app.models import Article, TrustedSource
+from app.services.source_registry import source_registry
+from collections import defaultdict
+from mongoengine import signals
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+import argparse
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+class SourceStats:
+    """
+    Article counters on TrustedSource, updated as articles are written
+
+    Every article write reports the article's (source, status) before and
+    after it; the difference becomes a count delta and a verified delta
+    for the trusted source that the registry resolves the source name or
+    URL to. The deltas of a batch are summed per source and applied with
+    one atomic update per source, which adds them to the counters and
+    recomputes verification_rate from the new values in the same write.
+    Articles from unknown sources are not counted.
+
+    Counters can drift: a failed update, a write made outside these hooks,
+    or a source registered after its articles. reconcile() recounts
+    everything with one aggregation and fixes any source that is off; run
+    it periodically with `python -m app.services.source_stats`.
+    """
+
+    def __init__(self, reconcile_interval=None):
+        self.reconcile_interval = reconcile_interval or \
+            int(os.getenv('SOURCE_STATS_RECONCILE_INTERVAL', 3600))
+        self.source_registry = source_registry
+
+    def article_written(self, before=None, after=None):
+        """
+        Count one article write
+
+        Args:
+            before (tuple): (source, status) before the write, None if it was created
+            after (tuple): (source, status) after the write, None if it was deleted
+        """
+        self.apply(self.deltas(before, after))
+
+    @staticmethod
+    def deltas(before=None, after=None):
+        """
+        Counter changes of one article write
+
+        Returns:
+            list: (source, article delta, verified delta) tuples
+        """
+        changes = []
+        if before is not None:
+            changes.append((before[0], -1, -int(before[1] == 'verified')))
+        if after is not None:
+            changes.append((after[0], 1, int(after[1] == 'verified')))
+        return changes
+
+    def apply(self, changes):
+        """
+        Add counter changes to the trusted sources, one update per source
+
+        Returns:
+            int: Number of sources updated
+        """
+        try:
+            totals = defaultdict(lambda: [0, 0])
+            for source, count_delta, verified_delta in changes:
+                trusted = self.source_registry.lookup(source)
+                if trusted is None:
+                    continue
+                totals[trusted.id][0] += count_delta
+                totals[trusted.id][1] += verified_delta
+
+            operations = [
+                UpdateOne({'_id': source_id}, self._increment(count_delta, verified_delta))
+                for source_id, (count_delta, verified_delta) in totals.items()
+                if count_delta or verified_delta
+            ]
+            if not operations:
+                return 0
+
+            TrustedSource._get_collection().bulk_write(operations, ordered=False)
+        except PyMongoError as e:
+            # The next reconciliation corrects the counters
+            logger.warning(f"Could not update source statistics: {e}")
+            return 0
+        return len(operations)
+
+    def reconcile(self):
+        """
+        Recount articles per active trusted source and fix counters that drifted
+
+        Returns:
+            dict: sources checked, sources corrected and seconds taken
+        """
+        started = time.perf_counter()
+
+        counted = defaultdict(lambda: [0, 0])
+        groups = Article._get_collection().aggregate([
+            {'$group': {
+                '_id': '$source',
+                'count': {'$sum': 1},
+                'verified': {'$sum': {'$cond': [{'$eq': ['$status', 'verified']}, 1, 0]}}
+            }}
+        ])
+        for group in groups:
+            trusted = self.source_registry.lookup(group['_id'])
+            if trusted is not None:
+                counted[trusted.id][0] += group['count']
+                counted[trusted.id][1] += group['verified']
+
+        operations = []
+        stored = TrustedSource._get_collection().find(
+            {'is_active': True}, projection={'article_count': 1, 'verified_count': 1, 'verification_rate': 1}
+        )
+        checked = 0
+        for source in stored:
+            checked += 1
+            count, verified = counted.get(source['_id'], (0, 0))
+            rate = verified / count if count else 0.0
+            if (source.get('article_count'), source.get('verified_count')) != (count, verified) \
+                    or abs((source.get('verification_rate') or 0.0) - rate) > 1e-9:
+                operations.append(UpdateOne(
+                    {'_id': source['_id']},
+                    {'$set': {'article_count': count, 'verified_count': verified, 'verification_rate': rate}}
+                ))
+
+        if operations:
+            TrustedSource._get_collection().bulk_write(operations, ordered=False)
+            self.source_registry.invalidate()
+
+        stats = {
+            'checked': checked,
+            'corrected': len(operations),
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+        logger.info(f"Source statistics reconciled: {stats}")
+        return stats
+
+    @staticmethod
+    def _increment(count_delta, verified_delta):
+        """
+        Update pipeline adding the deltas and recomputing the rate
+
+        Equivalent to $inc on the counters, but the rate is derived from the
+        incremented values in the same atomic write, so concurrent writers
+        never leave it out of step.
+        """
+        return [
+            {'$set': {
+                'article_count': {'$add': [{'$ifNull': ['$article_count', 0]}, count_delta]},
+                'verified_count': {'$add': [{'$ifNull': ['$verified_count', 0]}, verified_delta]}
+            }},
+            {'$set': {
+                'verification_rate': {'$cond': [
+                    {'$gt': ['$article_count', 0]},
+                    {'$divide': ['$verified_count', '$article_count']},
+                    0.0
+                ]}
+            }}
+        ]
+
+# Shared per-process statistics maintained by the article routes and bulk ingest
+source_stats = SourceStats()
+
+def _on_article_deleted(sender, document, **kwargs):
+    source_stats.article_written(before=(document.source, document.status))
+
+signals.post_delete.connect(_on_article_deleted, sender=Article)
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconcile trusted source article statistics')
+    parser.add_argument('--once', action='store_true', help='Reconcile once, then exit')
+    args = parser.parse_args()
+
+    # Run as `python -m app.services.source_stats`: the app package is
+    # imported first, which configures logging and the MongoDB connection
+    while True:
+        try:
+            source_stats.reconcile()
+        except PyMongoError as e:
+            logger.warning(f"Source statistics reconciliation failed: {e}")
+        if args.once:
+            return
+        time.sleep(source_stats.reconcile_interval)
+
+if __name__ == '__main__':
+    main()
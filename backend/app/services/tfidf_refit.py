@@ -0,0 +1,187 @@
+"""
+Refit of the shared TF-IDF model and re-vectorization of the stored articles
+Runs in the enrichment worker (or as its own job), never in a serving process
+"""
+
+from app.models import Article
+from app.utils.tfidf_model import tfidf_model
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+import argparse
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Vectors of the next model, promoted onto the articles once it is published
+STAGING_COLLECTION = 'tfidf_staging'
+
+class TfidfRefitJob:
+    """
+    Refits the TF-IDF model when the corpus has changed
+
+    A refit is skipped while the corpus marker (article count, newest
+    _id and newest verified_date) matches the one stored with the current
+    model. Otherwise the model is fitted on the newest TFIDF_FIT_SAMPLE
+    articles, and every stored article is vectorized with it into the
+    staging collection before the model is published. Right after
+    publishing, the staged vectors are copied onto the articles with bulk
+    updates, which need no vectorizing. Articles edited since they were
+    staged (last_updated moved on) are left alone and re-vectorized by a
+    final catch-up pass instead. Stored vectors therefore lag the
+    published model only for the length of the copy, not of a whole
+    re-vectorization.
+
+    Serving processes only reload the published file. Run one job per
+    deployment (the enrichment worker does, every TFIDF_REFIT_INTERVAL
+    seconds), with TFIDF_MODEL_PATH on storage the serving hosts share.
+    """
+
+    def __init__(self, model=None, refit_interval=None, batch_size=None):
+        self.model = model or tfidf_model
+        self.refit_interval = refit_interval if refit_interval is not None else \
+            int(os.getenv('TFIDF_REFIT_INTERVAL', 3600))
+        self.batch_size = batch_size or int(os.getenv('TFIDF_REVECTORIZE_BATCH_SIZE', 500))
+        self._checked_at = float('-inf')
+
+    def run_if_due(self):
+        """Refit if TFIDF_REFIT_INTERVAL has passed since the last check (0 disables)"""
+        if self.refit_interval <= 0 or time.monotonic() - self._checked_at < self.refit_interval:
+            return None
+        self._checked_at = time.monotonic()
+        return self.run()
+
+    def run(self, force=False):
+        """
+        Refit and re-vectorize, unless the corpus is unchanged
+
+        Returns:
+            dict: version, staged, promoted, caught_up and seconds, or None
+                if the refit was skipped
+        """
+        started = time.perf_counter()
+        corpus = self.corpus_marker()
+        if not force and self.model.is_fitted and self.model.corpus == corpus:
+            logger.info("Corpus unchanged since the last TF-IDF fit; skipping the refit")
+            return None
+
+        articles = Article._get_collection().find({}, projection={'content': 1}) \
+            .sort('verified_date', -1).limit(self.model.fit_sample)
+        version, vectorizer = self.model.build(article.get('content') for article in articles)
+        if version is None:
+            return None
+
+        staged = self._stage(version, vectorizer)
+        self.model.publish(version, vectorizer, corpus)
+        promoted = self._promote()
+        caught_up = self._catch_up(version)
+
+        stats = {
+            'version': version,
+            'staged': staged,
+            'promoted': promoted,
+            'caught_up': caught_up,
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+        logger.info(f"TF-IDF refit finished: {stats}")
+        return stats
+
+    @staticmethod
+    def corpus_marker():
+        """Cheap fingerprint of the corpus: count, newest _id and newest verified_date"""
+        collection = Article._get_collection()
+        newest = collection.find_one({}, projection={'_id': 1}, sort=[('_id', -1)])
+        latest = collection.find_one({}, projection={'verified_date': 1}, sort=[('verified_date', -1)])
+        return {
+            'count': collection.estimated_document_count(),
+            'newest': str(newest['_id']) if newest else None,
+            'verified': latest['verified_date'].isoformat() if latest and latest.get('verified_date') else None
+        }
+
+    def _stage(self, version, vectorizer):
+        """Vectorize every article with the unpublished model into the staging collection"""
+        database = Article._get_collection().database
+        staging = database[STAGING_COLLECTION]
+        staging.drop()
+
+        staged = 0
+        for batch in self._batches({}, {'content': 1, 'last_updated': 1}):
+            matrix = vectorizer.transform([article.get('content') or '' for article in batch]).tocsr()
+            staging.insert_many([
+                {
+                    '_id': article['_id'],
+                    'tfidf_vector': self.model.storage_form(matrix.getrow(i)) if article.get('content') else {},
+                    'tfidf_version': version,
+                    'last_updated': article.get('last_updated')
+                }
+                for i, article in enumerate(batch)
+            ], ordered=False)
+            staged += len(batch)
+        return staged
+
+    def _promote(self):
+        """Copy the staged vectors onto articles that were not edited since staging"""
+        collection = Article._get_collection()
+        staging = collection.database[STAGING_COLLECTION]
+
+        promoted = 0
+        for batch in self._batches({}, None, collection=staging):
+            promoted += collection.bulk_write([
+                UpdateOne(
+                    {'_id': staged['_id'], 'last_updated': staged.get('last_updated')},
+                    {'$set': {'tfidf_vector': staged['tfidf_vector'], 'tfidf_version': staged['tfidf_version']}}
+                )
+                for staged in batch
+            ], ordered=False).modified_count
+        staging.drop()
+        return promoted
+
+    def _catch_up(self, version):
+        """Vectorize articles edited or added since staging with the published model"""
+        collection = Article._get_collection()
+        caught_up = 0
+        for batch in self._batches({'tfidf_version': {'$ne': version}}, {'content': 1, 'last_updated': 1}):
+            operations = []
+            for article in batch:
+                vector, _ = self.model.vectorize_for_storage(article.get('content'))
+                operations.append(UpdateOne(
+                    # Skipped if the article is edited meanwhile; the edit stores its own vector
+                    {'_id': article['_id'], 'last_updated': article.get('last_updated')},
+                    {'$set': {'tfidf_vector': vector, 'tfidf_version': version}}
+                ))
+            caught_up += collection.bulk_write(operations, ordered=False).modified_count
+        return caught_up
+
+    def _batches(self, query, projection, collection=None):
+        """Matching documents (articles by default) in _id order, batch_size at a time"""
+        collection = collection if collection is not None else Article._get_collection()
+        last_id = None
+        while True:
+            page_query = dict(query, _id={'$gt': last_id}) if last_id is not None else query
+            batch = list(collection.find(page_query, projection=projection).sort('_id', 1).limit(self.batch_size))
+            if not batch:
+                return
+            yield batch
+            last_id = batch[-1]['_id']
+
+def main():
+    parser = argparse.ArgumentParser(description='Refit the TF-IDF model and re-vectorize stored articles')
+    parser.add_argument('--once', action='store_true', help='Refit once, then exit')
+    parser.add_argument('--force', action='store_true', help='Refit even if the corpus is unchanged')
+    args = parser.parse_args()
+
+    # Run as `python -m app.services.tfidf_refit`: the app package is
+    # imported first, which configures logging and the MongoDB connection
+    job = TfidfRefitJob()
+    while True:
+        try:
+            job.run(force=args.force)
+        except PyMongoError as e:
+            logger.warning(f"TF-IDF refit failed: {e}")
+        if args.once:
+            return
+        time.sleep(max(job.refit_interval, 60))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Request-scoped context for the verification pipeline
+"""
+
+from contextlib import contextmanager
+import time
+
+class VerificationContext:
+    """
+    Shared state for one verify() call
+
+    Pipeline stages read their inputs from and write their outputs to the
+    context, and any derived value is memoized the first time it is
+    computed, so nothing is worked out twice per request. Wall time per
+    stage is recorded in milliseconds.
+    """
+
+    def __init__(self, query, depth='standard'):
+        self.query = query
+        self.depth = depth
+        self.timings = {}
+        self._values = {}
+
+    def get(self, name, compute):
+        """
+        Return the memoized value for name, computing it on first use
+
+        Args:
+            name (str): Value name
+            compute (callable): Zero-argument function producing the value
+        """
+        if name not in self._values:
+            self._values[name] = compute()
+        return self._values[name]
+
+    def set(self, name, value):
+        self._values[name] = value
+
+    def __getitem__(self, name):
+        return self._values[name]
+
+    def __contains__(self, name):
+        return name in self._values
+
+    @contextmanager
+    def stage(self, name):
+        """Time a pipeline stage, accumulating if it runs more than once"""
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.timings[name] = round(self.timings.get(name, 0.0) + elapsed, 3)
+
+    def get_timings(self):
+        """Per-stage wall time in milliseconds, plus the total"""
+        timings = dict(self.timings)
+        timings['total'] = round(sum(self.timings.values()), 3)
+        return timings
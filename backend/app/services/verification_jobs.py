@@ -0,0 +1,272 @@
+"""
+Asynchronous verification jobs
+Jobs are persisted in Mongo and run by a bounded pool of worker threads in each process
+"""
+
+from app.models import VerificationJob
+from collections import deque
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+import logging
+import numpy as np
+import os
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class VerificationJobQueue:
+    """
+    Mongo-backed queue of verification jobs
+
+    submit() stores a job and returns immediately. Every process that uses
+    the queue runs VERIFY_JOB_WORKERS threads which claim the oldest queued
+    job with an atomic find-and-modify, so a job runs once however many
+    gunicorn workers poll the collection. A claim is a lease, renewed by a
+    heartbeat thread while the job runs: if a worker dies mid-job, the job
+    becomes claimable again after VERIFY_JOB_LEASE seconds, up to
+    VERIFY_JOB_MAX_ATTEMPTS runs. A worker that lost its lease meanwhile
+    discards its result rather than overwrite the new holder's.
+
+    Serving processes start their threads at fork (see app.start_workers),
+    so queued jobs are picked up before any request reaches the queue.
+    """
+
+    def __init__(self, runner, workers=None, poll_interval=None, lease=None, max_attempts=None):
+        """
+        Args:
+            runner (callable): runner(query, depth, include_timings) -> result dict
+        """
+        self.runner = runner
+        self.workers = workers or int(os.getenv('VERIFY_JOB_WORKERS', 2))
+        self.poll_interval = poll_interval or float(os.getenv('VERIFY_JOB_POLL_INTERVAL', 1.0))
+        self.lease = lease or int(os.getenv('VERIFY_JOB_LEASE', 120))
+        self.max_attempts = max_attempts or int(os.getenv('VERIFY_JOB_MAX_ATTEMPTS', 3))
+
+        self._threads = []
+        self._started_pid = None
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        # Jobs this process is running: job id -> (worker, attempts) of the claim
+        self._running = {}
+
+        # Recent queue wait times (seconds) of jobs started in this process
+        self._wait_times = deque(maxlen=1000)
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0}
+
+    def submit(self, query, depth='standard', include_timings=False):
+        """
+        Queue a verification
+
+        Returns:
+            VerificationJob: The saved job
+        """
+        job = VerificationJob(query=query, depth=depth, include_timings=include_timings)
+        job.save()
+
+        self.ensure_started()
+        with self._lock:
+            self.stats['submitted'] += 1
+        self._wakeup.set()
+        return job
+
+    def get(self, job_id):
+        """
+        Return a job by id, with its queue position while it waits
+
+        Returns:
+            dict: The job, or None if there is no such job
+        """
+        self.ensure_started()
+
+        job = VerificationJob.objects(id=job_id).first()
+        if job is None:
+            return None
+
+        data = job.to_dict()
+        if job.status == 'queued':
+            data['queue_position'] = VerificationJob.objects(
+                status='queued', created_at__lt=job.created_at
+            ).count() + 1
+        return data
+
+    def get_metrics(self):
+        """
+        Queue depth and wait times
+
+        Depth and oldest wait come from the shared collection; wait-time
+        percentiles cover the recent jobs started in this process.
+        """
+        self.ensure_started()
+
+        collection = VerificationJob._get_collection()
+        oldest = collection.find_one({'status': 'queued'}, sort=[('created_at', 1)], projection={'created_at': 1})
+
+        with self._lock:
+            waits = list(self._wait_times)
+            stats = dict(self.stats)
+
+        metrics = {
+            'queued': collection.count_documents({'status': 'queued'}),
+            'running': collection.count_documents({'status': 'running'}),
+            'oldest_queued_seconds': round(
+                (datetime.utcnow() - oldest['created_at']).total_seconds(), 3
+            ) if oldest else 0.0,
+            'workers': self.workers,
+            'process': stats
+        }
+        if waits:
+            metrics['wait_seconds'] = {
+                'samples': len(waits),
+                'mean': round(float(np.mean(waits)), 3),
+                'p50': round(float(np.percentile(waits, 50)), 3),
+                'p95': round(float(np.percentile(waits, 95)), 3),
+                'max': round(float(np.max(waits)), 3)
+            }
+        return metrics
+
+    def ensure_started(self):
+        """Start this process's worker and lease heartbeat threads, once per process"""
+        if self._started_pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._started_pid == os.getpid():
+                return
+            self._running = {}
+            self._stop.clear()
+            self._threads = [
+                threading.Thread(target=self._work_loop, name=f'verify-job-{i}', daemon=True)
+                for i in range(self.workers)
+            ]
+            self._threads.append(threading.Thread(target=self._heartbeat_loop, name='verify-job-lease', daemon=True))
+            for thread in self._threads:
+                thread.start()
+            self._started_pid = os.getpid()
+
+    def stop(self):
+        """Stop this process's threads once their current job finishes"""
+        with self._lock:
+            self._stop.set()
+            self._wakeup.set()
+            self._started_pid = None
+
+    def _work_loop(self):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+        while not self._stop.is_set():
+            # Cleared before claiming, so a job submitted after this point
+            # is either claimed now or wakes the wait below
+            self._wakeup.clear()
+            try:
+                job = self._claim(worker_id)
+            except Exception as e:
+                logger.warning(f"Could not claim verification job: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                continue
+
+            self._run(job)
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.lease / 3):
+            self.renew_leases()
+
+    def renew_leases(self):
+        """Extend the lease of every job this process is running"""
+        with self._lock:
+            running = list(self._running.items())
+
+        for job_id, (worker, attempts) in running:
+            try:
+                renewed = VerificationJob._get_collection().update_one(
+                    {'_id': job_id, 'worker': worker, 'attempts': attempts, 'status': 'running'},
+                    {'$set': {'lease_expires': datetime.utcnow() + timedelta(seconds=self.lease)}}
+                )
+            except Exception as e:
+                logger.warning(f"Could not renew the lease of verification job {job_id}: {e}")
+                continue
+            if not renewed.matched_count:
+                logger.warning(f"Verification job {job_id} lost its lease")
+
+    def _claim(self, worker_id):
+        """Atomically take the oldest runnable job, or return None"""
+        now = datetime.utcnow()
+        document = VerificationJob._get_collection().find_one_and_update(
+            {
+                '$or': [
+                    {'status': 'queued'},
+                    {'status': 'running', 'lease_expires': {'$lt': now}}
+                ]
+            },
+            {
+                '$set': {
+                    'status': 'running',
+                    'worker': worker_id,
+                    'started_at': now,
+                    'lease_expires': now + timedelta(seconds=self.lease)
+                },
+                '$inc': {'attempts': 1}
+            },
+            sort=[('created_at', 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if document is None:
+            return None
+        return VerificationJob._from_son(document)
+
+    def _run(self, job):
+        with self._lock:
+            self._wait_times.append((job.started_at - job.created_at).total_seconds())
+
+        if job.attempts > self.max_attempts:
+            self._finish(job, 'failed', error='Job was abandoned by its workers too many times')
+            return
+
+        started = time.perf_counter()
+        with self._lock:
+            self._running[job.id] = (job.worker, job.attempts)
+        try:
+            result = self.runner(job.query, job.depth, job.include_timings)
+        except Exception as e:
+            logger.error(f"Verification job {job.id} failed: {e}")
+            self._finish(job, 'failed', error=str(e))
+            return
+        finally:
+            with self._lock:
+                self._running.pop(job.id, None)
+
+        if 'error' in result:
+            self._finish(job, 'failed', error=result['error'])
+        else:
+            self._finish(job, 'done', result=result)
+
+        logger.info(f"Verification job {job.id} finished in {time.perf_counter() - started:.2f}s")
+
+    def _finish(self, job, status, result=None, error=None):
+        try:
+            # Only the current lease holder may finish the job
+            finished = VerificationJob._get_collection().update_one(
+                {'_id': job.id, 'worker': job.worker, 'attempts': job.attempts, 'status': 'running'},
+                {'$set': {
+                    'status': status,
+                    'result': result or {},
+                    'error': error,
+                    'finished_at': datetime.utcnow(),
+                    'lease_expires': None
+                }}
+            )
+        except Exception as e:
+            logger.error(f"Could not record result of verification job {job.id}: {e}")
+            return
+
+        if not finished.matched_count:
+            logger.warning(f"Verification job {job.id} was claimed by another worker; result discarded")
+            return
+
+        with self._lock:
+            self.stats['completed' if status == 'done' else 'failed'] += 1
@@ -6,8 +6,17 @@ Handles news validation, source analysis, and credibility scoring
 from app.utils.nlp_processor import NLPProcessor
 from app.utils.web_scraper import WebScraper
 from app.utils.credibility_analyzer import CredibilityAnalyzer
-from app.models import Article, TrustedSource
+from app.utils.minhash import minhasher
+from app.services.keyword_index import keyword_index
+from app.services.aggregate_retrieval import aggregate_retriever
+from app.services.verification_context import VerificationContext
+from app.services.result_cache import result_cache
+from app.services.source_registry import source_registry, DEFAULT_TRUST_SCORE
+from app.models import Article
 import logging
+import os
+import threading
+import numpy as np
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -21,78 +30,69 @@ class VerificationService:
         self.nlp_processor = NLPProcessor()
         self.web_scraper = WebScraper()
         self.credibility_analyzer = CredibilityAnalyzer()
+        self.keyword_index = keyword_index
+        self.result_cache = result_cache
+        self.source_registry = source_registry
+        self.minhasher = minhasher
+        self.collapse_duplicates = os.getenv('VERIFY_COLLAPSE_DUPLICATES', 'true').lower() in ('1', 'true', 'yes')
+        self.match_limit = int(os.getenv('MATCH_TOP_K', 50))
+        # 'index' (in-memory keyword index) or 'aggregate' (one MongoDB aggregation)
+        self.retrieval = os.getenv('VERIFY_RETRIEVAL', 'index').lower()
+        self.aggregate_retriever = aggregate_retriever
+        self.fetch_deadline = float(os.getenv('SCRAPER_FETCH_DEADLINE', 15))
     
-    def verify(self, query, depth='standard'):
+    # Verification pipeline stages, run in order against one VerificationContext
+    PIPELINE = ('keywords', 'match', 'fetch', 'dedupe', 'reliability', 'consistency', 'scoring')
+    
+    def verify(self, query, depth='standard', include_timings=False):
         """
         Verify a news story and return credibility assessment
         
         Args:
             query (str): News headline or URL to verify
             depth (str): Verification depth - basic, standard, or deep
+            include_timings (bool): Add per-stage wall times (ms) under 'timings'
         
         Returns:
             dict: Verification result with credibility score and details
         """
+        contexts = []
+        
+        def compute():
+            context = VerificationContext(query, depth)
+            contexts.append(context)
+            return self._run_pipeline(context)
+        
+        def tags_for(result):
+            context = contexts[0]
+            keywords = context['keywords'] if 'keywords' in context else []
+            return self.result_cache.tags_for(keywords, result.get('sources'))
+        
+        # Results are cached per normalized query and depth, and identical
+        # concurrent queries share one computation
+        key = self.result_cache.make_key(query, depth)
+        result, _ = self.result_cache.get_or_compute(key, compute, tags_for)
+        
+        if include_timings:
+            result['timings'] = contexts[0].get_timings() if contexts else {'cached': True}
+        
+        return result
+    
+    def _run_pipeline(self, context):
+        """Run every pipeline stage against the context and return the result"""
         try:
-            # Search for matching articles
-            matching_articles = self._find_matching_articles(query)
-            
-            # If query is a URL, scrape and analyze it
-            if query.startswith('http'):
-                content = self.web_scraper.scrape(query)
-                if content:
-                    matching_articles.append({'url': query, 'content': content})
-            
-            if not matching_articles:
-                return {
-                    'is_verified': False,
-                    'credibility_score': 0.0,
-                    'verified_sources': 0,
-                    'is_original': False,
-                    'status': 'No matching articles found',
-                    'sources': []
-                }
-            
-            # Extract key information from query
-            keywords = self.nlp_processor.extract_keywords(query)
-            
-            # Find reporting sources
-            sources = self._find_reporting_sources(matching_articles, keywords)
-            
-            # Analyze source trustworthiness
-            source_reliability = self._analyze_source_reliability(sources)
+            for stage in self.PIPELINE:
+                with context.stage(stage):
+                    getattr(self, f'_stage_{stage}')(context)
+                
+                # A stage can finish the request early, e.g. when nothing matched
+                if 'result' in context:
+                    break
             
-            # Calculate credibility score
-            credibility_score = self.credibility_analyzer.calculate_score(
-                num_sources=len(sources),
-                source_reliability=source_reliability,
-                content_consistency=self._check_content_consistency(matching_articles),
-                spread_pattern=self._analyze_spread_pattern(matching_articles)
-            )
-            
-            # Determine if original reporting
-            is_original = self._is_original_reporting(matching_articles)
-            
-            # Final verification decision
-            is_verified = credibility_score >= 0.6 and len(sources) > 1
-            
-            return {
-                'is_verified': is_verified,
-                'credibility_score': credibility_score,
-                'verified_sources': len(sources),
-                'is_original': is_original,
-                'status': 'verified' if is_verified else 'unverified',
-                'sources': sources,
-                'keywords': keywords,
-                'details': {
-                    'source_reliability': source_reliability,
-                    'content_consistency': self._check_content_consistency(matching_articles),
-                    'spread_pattern_healthy': self._analyze_spread_pattern(matching_articles)
-                }
-            }
+            return context['result']
         
         except Exception as e:
-            logger.error(f"Verification failed for query '{query}': {e}")
+            logger.error(f"Verification failed for query '{context.query}': {e}")
             return {
                 'is_verified': False,
                 'credibility_score': 0.0,
@@ -100,6 +100,104 @@ class VerificationService:
                 'error': str(e)
             }
     
+    def _stage_keywords(self, context):
+        """Extract key information from query"""
+        context.get('keywords', lambda: self.nlp_processor.extract_keywords(context.query))
+    
+    def _stage_match(self, context):
+        """Search for matching articles"""
+        if self.retrieval == 'aggregate' and 'matching_articles' not in context:
+            articles, trust = self._find_matching_articles_aggregate(context['keywords'])
+            context.set('matching_articles', articles)
+            context.set('source_trust', trust)
+            return
+        
+        context.get('matching_articles', lambda: self._find_matching_articles(
+            context.query, keywords=context['keywords']
+        ))
+    
+    def _stage_fetch(self, context):
+        """If query is a URL, scrape and analyze it"""
+        matching_articles = context['matching_articles']
+        
+        urls = [context.query] if context.query.startswith('http') else []
+        if urls:
+            fetched = self.web_scraper.scrape_many(urls, deadline=self.fetch_deadline)
+            for url in urls:
+                if url in fetched['results']:
+                    matching_articles.append({'url': url, 'content': fetched['results'][url]})
+        
+        if not matching_articles:
+            context.set('result', {
+                'is_verified': False,
+                'credibility_score': 0.0,
+                'verified_sources': 0,
+                'is_original': False,
+                'status': 'No matching articles found',
+                'sources': []
+            })
+    
+    def _stage_dedupe(self, context):
+        """Collapse near-duplicate (syndicated) articles into one source event each"""
+        matching_articles = context['matching_articles']
+        if not self.collapse_duplicates:
+            context.set('source_events', matching_articles)
+            context.set('duplicates_collapsed', 0)
+            return
+        
+        source_events = context.get('source_events', lambda: self._collapse_duplicates(matching_articles))
+        context.set('duplicates_collapsed', len(matching_articles) - len(source_events))
+    
+    def _stage_reliability(self, context):
+        """Find reporting sources and analyze their trustworthiness"""
+        sources = context.get('sources', lambda: self._find_reporting_sources(
+            context['source_events'], context['keywords']
+        ))
+        known = context['source_trust'] if 'source_trust' in context else None
+        context.get('source_reliability', lambda: self._analyze_source_reliability(sources, known))
+    
+    def _stage_consistency(self, context):
+        """All-pairs consistency and spread pattern of the matched articles"""
+        source_events = context['source_events']
+        context.get('consistency', lambda: self._analyze_consistency(source_events))
+        context.get('spread_pattern', lambda: self._analyze_spread_pattern(source_events))
+    
+    def _stage_scoring(self, context):
+        """Calculate credibility score and build the result"""
+        sources = context['sources']
+        consistency = context['consistency']
+        
+        credibility_score = self.credibility_analyzer.calculate_score(
+            num_sources=len(sources),
+            source_reliability=context['source_reliability'],
+            content_consistency=consistency['score'],
+            spread_pattern=context['spread_pattern']
+        )
+        
+        # Determine if original reporting
+        is_original = self._is_original_reporting(context['matching_articles'])
+        
+        # Final verification decision
+        is_verified = credibility_score >= 0.6 and len(sources) > 1
+        
+        context.set('result', {
+            'is_verified': is_verified,
+            'credibility_score': credibility_score,
+            'verified_sources': len(sources),
+            'is_original': is_original,
+            'status': 'verified' if is_verified else 'unverified',
+            'sources': sources,
+            'keywords': context['keywords'],
+            'details': {
+                'source_reliability': context['source_reliability'],
+                'content_consistency': consistency['score'],
+                'consistency_min': consistency['min'],
+                'outlier_sources': consistency['outlier_sources'],
+                'duplicates_collapsed': context['duplicates_collapsed'],
+                'spread_pattern_healthy': context['spread_pattern']
+            }
+        })
+    
     def analyze_credibility(self, url):
         """
         Deep credibility analysis of a specific article URL
@@ -119,8 +217,11 @@ class VerificationService:
             # Find similar articles
             similar_articles = self._find_similar_articles(content, keywords)
             
+            # Stored copies of the same text under other URLs
+            syndication_candidates = self._find_syndication_candidates(content, exclude_url=url)
+            
             # Analyze for manipulated content
-            manipulation_score = self._detect_content_manipulation(content)
+            manipulation = self._detect_content_manipulation(content, sentiment)
             
             # Build credibility profile
             credibility_profile = {
@@ -128,7 +229,10 @@ class VerificationService:
                 'sentiment_score': sentiment,
                 'keywords': keywords,
                 'similar_articles': len(similar_articles),
-                'manipulation_score': manipulation_score,
+                'syndication_candidates': syndication_candidates,
+                'manipulation_score': manipulation.get('risk_level', 0.0),
+                'manipulation_indicators': manipulation.get('indicators', {}),
+                'lexicon_matches': manipulation.get('matches', {}),
                 'analysis_timestamp': datetime.utcnow().isoformat()
             }
             
@@ -143,17 +247,23 @@ class VerificationService:
         Compare multiple sources reporting the same story
         """
         try:
-            articles = []
-            for url in urls:
-                content = self.web_scraper.scrape(url)
-                if content:
-                    articles.append({'url': url, 'content': content})
+            # Fetch all sources concurrently under one deadline
+            fetched = self.web_scraper.scrape_many(urls, deadline=self.fetch_deadline)
+            articles = [
+                {'url': url, 'content': fetched['results'][url]}
+                for url in urls if url in fetched['results']
+            ]
             
             if not articles:
-                return {'error': 'Failed to retrieve articles'}
+                return {
+                    'error': 'Failed to retrieve articles',
+                    'failed_sources': fetched['failed'],
+                    'timed_out_sources': fetched['timed_out']
+                }
             
             # Analyze consistency
-            consistency = self._check_content_consistency(articles)
+            consistency_analysis = self._analyze_consistency(articles)
+            consistency = consistency_analysis['score']
             
             # Find common elements
             common_keywords = self._find_common_elements(articles)
@@ -164,8 +274,11 @@ class VerificationService:
             return {
                 'compared_sources': len(articles),
                 'consistency_score': consistency,
+                'outlier_sources': consistency_analysis['outlier_sources'],
                 'common_keywords': common_keywords,
                 'source_reliability': source_reliability,
+                'failed_sources': fetched['failed'],
+                'timed_out_sources': fetched['timed_out'],
                 'verdict': 'Consistent reporting' if consistency > 0.7 else 'Inconsistent reporting'
             }
         
@@ -173,21 +286,65 @@ class VerificationService:
             logger.error(f"Source comparison failed: {e}")
             return {'error': str(e)}
     
-    def _find_matching_articles(self, query):
+    def _find_matching_articles(self, query, keywords=None):
         """Find articles matching the query"""
         try:
             # Search in database
-            keywords = self.nlp_processor.extract_keywords(query)
-            articles = Article.objects.filter(keywords__in=keywords, status='verified')
+            if keywords is None:
+                keywords = self.nlp_processor.extract_keywords(query)
+            ranked = self.keyword_index.search(keywords, top_k=self.match_limit)
+            if not ranked:
+                return []
+            
+            # Only the top-ranked articles are loaded, in rank order, and
+            # only their precomputed features
+            article_ids = [article_id for article_id, _ in ranked]
+            articles = Article.objects(id__in=article_ids).only(
+                'url', 'source', 'tfidf_vector', 'tfidf_version', 'minhash'
+            )
+            by_id = {str(a.id): a for a in articles}
+            
+            # Raw content is read only for articles not (or no longer) enriched
+            version = self.nlp_processor.tfidf_model.version
+            unenriched = [
+                a.id for a in by_id.values()
+                if not a.minhash or not a.tfidf_vector or version is None or a.tfidf_version != version
+            ]
+            contents = {}
+            if unenriched:
+                contents = {
+                    str(a.id): a.content
+                    for a in Article.objects(id__in=unenriched).only('content')
+                }
             
             return [
-                {'url': a.url, 'content': a.content, 'source': a.source}
-                for a in articles
+                {
+                    'url': by_id[i].url,
+                    'content': contents.get(i, ''),
+                    'source': by_id[i].source,
+                    'tfidf_vector': by_id[i].tfidf_vector,
+                    'tfidf_version': by_id[i].tfidf_version,
+                    'minhash': by_id[i].minhash
+                }
+                for i in article_ids if i in by_id
             ]
         except Exception as e:
             logger.warning(f"Error finding matching articles: {e}")
             return []
     
+    def _find_matching_articles_aggregate(self, keywords):
+        """
+        Find matching articles, and the trust score of their sources, in one round trip
+        
+        Returns:
+            tuple: (articles, source -> trust score or None); ([], {}) on failure
+        """
+        try:
+            return self.aggregate_retriever.search(keywords, limit=self.match_limit)
+        except Exception as e:
+            logger.warning(f"Error finding matching articles by aggregation: {e}")
+            return [], {}
+    
     def _find_reporting_sources(self, articles, keywords):
         """Identify all sources reporting the story"""
         sources = set()
@@ -196,42 +353,108 @@ class VerificationService:
                 sources.add(article['source'])
         return list(sources)
     
-    def _analyze_source_reliability(self, sources):
-        """Analyze trustworthiness of reporting sources"""
-        reliability_scores = {}
+    def _collapse_duplicates(self, articles):
+        """
+        Keep one article per near-duplicate cluster
         
-        for source in sources:
-            try:
-                trusted_source = TrustedSource.objects(name=source).first()
-                if trusted_source:
-                    reliability_scores[source] = trusted_source.trustworthiness_score
-                else:
-                    reliability_scores[source] = 0.5  # Default neutral score
-            except Exception as e:
-                logger.warning(f"Error analyzing source {source}: {e}")
-                reliability_scores[source] = 0.5
+        Articles are clustered on their MinHash signatures (computed here for
+        scraped content that has none stored), and the best-ranked article of
+        each cluster stands for the whole cluster.
         
-        return reliability_scores
+        Returns:
+            list: Representative articles, in their original order
+        """
+        try:
+            signatures = [
+                article.get('minhash') or self.minhasher.signature(article.get('content', ''))
+                for article in articles
+            ]
+            clusters = self.minhasher.cluster(signatures)
+            
+            seen = set()
+            representatives = []
+            for article, cluster in zip(articles, clusters):
+                if cluster not in seen:
+                    seen.add(cluster)
+                    representatives.append(article)
+            return representatives
+        except Exception as e:
+            logger.warning(f"Error collapsing duplicate articles: {e}")
+            return articles
+    
+    def _analyze_source_reliability(self, sources, known=None):
+        """
+        Analyze trustworthiness of reporting sources
+        
+        Args:
+            sources (list): Source names or URLs
+            known (dict): Scores already joined by the retrieval query, if any
+        """
+        try:
+            known = known or {}
+            scores = {source: known[source] for source in sources if known.get(source) is not None}
+            
+            # Names and URLs both resolve through the cached registry
+            scores.update(self.source_registry.get_scores(
+                [source for source in sources if source not in scores]
+            ))
+            return scores
+        except Exception as e:
+            logger.warning(f"Error analyzing sources: {e}")
+            return {source: DEFAULT_TRUST_SCORE for source in sources}
     
     def _check_content_consistency(self, articles):
         """Check consistency of content across sources"""
+        return self._analyze_consistency(articles)['score']
+    
+    def _analyze_consistency(self, articles):
+        """
+        Derive consistency from the all-pairs similarity matrix
+        
+        All articles are vectorized once (stored vectors are reused) and
+        compared in a single sparse matrix product.
+        
+        Returns:
+            dict: score (mean pairwise similarity), min, and outlier_sources
+                whose articles agree with the rest unusually little
+        """
         if len(articles) < 2:
-            return 1.0
+            return {'score': 1.0, 'min': 1.0, 'outlier_sources': []}
         
         try:
-            # Simple similarity check (can be enhanced with more sophisticated algorithms)
-            consistency_scores = []
-            for i in range(len(articles) - 1):
-                similarity = self.nlp_processor.calculate_similarity(
-                    articles[i].get('content', ''),
-                    articles[i + 1].get('content', '')
-                )
-                consistency_scores.append(similarity)
+            matrix = self.nlp_processor.similarity_matrix(
+                [article.get('content', '') for article in articles],
+                vectors=[self._stored_vector(article) for article in articles]
+            )
+            
+            n = len(articles)
+            pairs = matrix[np.triu_indices(n, k=1)]
+            
+            # Mean similarity of each article to all the others; an outlier
+            # agrees with the rest less than half as much as the median article
+            per_article = (matrix.sum(axis=1) - 1.0) / (n - 1)
+            threshold = 0.5 * np.median(per_article)
+            outliers = []
+            if n > 2:
+                for i in np.flatnonzero(per_article < threshold):
+                    label = articles[i].get('source') or articles[i].get('url')
+                    if label not in outliers:
+                        outliers.append(label)
             
-            return sum(consistency_scores) / len(consistency_scores) if consistency_scores else 0.5
+            return {
+                'score': float(pairs.mean()),
+                'min': float(pairs.min()),
+                'outlier_sources': outliers
+            }
         except Exception as e:
             logger.warning(f"Error checking consistency: {e}")
-            return 0.5
+            return {'score': 0.5, 'min': 0.5, 'outlier_sources': []}
+    
+    def _stored_vector(self, article):
+        """Stored TF-IDF vector of an article, if it matches the current model"""
+        return self.nlp_processor.tfidf_model.from_storage(
+            article.get('tfidf_vector'), article.get('tfidf_version')
+        )
     
     def _analyze_spread_pattern(self, articles):
         """Analyze how the news spread across sources"""
@@ -244,27 +467,88 @@ class VerificationService:
         return len(articles) > 0
     
     def _find_similar_articles(self, content, keywords):
-        """Find articles with similar content"""
+        """Find articles with similar content, counting syndicated copies once"""
         try:
-            similar = Article.objects.filter(keywords__in=keywords).limit(10)
-            return list(similar)
+            similar = list(Article.objects.filter(keywords__in=keywords).only('minhash').limit(10))
+            clusters = self.minhasher.cluster([article.minhash for article in similar])
+            
+            seen = set()
+            distinct = []
+            for article, cluster in zip(similar, clusters):
+                if cluster not in seen:
+                    seen.add(cluster)
+                    distinct.append(article)
+            return distinct
         except Exception as e:
             logger.warning(f"Error finding similar articles: {e}")
             return []
     
-    def _detect_content_manipulation(self, content):
+    def _find_syndication_candidates(self, content, exclude_url=None, limit=20):
+        """
+        Stored articles that are near-duplicates of the content
+        
+        Candidates come from the indexed LSH band keys, so only articles
+        sharing at least one band are read, never the whole collection.
+        
+        Returns:
+            list: Dicts with url, source and estimated similarity, most similar first
+        """
+        try:
+            signature = self.minhasher.signature(content)
+            bands = self.minhasher.band_keys(signature)
+            if not bands:
+                return []
+            
+            candidates = []
+            for article in Article.objects(lsh_bands__in=bands).only('url', 'source', 'minhash'):
+                if article.url == exclude_url:
+                    continue
+                similarity = self.minhasher.similarity(signature, article.minhash)
+                if similarity >= self.minhasher.threshold:
+                    candidates.append({
+                        'url': article.url,
+                        'source': article.source,
+                        'similarity': round(similarity, 3)
+                    })
+            
+            candidates.sort(key=lambda c: c['similarity'], reverse=True)
+            return candidates[:limit]
+        except Exception as e:
+            logger.warning(f"Error finding syndication candidates: {e}")
+            return []
+    
+    def _detect_content_manipulation(self, content, sentiment_score=0.0):
         """Detect signs of content manipulation or sensationalism"""
-        # Analyze for clickbait, manipulated facts, etc.
-        return 0.0  # Placeholder
+        # Clickbait, sensational and unattributed language from one lexicon scan
+        return self.credibility_analyzer.detect_misinformation_indicators(content, sentiment_score)
     
     def _find_common_elements(self, articles):
         """Find common keywords across articles"""
         all_keywords = []
-        for article in articles:
-            keywords = self.nlp_processor.extract_keywords(article.get('content', ''))
+        for keywords in self.nlp_processor.extract_keywords_batch(
+            [article.get('content', '') for article in articles]
+        ):
             all_keywords.extend(keywords)
         
         # Find most common
         from collections import Counter
         common = Counter(all_keywords).most_common(5)
         return [keyword for keyword, _ in common]
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_verification_service():
+    """
+    Shared per-process VerificationService, built on first use
+    
+    Importing the routes no longer constructs the service, so the app
+    imports fast and the service is only built where it is used.
+    """
+    global _service
+    
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = VerificationService()
+    return _service
@@ -0,0 +1,297 @@
+"""
+Write-behind buffering for append-only documents
+Records are queued in memory and written with insert_many off the request path
+"""
+
+from app.models import VerificationLog
+from bson import json_util
+from collections import deque
+from pymongo.errors import BulkWriteError
+import atexit
+import glob
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+class WriteBehindWriter:
+    """
+    Batches inserts of one Document class
+
+    add() only validates and queues the record. A background thread writes
+    the queue with unordered insert_many whenever batch_size records are
+    waiting or flush_interval seconds have passed. The queue holds at most
+    max_queue records; past that, records are appended to spill_path (as
+    extended JSON lines, replayed on a later successful flush) or, without
+    a spill file, dropped. Whatever is queued is flushed at interpreter
+    exit, which covers gunicorn's graceful worker shutdown.
+
+    A replay first claims the spill file by renaming it to
+    <spill_path>.<pid>.replay. Claimed files left by a process that died
+    mid-replay are picked up by the first flush of a later process.
+
+    insert_many gives each record its _id on the first attempt, so a
+    retried record that did reach the database fails with a duplicate key
+    error and counts as flushed. When the database rejects single records,
+    only those are dropped; only records whose write never completed are
+    retried.
+    """
+
+    def __init__(self, document_class, batch_size=None, flush_interval=None, max_queue=None, spill_path=None):
+        self.document_class = document_class
+        self.batch_size = batch_size or int(os.getenv('LOG_FLUSH_BATCH_SIZE', 200))
+        self.flush_interval = flush_interval or float(os.getenv('LOG_FLUSH_INTERVAL', 2.0))
+        self.max_queue = max_queue or int(os.getenv('LOG_QUEUE_MAX', 10000))
+        self.spill_path = spill_path if spill_path is not None else os.getenv('LOG_SPILL_PATH', '')
+
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # Serializes appends to the spill file; never held with _lock
+        self._spill_lock = threading.Lock()
+        self._recovered_pid = None
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._thread_pid = None
+        self.stats = {'queued': 0, 'flushed': 0, 'dropped': 0, 'spilled': 0, 'replayed': 0, 'failed_flushes': 0}
+
+        atexit.register(self.close)
+
+    def add(self, document):
+        """
+        Queue a document for insertion
+
+        Returns:
+            bool: False if the document was invalid or had to be dropped
+        """
+        try:
+            document.validate()
+            record = document.to_mongo().to_dict()
+        except Exception as e:
+            logger.warning(f"Discarding invalid {self.document_class.__name__}: {e}")
+            with self._lock:
+                self.stats['dropped'] += 1
+            return False
+
+        self._ensure_started()
+
+        with self._lock:
+            if len(self._queue) < self.max_queue:
+                self._queue.append(record)
+                self.stats['queued'] += 1
+                if len(self._queue) >= self.batch_size:
+                    self._wakeup.set()
+                return True
+
+        return self._overflow([record])
+
+    def flush(self):
+        """
+        Write everything queued now
+
+        Returns:
+            int: Number of records written
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                if not batch:
+                    break
+
+                inserted, retry = self._insert(batch)
+                written += inserted
+                if retry:
+                    self._requeue(retry)
+                    return written
+
+            # The queue drained cleanly, so catch up on anything spilled
+            if self.spill_path:
+                if self._recovered_pid != os.getpid():
+                    written += self._replay_leftovers()
+                    self._recovered_pid = os.getpid()
+                if os.path.exists(self.spill_path):
+                    written += self._replay_spill()
+
+        return written
+
+    def close(self):
+        """Flush what is queued; called at exit"""
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Final {self.document_class.__name__} flush failed: {e}")
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['pending'] = len(self._queue)
+        return stats
+
+    def _insert(self, records):
+        """
+        Insert records, sorting out which ones made it
+
+        Returns:
+            tuple: (number of records now stored, records to retry)
+        """
+        name = self.document_class.__name__
+        try:
+            self.document_class._get_collection().insert_many(records, ordered=False)
+        except BulkWriteError as e:
+            stored = e.details.get('nInserted', 0)
+            rejected = 0
+            for error in e.details.get('writeErrors', []):
+                if error.get('code') == DUPLICATE_KEY_ERROR:
+                    # Written by an earlier attempt that looked failed
+                    stored += 1
+                else:
+                    rejected += 1
+                    logger.error(f"Dropping {name} record rejected by the database: {error.get('errmsg')}")
+            with self._lock:
+                self.stats['flushed'] += stored
+                self.stats['dropped'] += rejected
+            return stored, []
+        except Exception as e:
+            logger.warning(f"Writing {len(records)} {name} records failed: {e}")
+            with self._lock:
+                self.stats['failed_flushes'] += 1
+            return 0, records
+
+        with self._lock:
+            self.stats['flushed'] += len(records)
+        return len(records), []
+
+    def _requeue(self, records):
+        """Put a failed batch back at the front, overflowing what does not fit"""
+        with self._lock:
+            room = max(self.max_queue - len(self._queue), 0)
+            kept, overflow = records[:room], records[room:]
+            self._queue.extendleft(reversed(kept))
+
+        if overflow:
+            self._overflow(overflow)
+
+    def _overflow(self, records):
+        if self.spill_path:
+            # Serialized and written without _lock, so add() never waits on the disk
+            payload = ''.join(json_util.dumps(record) + '\n' for record in records)
+            try:
+                with self._spill_lock, open(self.spill_path, 'a') as spill:
+                    spill.write(payload)
+            except OSError as e:
+                logger.error(f"Could not spill records to {self.spill_path}: {e}")
+            else:
+                with self._lock:
+                    self.stats['spilled'] += len(records)
+                return True
+
+        with self._lock:
+            self.stats['dropped'] += len(records)
+        return False
+
+    def _replay_spill(self):
+        """Insert records spilled earlier; the file is claimed by renaming it"""
+        return self._claim_and_replay(self.spill_path)
+
+    def _replay_leftovers(self):
+        """Replay files claimed by processes that died before finishing them"""
+        replayed = 0
+        for path in glob.glob(glob.escape(self.spill_path) + '.*.replay'):
+            pid = path[len(self.spill_path) + 1:-len('.replay')]
+            if not pid.isdigit() or (int(pid) != os.getpid() and self._is_running(int(pid))):
+                continue
+            logger.info(f"Replaying spill file left by process {pid}: {path}")
+            replayed += self._claim_and_replay(path)
+        return replayed
+
+    @staticmethod
+    def _is_running(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            # Exists, but belongs to another user
+            return True
+        return True
+
+    def _claim_and_replay(self, path):
+        """Rename path to this process's claimed file, then insert its records"""
+        claimed = f"{self.spill_path}.{os.getpid()}.replay"
+        earlier = 0
+        if path != claimed and os.path.exists(claimed):
+            # An earlier replay of ours stopped part-way; renaming onto it would lose it
+            earlier = self._claim_and_replay(claimed)
+        try:
+            if path != claimed:
+                os.rename(path, claimed)
+        except FileNotFoundError:
+            return earlier
+        except OSError as e:
+            logger.warning(f"Could not claim spill file {path}: {e}")
+            return earlier
+
+        replayed = 0
+        with open(claimed) as spill:
+            batch = []
+            for line in spill:
+                if line.strip():
+                    batch.append(json_util.loads(line))
+                if len(batch) >= self.batch_size:
+                    replayed += self._replay_batch(batch)
+                    batch = []
+            if batch:
+                replayed += self._replay_batch(batch)
+
+        os.remove(claimed)
+        with self._lock:
+            self.stats['replayed'] += replayed
+        return earlier + replayed
+
+    def _replay_batch(self, batch):
+        inserted, retry = self._insert(batch)
+        if retry:
+            self._overflow(retry)
+        return inserted
+
+    def _ensure_started(self):
+        """Start the flusher thread once per process"""
+        if self._thread_pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread_pid == os.getpid():
+                return
+            # Records queued before a fork belong to the parent
+            self._queue.clear()
+            self._thread = threading.Thread(
+                target=self._flush_loop, name=f'{self.document_class.__name__}-writer', daemon=True
+            )
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def _flush_loop(self):
+        backoff = self.flush_interval
+        while True:
+            self._wakeup.wait(backoff)
+            self._wakeup.clear()
+
+            before = self.stats['failed_flushes']
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"{self.document_class.__name__} flush failed: {e}")
+
+            # Back off while the database is failing
+            if self.stats['failed_flushes'] > before:
+                backoff = min(backoff * 2, 60.0)
+            else:
+                backoff = self.flush_interval
+
+# Shared per-process writer for verification logs
+verification_log_writer = WriteBehindWriter(VerificationLog)
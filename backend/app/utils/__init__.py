@@ -5,5 +5,11 @@ Utils module initialization
 from app.utils.nlp_processor import NLPProcessor
 from app.utils.web_scraper import WebScraper
 from app.utils.credibility_analyzer import CredibilityAnalyzer
+from app.utils.http_cache import HTTPCache
+from app.utils.http_session import PooledSession
+from app.utils.parsed_page import ParsedPage
+from app.utils.minhash import MinHasher
+from app.utils.lexicon_matcher import LexiconMatcher
 
-__all__ = ['NLPProcessor', 'WebScraper', 'CredibilityAnalyzer']
+__all__ = ['NLPProcessor', 'WebScraper', 'CredibilityAnalyzer', 'HTTPCache', 'PooledSession',
+           'ParsedPage', 'MinHasher', 'LexiconMatcher']
@@ -0,0 +1,241 @@
+"""
+Per-article content features computed in a pool of worker processes
+Keywords, sentiment, vectors and indicators are CPU-bound, so bulk paths run them outside the GIL
+"""
+
+from app.utils.credibility_analyzer import CredibilityAnalyzer
+from app.utils.minhash import minhasher
+from app.utils.tfidf_model import tfidf_model
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+# Worker processes of the current pool report their pids here, so a hung
+# pool can be terminated without reaching into the executor
+_worker_pids = None
+
+# Pool settings for serving processes; the standalone CLIs switch to fork
+# and a larger pool (see use_standalone_pool)
+_default_start_method = 'forkserver'
+_default_workers = int(os.getenv('ENRICH_WORKERS', 2))
+
+# NLPProcessor of the current worker process (or of the parent, for the inline fallback)
+_nlp = None
+_analyzer = CredibilityAnalyzer()
+
+def _init_worker(worker_pids):
+    """Build the NLP processor once per worker process"""
+    global _nlp
+    from app.utils.nlp_processor import NLPProcessor
+
+    worker_pids.put(os.getpid())
+    _nlp = NLPProcessor()
+
+def compute_features(content):
+    """
+    Content features stored on Article
+
+    Returns:
+        dict: keywords, sentiment_score, minhash, lsh_bands, tfidf_vector,
+            tfidf_version and indicators
+    """
+    content = content or ''
+    signature = minhasher.signature(content)
+    tfidf_vector, tfidf_version = tfidf_model.vectorize_for_storage(content)
+    sentiment = _nlp.analyze_sentiment(content)
+    return {
+        'keywords': _nlp.extract_keywords(content),
+        'sentiment_score': sentiment,
+        'minhash': signature,
+        'lsh_bands': minhasher.band_keys(signature),
+        'tfidf_vector': tfidf_vector,
+        'tfidf_version': tfidf_version,
+        'indicators': indicator_features(content, sentiment)
+    }
+
+def indicator_features(content, sentiment_score=0.0):
+    """
+    Misinformation indicators of a content, as stored on Article
+
+    Returns:
+        dict: The indicator flags, risk_level and the number of matches per lexicon
+    """
+    analysis = _analyzer.detect_misinformation_indicators(content, sentiment_score)
+    if 'error' in analysis:
+        return {}
+
+    features = dict(analysis['indicators'])
+    features['risk_level'] = analysis['risk_level']
+    features['lexicon_counts'] = {name: len(matches) for name, matches in analysis['matches'].items()}
+    return features
+
+def _compute_chunk(contents):
+    return [compute_features(content) for content in contents]
+
+def _keywords_chunk(task):
+    texts, top_n, ranked = task
+    return [_nlp.extract_keywords(text, top_n=top_n, ranked=ranked) for text in texts]
+
+def _sentiment_chunk(texts):
+    return [_nlp.score_sentiment(text) for text in texts]
+
+def use_standalone_pool():
+    """
+    Pool settings of the standalone CLIs, for pools built from now on
+
+    The standalone CLI workers run no other application threads, so they
+    can use 'fork' (unless ENRICH_START_METHOD is set) and let workers
+    inherit the loaded NLTK data, and they own the host's cores, so their
+    pool has ENRICH_CLI_WORKERS processes (default: one per core).
+
+    Server processes keep the 'forkserver' default: gunicorn workers run
+    other threads (the keyword index refresher, the HTTP pools), and
+    forking while one of them holds a lock can deadlock the child. Every
+    gunicorn worker has a pool of its own, each process holding its own
+    NLP resources, so theirs stays at ENRICH_WORKERS (default 2).
+    """
+    global _default_start_method, _default_workers
+    _default_start_method = 'fork'
+    _default_workers = int(os.getenv('ENRICH_CLI_WORKERS') or os.cpu_count() or 2)
+
+def get_enrichment_pool():
+    """
+    Return the process-wide enrichment pool
+
+    Worker processes are started with ENRICH_START_METHOD (by default
+    'forkserver', see use_standalone_pool) and are rebuilt after the
+    owning process forks. The fork server imports this module once, so
+    each worker only has to load the NLP resources.
+    """
+    global _pool, _pool_pid, _worker_pids
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            context = multiprocessing.get_context(os.getenv('ENRICH_START_METHOD') or _default_start_method)
+            if context.get_start_method() == 'forkserver':
+                context.set_forkserver_preload([__name__])
+            _worker_pids = context.SimpleQueue()
+            _pool = ProcessPoolExecutor(
+                max_workers=_default_workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(_worker_pids,)
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+def _reset_pool(terminate=False):
+    """Shut the pool down so the next call builds a new one"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            if terminate:
+                # A hung worker never finishes its task; shutdown alone would leave it running
+                while not _worker_pids.empty():
+                    try:
+                        os.kill(_worker_pids.get(), signal.SIGTERM)
+                    except ProcessLookupError:
+                        pass
+        _pool = None
+
+def _map_chunks(function, tasks):
+    """
+    Run function over tasks in the pool, or inline in this process if the
+    pool breaks or does not finish within ENRICH_TIMEOUT seconds
+    """
+    global _nlp
+
+    try:
+        results = []
+        timeout = float(os.getenv('ENRICH_TIMEOUT', 300))
+        for chunk_results in get_enrichment_pool().map(function, tasks, timeout=timeout or None):
+            results.extend(chunk_results)
+        return results
+    except TimeoutError:
+        logger.warning("Enrichment pool timed out, computing inline")
+        _reset_pool(terminate=True)
+    except (BrokenProcessPool, OSError) as e:
+        logger.warning(f"Enrichment pool failed, computing inline: {e}")
+        _reset_pool()
+
+    if _nlp is None:
+        from app.utils.nlp_processor import NLPProcessor
+        _nlp = NLPProcessor()
+
+    results = []
+    for task in tasks:
+        results.extend(function(task))
+    return results
+
+def _chunked(items, chunk_size):
+    chunk_size = chunk_size or int(os.getenv('ENRICH_CHUNK_SIZE', 50))
+    return [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+def enrich_contents(contents, chunk_size=None):
+    """
+    Compute features for many article contents in parallel
+
+    Contents are sent to the workers in chunks to amortize pickling. If
+    the pool breaks (e.g. a worker was killed) or times out, the batch is
+    computed in this process instead and the pool is rebuilt on the next
+    call.
+
+    Args:
+        contents (list): Article texts
+        chunk_size (int): Texts per task (default: ENRICH_CHUNK_SIZE)
+
+    Returns:
+        list: One feature dict per content, in order
+    """
+    contents = list(contents)
+    if not contents:
+        return []
+
+    return _map_chunks(_compute_chunk, _chunked(contents, chunk_size))
+
+def extract_keywords_parallel(texts, top_n=10, ranked=False, chunk_size=None):
+    """
+    NLPProcessor.extract_keywords for many texts, spread over the pool
+
+    Args:
+        texts (list): Texts to analyze
+        top_n (int): Number of keywords per text
+        ranked (bool): Rank keywords by TF-IDF salience
+        chunk_size (int): Texts per task (default: ENRICH_CHUNK_SIZE)
+
+    Returns:
+        list: One keyword list per text, in order
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+
+    tasks = [(chunk, top_n, ranked) for chunk in _chunked(texts, chunk_size)]
+    return _map_chunks(_keywords_chunk, tasks)
+
+def analyze_sentiment_parallel(texts, chunk_size=None):
+    """
+    Uncached NLPProcessor sentiment scores of many texts, spread over the pool
+
+    Args:
+        texts (list): Non-empty texts to score
+        chunk_size (int): Texts per task (default: ENRICH_CHUNK_SIZE)
+
+    Returns:
+        list: One score per text, in order
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+
+    return _map_chunks(_sentiment_chunk, _chunked(texts, chunk_size))
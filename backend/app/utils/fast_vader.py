@@ -0,0 +1,83 @@
+"""
+Faster drop-in for NLTK's VADER SentimentIntensityAnalyzer
+Scores are identical; only the punctuation-stripping step is computed differently
+"""
+
+import logging
+import string
+
+from nltk.sentiment.vader import SentimentIntensityAnalyzer, SentiText
+
+logger = logging.getLogger(__name__)
+
+class FastSentiText(SentiText):
+    """
+    SentiText without the word/punctuation product table
+
+    SentiText maps every word of the text glued to every entry of PUNC_LIST
+    (both sides) back to the bare word, which costs ~30 dict entries per
+    distinct word on every call and dominates the time spent scoring short
+    texts. The words contain no punctuation, so a token can only match
+    with its whole leading or trailing punctuation run; looking that up per
+    token gives the same result.
+    """
+
+    def _words_and_emoticons(self):
+        punctuation = string.punctuation
+        punc_list = set(self.PUNC_LIST)
+        words_only = {
+            word for word in self.REGEX_REMOVE_PUNCTUATION.sub("", self.text).split()
+            if len(word) > 1
+        }
+
+        wes = [we for we in self.text.split() if len(we) > 1]
+        for i, we in enumerate(wes):
+            stripped = we.rstrip(punctuation)
+            if stripped != we and we[len(stripped):] in punc_list and stripped in words_only:
+                wes[i] = stripped
+                continue
+
+            stripped = we.lstrip(punctuation)
+            if stripped != we and we[:len(we) - len(stripped)] in punc_list and stripped in words_only:
+                wes[i] = stripped
+        return wes
+
+class FastSentimentIntensityAnalyzer(SentimentIntensityAnalyzer):
+    """
+    SentimentIntensityAnalyzer scoring through FastSentiText
+    """
+
+    def polarity_scores(self, text):
+        """
+        Same as SentimentIntensityAnalyzer.polarity_scores
+
+        Returns:
+            dict: neg, neu, pos and compound scores
+        """
+        sentitext = FastSentiText(
+            text, self.constants.PUNC_LIST, self.constants.REGEX_REMOVE_PUNCTUATION
+        )
+        sentiments = []
+        words_and_emoticons = sentitext.words_and_emoticons
+
+        # Position of each token's first occurrence, as list.index() would give
+        first_index = {}
+        for i, token in enumerate(words_and_emoticons):
+            first_index.setdefault(token, i)
+
+        for item in words_and_emoticons:
+            valence = 0
+            i = first_index[item]
+            if (
+                i < len(words_and_emoticons) - 1
+                and item.lower() == "kind"
+                and words_and_emoticons[i + 1].lower() == "of"
+            ) or item.lower() in self.constants.BOOSTER_DICT:
+                sentiments.append(valence)
+                continue
+
+            sentiments = self.sentiment_valence(valence, sentitext, item, i, sentiments)
+
+        sentiments = self._but_check(words_and_emoticons, sentiments)
+
+        return self.score_valence(sentiments, text)
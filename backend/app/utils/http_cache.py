@@ -0,0 +1,374 @@
+"""
+Persistent HTTP response cache for the web scraper
+Stores response bodies on disk, content-addressed, with TTL and LRU eviction
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class CacheEntry:
+    """
+    A cached HTTP response
+
+    Metadata is kept in memory; the body is read from its blob file on
+    first access. Another process may evict the blob meanwhile, so callers
+    that serve the body check HTTPCache.load() first.
+    """
+
+    def __init__(self, cache, url, digest, status_code=200, headers=None,
+                 etag=None, last_modified=None, stored_at=None, size=0):
+        self._cache = cache
+        self._content = None
+        self.url = url
+        self.digest = digest
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at or time.time()
+        self.size = size
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = self._cache._read_blob(self.digest)
+        return self._content
+
+    @property
+    def age(self):
+        return time.time() - self.stored_at
+
+    def conditional_headers(self):
+        """Request headers for revalidating this entry"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_dict(self):
+        return {
+            'url': self.url,
+            'digest': self.digest,
+            'status_code': self.status_code,
+            'headers': self.headers,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'stored_at': self.stored_at,
+            'size': self.size
+        }
+
+class HTTPCache:
+    """
+    On-disk HTTP response cache shared by all workers on a host
+
+    Each URL has a small JSON metadata file pointing at a body blob named
+    by the SHA-256 of its content, so identical bodies are stored once.
+    Entries younger than the TTL are served without any network access;
+    older ones are revalidated with ETag/Last-Modified. Blob access times
+    drive LRU eviction once the byte budget is exceeded; eviction frees
+    down to EVICT_TO of the budget, so it runs once per many stores rather
+    than on every one. Metadata of evicted blobs is removed lazily, when
+    its URL is next looked up, plus an occasional sweep of the leftovers.
+
+    Every process counts only its own stores, so the directory is also
+    re-measured every SIZE_SCAN_INTERVAL seconds and before evicting.
+    Files are written in tmp/ and renamed into place, so a write in
+    progress is neither counted nor evicted.
+    """
+
+    # Fraction of max_bytes an eviction frees the cache down to
+    EVICT_TO = 0.9
+    # Seconds between sweeps for metadata whose blob was evicted
+    META_SWEEP_INTERVAL = 3600
+    # Seconds between re-measurements of the blobs all processes stored
+    SIZE_SCAN_INTERVAL = 60
+    # Age after which a temporary file is taken to be left by a crashed writer
+    STALE_TMP_AGE = 3600
+
+    def __init__(self, directory=None, ttl=None, max_bytes=None):
+        self.directory = directory or os.getenv(
+            'SCRAPER_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'trueline_http_cache')
+        )
+        self.ttl = ttl if ttl is not None else int(os.getenv('SCRAPER_CACHE_TTL', 900))
+        self.max_bytes = max_bytes if max_bytes is not None else \
+            int(os.getenv('SCRAPER_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+        self._meta_dir = os.path.join(self.directory, 'meta')
+        self._blob_dir = os.path.join(self.directory, 'blobs')
+        self._tmp_dir = os.path.join(self.directory, 'tmp')
+        for directory in (self._meta_dir, self._blob_dir, self._tmp_dir):
+            os.makedirs(directory, exist_ok=True)
+        self._remove_stale_tmp()
+
+        self._lock = threading.Lock()
+        self._total_bytes = self._scan_size()
+        self._scanned_at = self._swept_at = time.monotonic()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'revalidated': 0,
+            'stores': 0,
+            'evictions': 0
+        }
+
+    def lookup(self, url):
+        """
+        Find the cached entry for a URL
+
+        Returns:
+            CacheEntry: The entry, or None if the URL is not cached
+        """
+        try:
+            with open(self._meta_path(url), 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if not os.path.exists(self._blob_path(data['digest'])):
+            # The blob was evicted; its metadata goes with it
+            self._remove_file(self._meta_path(url))
+            return None
+
+        return CacheEntry(self, **data)
+
+    def load(self, entry):
+        """
+        Read the body of an entry before serving it
+
+        Returns:
+            bool: False if the blob was evicted since the lookup, which
+                counts as a miss (the metadata is removed too)
+        """
+        if entry._content is None:
+            try:
+                with open(self._blob_path(entry.digest), 'rb') as f:
+                    entry._content = f.read()
+            except FileNotFoundError:
+                self._remove_file(self._meta_path(entry.url))
+                return False
+            except OSError as e:
+                logger.warning(f"Failed to read cached response for {entry.url}: {e}")
+                return False
+        return True
+
+    def is_fresh(self, entry):
+        return entry is not None and entry.age < self.ttl
+
+    def record_hit(self, entry):
+        """Count a fresh hit and mark the entry as recently used"""
+        self._touch(entry.digest)
+        self._count('hits')
+
+    def record_miss(self):
+        self._count('misses')
+
+    def revalidate(self, entry):
+        """
+        Mark a stale entry as fresh again after a 304 Not Modified
+
+        Returns:
+            CacheEntry: The refreshed entry
+        """
+        entry.stored_at = time.time()
+        self._write_meta(entry)
+        self._touch(entry.digest)
+        self._count('revalidated')
+        return entry
+
+    def store(self, url, content, status_code=200, headers=None):
+        """
+        Store a response body for a URL
+
+        Args:
+            url (str): Requested URL
+            content (bytes): Response body
+            status_code (int): HTTP status code
+            headers (dict): Response headers
+
+        Returns:
+            CacheEntry: The stored entry, or None if the response is not cacheable
+        """
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        if 'no-store' in headers.get('cache-control', ''):
+            return None
+        if len(content) > self.max_bytes:
+            return None
+
+        digest = hashlib.sha256(content).hexdigest()
+        entry = CacheEntry(
+            self, url, digest,
+            status_code=status_code,
+            headers={'content-type': headers.get('content-type', '')},
+            etag=headers.get('etag'),
+            last_modified=headers.get('last-modified'),
+            size=len(content)
+        )
+        entry._content = content
+
+        try:
+            blob_path = self._blob_path(digest)
+            if os.path.exists(blob_path):
+                self._touch(digest)
+            else:
+                self._atomic_write(blob_path, content)
+                with self._lock:
+                    self._total_bytes += len(content)
+
+            self._write_meta(entry)
+            self._count('stores')
+            self._evict_if_needed()
+        except OSError as e:
+            logger.warning(f"Failed to cache response for {url}: {e}")
+
+        return entry
+
+    def clear(self):
+        """Remove every cached entry"""
+        for directory in (self._meta_dir, self._blob_dir):
+            for name in os.listdir(directory):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+        with self._lock:
+            self._total_bytes = 0
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['bytes'] = self._total_bytes
+        lookups = stats['hits'] + stats['revalidated'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['revalidated']) / lookups if lookups else 0.0
+        return stats
+
+    def _evict_if_needed(self):
+        """Evict least recently used blobs until the cache fits its budget"""
+        with self._lock:
+            rescan = time.monotonic() - self._scanned_at >= self.SIZE_SCAN_INTERVAL
+            if self._total_bytes <= self.max_bytes and not rescan:
+                return
+
+        blobs = []
+        for name in os.listdir(self._blob_dir):
+            path = os.path.join(self._blob_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            blobs.append((stat.st_mtime, stat.st_size, path))
+
+        blobs.sort()
+        # Measured from the directory: it includes other processes' stores
+        total = sum(size for _, size, _ in blobs)
+        target = self.max_bytes * self.EVICT_TO if total > self.max_bytes else total
+        evicted = 0
+        for _, size, path in blobs:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+
+        with self._lock:
+            self._total_bytes = total
+            self._scanned_at = time.monotonic()
+            self.stats['evictions'] += evicted
+            sweep = time.monotonic() - self._swept_at >= self.META_SWEEP_INTERVAL
+            if sweep:
+                self._swept_at = time.monotonic()
+
+        if sweep:
+            self._remove_orphaned_meta()
+
+    def _remove_orphaned_meta(self):
+        """Drop metadata files whose blob has been evicted"""
+        blobs = set(os.listdir(self._blob_dir))
+        for name in os.listdir(self._meta_dir):
+            path = os.path.join(self._meta_dir, name)
+            try:
+                with open(path, 'r') as f:
+                    digest = json.load(f).get('digest')
+            except (OSError, ValueError):
+                continue
+            if digest not in blobs:
+                self._remove_file(path)
+
+    @staticmethod
+    def _remove_file(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _write_meta(self, entry):
+        data = json.dumps(entry.to_dict()).encode()
+        self._atomic_write(self._meta_path(entry.url), data)
+
+    def _read_blob(self, digest):
+        try:
+            with open(self._blob_path(digest), 'rb') as f:
+                return f.read()
+        except OSError:
+            return b''
+
+    def _remove_stale_tmp(self):
+        """Drop temporary files a crashed writer left behind"""
+        cutoff = time.time() - self.STALE_TMP_AGE
+        for name in os.listdir(self._tmp_dir):
+            path = os.path.join(self._tmp_dir, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def _touch(self, digest):
+        try:
+            os.utime(self._blob_path(digest))
+        except OSError:
+            pass
+
+    def _atomic_write(self, path, data):
+        # In tmp/, not next to the target: blobs/ only ever holds complete blobs
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _scan_size(self):
+        total = 0
+        for name in os.listdir(self._blob_dir):
+            try:
+                total += os.path.getsize(os.path.join(self._blob_dir, name))
+            except OSError:
+                pass
+        return total
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _meta_path(self, url):
+        return os.path.join(self._meta_dir, hashlib.sha256(url.encode()).hexdigest() + '.json')
+
+    def _blob_path(self, digest):
+        return os.path.join(self._blob_dir, digest)
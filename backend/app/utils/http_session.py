@@ -0,0 +1,208 @@
+"""
+Pooled HTTP sessions for the web scraper
+Keep-alive connection pools, per-host concurrency caps and jittered retries
+"""
+
+from contextlib import contextmanager
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+import logging
+import os
+import random
+import requests
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Only these methods are retried; they are safe to repeat
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+RETRYABLE_STATUS_CODES = frozenset([429, 502, 503, 504])
+
+class HostLimiter:
+    """
+    Caps the number of in-flight requests per host
+
+    Every worker thread shares one semaphore per host, so a burst of
+    scrapes aimed at the same publisher queues up instead of opening
+    dozens of parallel connections.
+    """
+
+    def __init__(self, max_per_host=None):
+        self.max_per_host = max_per_host or int(os.getenv('SCRAPER_MAX_PER_HOST', 4))
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def limit(self, url, timeout=None):
+        """
+        Hold one of the host's request slots for the duration of the block
+
+        Raises:
+            requests.exceptions.Timeout: If no slot frees up within timeout
+        """
+        release = self.acquire(url, timeout=timeout)
+        try:
+            yield
+        finally:
+            release()
+
+    def acquire(self, url, timeout=None):
+        """
+        Take one of the host's request slots
+
+        Returns:
+            callable: Releases the slot; calling it more than once is harmless
+
+        Raises:
+            requests.exceptions.Timeout: If no slot frees up within timeout
+        """
+        semaphore = self._semaphore(urlparse(url).netloc.lower())
+        if not semaphore.acquire(timeout=timeout):
+            raise requests.exceptions.Timeout(f"Timed out waiting for a connection slot to {url}")
+
+        held = [True]
+        lock = threading.Lock()
+
+        def release():
+            with lock:
+                if held[0]:
+                    held[0] = False
+                    semaphore.release()
+        return release
+
+    def _semaphore(self, host):
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.max_per_host)
+                self._semaphores[host] = semaphore
+            return semaphore
+
+class PooledSession:
+    """
+    Shared keep-alive session with per-host limits and retries
+
+    Connections are pooled per host by the mounted adapters. A request
+    holds its host slot until the response is complete; for stream=True
+    that is until the response is closed, so bodies streamed after the
+    headers still count against SCRAPER_MAX_PER_HOST. Failed
+    requests are retried with full-jitter exponential backoff, but only
+    for idempotent methods and only for connection errors, timeouts and
+    transient gateway responses.
+    """
+
+    def __init__(self, pool_connections=None, pool_maxsize=None, max_per_host=None,
+                 max_retries=None, backoff_base=None, backoff_max=None):
+        self.pool_connections = pool_connections or int(os.getenv('SCRAPER_POOL_CONNECTIONS', 20))
+        self.pool_maxsize = pool_maxsize or int(os.getenv('SCRAPER_POOL_MAXSIZE', 10))
+        self.max_retries = max_retries if max_retries is not None else \
+            int(os.getenv('SCRAPER_MAX_RETRIES', 2))
+        self.backoff_base = backoff_base if backoff_base is not None else \
+            float(os.getenv('SCRAPER_BACKOFF_BASE', 0.3))
+        self.backoff_max = backoff_max if backoff_max is not None else \
+            float(os.getenv('SCRAPER_BACKOFF_MAX', 5.0))
+
+        self.host_limiter = HostLimiter(max_per_host)
+        self.session = self._create_session()
+
+    def _create_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=0
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request through the pool
+
+        Args:
+            method (str): HTTP method
+            url (str): Target URL
+            **kwargs: Passed through to requests.Session.request
+
+        Returns:
+            requests.Response: The final response
+        """
+        method = method.upper()
+        retries = self.max_retries if method in IDEMPOTENT_METHODS else 0
+        attempt = 0
+
+        # Wait for a host slot no longer than the request itself may take
+        slot_timeout = kwargs.get('timeout')
+        if isinstance(slot_timeout, tuple):
+            slot_timeout = sum(t for t in slot_timeout if t)
+
+        while True:
+            release = self.host_limiter.acquire(url, timeout=slot_timeout)
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                release()
+                if attempt >= retries:
+                    raise
+                logger.info(f"Retrying {method} {url} after error: {e}")
+            except BaseException:
+                release()
+                raise
+            else:
+                if kwargs.get('stream'):
+                    # The body is still to be read: keep the slot until close()
+                    self._release_on_close(response, release)
+                else:
+                    release()
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= retries:
+                    return response
+                logger.info(f"Retrying {method} {url} after HTTP {response.status_code}")
+                response.close()
+
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.request('HEAD', url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+    @staticmethod
+    def _release_on_close(response, release):
+        close = response.close
+
+        def close_and_release():
+            try:
+                close()
+            finally:
+                release()
+        response.close = close_and_release
+
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff delay for the given attempt"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+_shared_session = None
+_shared_pid = None
+_shared_lock = threading.Lock()
+
+def get_shared_session():
+    """
+    Return the process-wide pooled session
+
+    Sockets must not be shared across a fork, so a gunicorn worker gets a
+    fresh session the first time it asks for one.
+    """
+    global _shared_session, _shared_pid
+
+    with _shared_lock:
+        if _shared_session is None or _shared_pid != os.getpid():
+            _shared_session = PooledSession()
+            _shared_pid = os.getpid()
+        return _shared_session
@@ -0,0 +1,279 @@
+"""
+Multi-lexicon phrase matcher
+Finds the terms of every indicator lexicon in one pass over the text, with offsets
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Built-in lexicons; LEXICON_PATH can override or add lexicons by name
+DEFAULT_LEXICONS = {
+    'sensational': [
+        'shocking', 'amazing', 'incredible', 'unbelievable', 'must see',
+        "you won't believe", 'doctors hate', 'celebrity', 'scandal', 'exposé', 'viral',
+        'outrageous', 'bombshell', 'jaw-dropping', 'mind-blowing', 'explosive'
+    ],
+    'citation': [
+        'according to', 'sources say', 'said in a statement', 'told reporters',
+        'a spokesperson', 'spokesman', 'spokeswoman', 'press release', 'published in',
+        'data from', 'cited', 'confirmed by', 'court documents', 'official figures'
+    ],
+    'hedging': [
+        'allegedly', 'reportedly', 'rumored', 'rumoured', 'unconfirmed', 'unverified',
+        'it is believed', 'some say', 'sources claim', 'it is said', 'could be', 'might be'
+    ],
+    'clickbait': [
+        "you won't believe", 'what happens next', 'this one trick', 'doctors hate',
+        'will blow your mind', 'goes viral', 'the reason why', "here's why",
+        'they don\'t want you to know', 'number will surprise you', 'must see'
+    ]
+}
+
+# How a character of a term is matched in text
+_WHITESPACE = r'\s+'
+_APOSTROPHE = "['’]"
+_WORD_CHAR = re.compile(r'\w')
+
+# Letters re.IGNORECASE matches to 'i' that casefold() maps elsewhere
+_FOLD_I = str.maketrans({'ı': 'i', 'İ': 'i'})
+
+class LexiconMatcher:
+    """
+    Matches many lexicons of words and phrases in a single scan
+
+    All terms are compiled into one regular expression shaped like a trie
+    (shared prefixes are matched once), so scanning a page is one linear
+    pass in the regex engine however many terms there are. Terms match
+    case-insensitively on word boundaries, spaces in a term match any
+    run of whitespace and apostrophes match straight or curly ones.
+
+    Lexicons come from DEFAULT_LEXICONS and, if set, the JSON file at
+    LEXICON_PATH ({"name": ["term", ...]}), whose lexicons replace the
+    built-in ones of the same name. The file is checked at most every
+    LEXICON_CHECK_INTERVAL seconds and recompiled when it changes; the
+    compiled state is swapped as a whole, so scans never see a mix.
+    """
+
+    def __init__(self, lexicons=None, path=None, check_interval=None):
+        self.base_lexicons = lexicons if lexicons is not None else DEFAULT_LEXICONS
+        self.path = path if path is not None else os.getenv('LEXICON_PATH', '')
+        self.check_interval = check_interval if check_interval is not None else \
+            float(os.getenv('LEXICON_CHECK_INTERVAL', 5))
+
+        # (pattern, term -> lexicon names, lexicon name -> term count,
+        #  term -> shorter terms it starts with), replaced as a whole
+        self._state = None
+        self._loaded_mtime = None
+        self._checked_at = float('-inf')
+        self._lock = threading.Lock()
+
+    @property
+    def lexicons(self):
+        """Names of the loaded lexicons"""
+        return list(self._get_state()[2])
+
+    def reload(self):
+        """Recompile from the built-in lexicons and the lexicon file now"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            self._state = self._compile(self._load_lexicons())
+            return self._state
+
+    def find(self, text):
+        """
+        Every lexicon match in text, in order of position
+
+        Returns:
+            list: dicts with lexicon, term, start, end; a term in several
+                lexicons gives one match per lexicon. Overlapping terms are
+                all reported ("goes viral" and "viral" in "goes viral").
+        """
+        if not text:
+            return []
+
+        pattern, term_lexicons, _, prefixes = self._get_state()
+        if pattern is None:
+            return []
+
+        matches = []
+        position = 0
+        while True:
+            match = pattern.search(text, position)
+            if match is None:
+                break
+            # Overlapping terms: the next search starts inside this match
+            start = position = match.start()
+            position += 1
+
+            # The scan finds the longest term at each start; shorter ones there are its prefixes
+            term = self.normalize(match.group())
+            found = [(match.end(), term)]
+            if term in prefixes:
+                offsets = self._offsets(match.group())
+                found.extend((start + offsets[end - 1] + 1, prefix) for end, prefix in prefixes[term])
+
+            for end, found_term in found:
+                # Folds the pattern matched but normalize() does not map onto a term are skipped
+                for lexicon in term_lexicons.get(found_term, ()):
+                    matches.append({
+                        'lexicon': lexicon,
+                        'term': found_term,
+                        'start': start,
+                        'end': end
+                    })
+        return matches
+
+    def scan(self, text):
+        """
+        Matches grouped by lexicon
+
+        Returns:
+            dict: lexicon name -> list of matches (empty for lexicons not found)
+        """
+        grouped = {name: [] for name in self._get_state()[2]}
+        for match in self.find(text):
+            grouped[match['lexicon']].append(match)
+        return grouped
+
+    @staticmethod
+    def distinct_terms(matches):
+        """Distinct terms among a list of matches"""
+        return {match['term'] for match in matches}
+
+    @staticmethod
+    def normalize(term):
+        """
+        Canonical form of a term or of matched text
+
+        Case is removed with casefold(), which, unlike lower(), maps every
+        variant re.IGNORECASE accepts (e.g. the long s in 'ſhocking') to
+        the letter of the term, so matched text always finds its term.
+        """
+        return ' '.join(term.translate(_FOLD_I).casefold().replace('’', "'").split())
+
+    def _load_lexicons(self):
+        lexicons = {name: list(terms) for name, terms in self.base_lexicons.items()}
+        if not self.path:
+            return lexicons
+
+        try:
+            self._loaded_mtime = os.path.getmtime(self.path)
+            with open(self.path) as f:
+                loaded = json.load(f)
+            for name, terms in loaded.items():
+                if isinstance(terms, list):
+                    lexicons[name] = [term for term in terms if isinstance(term, str)]
+                else:
+                    logger.warning(f"Ignoring lexicon {name!r} in {self.path}: not a list of terms")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load lexicons from {self.path}: {e}")
+            if isinstance(e, OSError):
+                self._loaded_mtime = None
+        return lexicons
+
+    def _compile(self, lexicons):
+        term_lexicons = {}
+        sizes = {}
+        for name, terms in lexicons.items():
+            normalized = {self.normalize(term) for term in terms}
+            normalized.discard('')
+            sizes[name] = len(normalized)
+            for term in normalized:
+                term_lexicons.setdefault(term, []).append(name)
+
+        if not term_lexicons:
+            return None, term_lexicons, sizes, {}
+
+        trie = {}
+        for term in term_lexicons:
+            node = trie
+            for char in term:
+                node = node.setdefault(char, {})
+            node[''] = {}
+
+        pattern = re.compile(r'(?<!\w)' + self._trie_pattern(trie) + r'(?!\w)', re.IGNORECASE)
+        logger.info(f"Compiled {len(term_lexicons)} lexicon terms from {len(lexicons)} lexicons")
+        return pattern, term_lexicons, sizes, self._prefix_terms(term_lexicons)
+
+    @staticmethod
+    def _prefix_terms(terms):
+        """
+        For each term, the other terms it starts with (ending on a word boundary)
+
+        Returns:
+            dict: term -> [(end, prefix term), ...] for terms that have any
+        """
+        prefixes = {}
+        for term in terms:
+            found = [
+                (end, term[:end]) for end in range(1, len(term))
+                if not _WORD_CHAR.match(term[end]) and term[:end] in terms
+            ]
+            if found:
+                prefixes[term] = found
+        return prefixes
+
+    @staticmethod
+    def _offsets(matched):
+        """Offset in matched text of each character of its normalized form"""
+        offsets = []
+        in_space = False
+        for index, char in enumerate(matched):
+            if char.isspace():
+                if not in_space:
+                    offsets.append(index)
+                in_space = True
+                continue
+            in_space = False
+            offsets.extend([index] * len(char.translate(_FOLD_I).casefold()))
+        return offsets
+
+    def _trie_pattern(self, node):
+        """Regex for a trie node; longer continuations are tried first"""
+        branches = []
+        for char in sorted(char for char in node if char):
+            if char == ' ':
+                unit = _WHITESPACE
+            elif char == "'":
+                unit = _APOSTROPHE
+            else:
+                unit = re.escape(char)
+            branches.append(unit + self._trie_pattern(node[char]))
+
+        ends_here = '' in node
+        if not branches:
+            return ''
+        if len(branches) == 1 and not ends_here:
+            return branches[0]
+
+        group = '(?:' + '|'.join(branches) + ')'
+        return group + '?' if ends_here else group
+
+    def _get_state(self):
+        """Return the compiled state, recompiling it if the lexicon file changed"""
+        state = self._state
+        now = time.monotonic()
+        if state is not None and (not self.path or now - self._checked_at < self.check_interval):
+            return state
+
+        with self._lock:
+            if self._state is None:
+                self._state = self._compile(self._load_lexicons())
+            elif self.path and now - self._checked_at >= self.check_interval:
+                try:
+                    mtime = os.path.getmtime(self.path)
+                except OSError:
+                    mtime = None
+                if mtime != self._loaded_mtime:
+                    self._state = self._compile(self._load_lexicons())
+            self._checked_at = now
+            return self._state
+
+# Shared per-process matcher for the indicator lexicons
+lexicon_matcher = LexiconMatcher()
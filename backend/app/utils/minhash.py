@@ -0,0 +1,156 @@
+"""
+MinHash signatures and LSH banding for near-duplicate detection
+"""
+
+import hashlib
+import numpy as np
+import os
+import re
+
+_TOKEN_RE = re.compile(r'\w+')
+
+# Prime just above 2^32; with a < 2^31 and 32-bit shingle hashes,
+# a * x + b stays inside uint64
+_PRIME = np.uint64(4294967311)
+
+class MinHasher:
+    """
+    Word-shingle MinHash with banded locality-sensitive hashing
+
+    A signature is num_perm minimum hash values over the text's word
+    shingles; the fraction of equal positions in two signatures estimates
+    the Jaccard similarity of their shingle sets. Signatures are cut into
+    bands of rows_per_band values, and documents sharing any band key are
+    candidate near-duplicates. With the defaults (128 = 16 x 8) pairs above
+    roughly 0.7 similarity almost always collide.
+    """
+
+    def __init__(self, num_perm=128, bands=16, shingle_size=5, seed=1):
+        if num_perm % bands:
+            raise ValueError('num_perm must be divisible by bands')
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.shingle_size = shingle_size
+        self.threshold = float(os.getenv('DUPLICATE_THRESHOLD', 0.8))
+
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, 2 ** 31, size=num_perm).astype(np.uint64)
+        self._b = generator.randint(0, 2 ** 31, size=num_perm).astype(np.uint64)
+
+    def shingles(self, text):
+        tokens = _TOKEN_RE.findall((text or '').lower())
+        if len(tokens) < self.shingle_size:
+            return {' '.join(tokens)} if tokens else set()
+        return {
+            ' '.join(tokens[i:i + self.shingle_size])
+            for i in range(len(tokens) - self.shingle_size + 1)
+        }
+
+    def signature(self, text):
+        """
+        MinHash signature of a text
+
+        Returns:
+            list: num_perm integers, or [] for text without words
+        """
+        shingles = self.shingles(text)
+        if not shingles:
+            return []
+
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), 'little')
+             for s in shingles),
+            dtype=np.uint64, count=len(shingles)
+        )
+        permuted = (np.outer(hashes, self._a) + self._b) % _PRIME
+        return permuted.min(axis=0).tolist()
+
+    def band_keys(self, signature):
+        """LSH bucket keys of a signature, one per band"""
+        if not signature:
+            return []
+
+        keys = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows_per_band:(band + 1) * self.rows_per_band]
+            digest = hashlib.blake2b(repr(rows).encode(), digest_size=8).hexdigest()
+            keys.append(f"{band}:{digest}")
+        return keys
+
+    def similarity(self, signature1, signature2):
+        """Estimated Jaccard similarity of two signatures"""
+        if not signature1 or not signature2 or len(signature1) != len(signature2):
+            return 0.0
+        return float(np.mean(np.asarray(signature1) == np.asarray(signature2)))
+
+    def is_duplicate(self, signature1, signature2):
+        return self.similarity(signature1, signature2) >= self.threshold
+
+    def cluster(self, signatures):
+        """
+        Group near-duplicate signatures
+
+        Candidate pairs come from shared band keys and are confirmed by
+        estimated similarity, so the work is linear in the number of
+        signatures plus the number of colliding pairs.
+
+        Returns:
+            list: Cluster index for each signature
+        """
+        parent = list(range(len(signatures)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        buckets = {}
+        for i, signature in enumerate(signatures):
+            for key in self.band_keys(signature):
+                buckets.setdefault(key, []).append(i)
+
+        for members in buckets.values():
+            first = members[0]
+            for other in members[1:]:
+                root1, root2 = find(first), find(other)
+                if root1 != root2 and self.is_duplicate(signatures[first], signatures[other]):
+                    parent[root2] = root1
+
+        return [find(i) for i in range(len(signatures))]
+
+    def backfill_articles(self, batch_size=500):
+        """Compute signatures for stored articles created before they existed"""
+        from app.models import Article
+        from mongoengine.queryset.visitor import Q
+        from pymongo import UpdateOne
+
+        collection = Article._get_collection()
+        # Legacy documents have no minhash field at all; $size alone misses them
+        pending = Article.objects(
+            Q(minhash__exists=False) | Q(minhash__size=0)
+        ).only('id', 'content').no_cache()
+
+        updates = []
+        updated = 0
+        for article in pending:
+            signature = self.signature(article.content)
+            updates.append(UpdateOne(
+                {'_id': article.id},
+                {'$set': {'minhash': signature, 'lsh_bands': self.band_keys(signature)}}
+            ))
+            if len(updates) >= batch_size:
+                collection.bulk_write(updates, ordered=False)
+                updated += len(updates)
+                updates = []
+
+        if updates:
+            collection.bulk_write(updates, ordered=False)
+            updated += len(updates)
+
+        return updated
+
+# Shared hasher; every signature in the database must come from the same parameters
+minhasher = MinHasher()
@@ -3,49 +3,242 @@ NLP Processor for content analysis
 Handles keyword extraction, sentiment analysis, and text similarity
 """
 
+from collections import Counter, OrderedDict
+from functools import lru_cache
+import hashlib
 import logging
-from nltk.tokenize import sent_tokenize, word_tokenize
-from nltk.corpus import stopwords
-from nltk.sentiment import SentimentIntensityAnalyzer
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import nltk
+import math
+import re
+from scipy.sparse import vstack
+from app.utils.lexicon_matcher import lexicon_matcher
+from app.utils.tfidf_model import tfidf_model
+import numpy as np
+import os
+import threading
 
 logger = logging.getLogger(__name__)
 
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+KEYWORD_FAST_PATH = os.getenv('KEYWORD_FAST_PATH', 'true').lower() in ('1', 'true', 'yes')
 
-try:
-    nltk.data.find('sentiment/vader_lexicon.zip')
-except LookupError:
-    nltk.download('vader_lexicon')
+# Distinct sensational or clickbait terms that make a text fully sensational
+SENSATIONAL_TERMS_FOR_MAX = 10
 
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
+# Sentence chunks for sentiment scoring; boundaries need not be exact
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+|\n{2,}')
+
+# NLTK data the processor needs: (lookup path, download package)
+NLTK_DATA = (
+    ('tokenizers/punkt', 'punkt'),
+    ('sentiment/vader_lexicon.zip', 'vader_lexicon'),
+    ('corpora/stopwords', 'stopwords')
+)
+
+class NLPResources:
+    """
+    Loaded NLTK models shared by every NLPProcessor in the process
+    """
+    
+    def __init__(self, sia, stop_words, word_tokenize, sent_tokenize, treebank_tokenize):
+        self.sia = sia
+        self.stop_words = stop_words
+        self.word_tokenize = word_tokenize
+        self.sent_tokenize = sent_tokenize
+        self.keyword_tokenizer = KeywordTokenizer(sent_tokenize, treebank_tokenize, stop_words)
+
+class KeywordTokenizer:
+    """
+    Fast path for the keyword candidates of word_tokenize()
+    
+    word_tokenize() splits the text into sentences with Punkt and then
+    runs the Treebank tokenizer's regex passes over every sentence, which
+    is most of its cost. Those rules only look at a word and the
+    whitespace around it, except the final-period rule at the end of a
+    sentence, so the tokens of each distinct word are computed once and
+    cached: one cache for words inside a sentence, one for the word that
+    ends it. Sentence boundaries still come from Punkt, and a sentence
+    ending in a lone closing quote or bracket is tokenized whole, so the
+    result is exactly the filtered output of word_tokenize().
+    
+    Both caches are LRU-bounded to KEYWORD_CACHE_SIZE words each, and
+    safe to share between the request threads of a process.
+    """
+    
+    # Characters the Treebank final-period rule lets follow the period
+    CLOSERS = '])}>"\'\u00bb\u201d\u2019'
+    
+    def __init__(self, sent_tokenize, treebank_tokenize, stop_words, cache_size=None):
+        self.sent_tokenize = sent_tokenize
+        self.treebank_tokenize = treebank_tokenize
+        self.stop_words = stop_words
+        self.cache_size = cache_size or int(os.getenv('KEYWORD_CACHE_SIZE', 100000))
+        self._inner = lru_cache(maxsize=self.cache_size)(self._inner_tokens)
+        self._final = lru_cache(maxsize=self.cache_size)(self._final_tokens)
+    
+    def candidates(self, text):
+        """
+        Keyword candidates of lowercased text, in order and with repeats
+        
+        Args:
+            text (str): Lowercased text
+        
+        Returns:
+            list: Alphabetic non-stopword tokens longer than 3 characters
+        """
+        candidates = []
+        for sentence in self.sent_tokenize(text):
+            words = sentence.split()
+            if not words:
+                continue
+            
+            if not words[-1].strip(self.CLOSERS):
+                candidates.extend(self._filter(self.treebank_tokenize(sentence)))
+                continue
+            
+            inner = self._inner
+            for word in words[:-1]:
+                candidates.extend(inner(word))
+            candidates.extend(self._final(words[-1]))
+        
+        return candidates
+    
+    def cache_info(self):
+        """lru_cache statistics of the inner-word and final-word caches"""
+        return {'inner': self._inner.cache_info()._asdict(), 'final': self._final.cache_info()._asdict()}
+    
+    def _filter(self, tokens):
+        return tuple(
+            token for token in tokens
+            if token.isalpha() and token not in self.stop_words and len(token) > 3
+        )
+    
+    def _inner_tokens(self, word):
+        # The extra word keeps the final-period rule from firing
+        return self._filter(self.treebank_tokenize(word + ' x')[:-1])
+    
+    def _final_tokens(self, word):
+        return self._filter(self.treebank_tokenize(word))
+
+_resources = None
+_resources_lock = threading.Lock()
+
+def get_nlp_resources():
+    """
+    Load the NLTK data and models on first use
+    
+    NLTK itself (which pulls in scipy.stats) is imported here rather than
+    at module import, and no data is read or downloaded before first use.
+    Missing data is downloaded only when NLTK_AUTO_DOWNLOAD is enabled
+    (off by default); deployments install it in the image instead. Loading in the
+    gunicorn master (see app.warm_up) lets forked workers share the pages.
+    
+    Returns:
+        NLPResources: The process-wide resources
+    """
+    global _resources
+    
+    if _resources is not None:
+        return _resources
+    
+    with _resources_lock:
+        if _resources is None:
+            import nltk
+            
+            auto_download = os.getenv('NLTK_AUTO_DOWNLOAD', 'false').lower() in ('1', 'true', 'yes')
+            for path, package in NLTK_DATA:
+                try:
+                    nltk.data.find(path)
+                except LookupError:
+                    if not auto_download:
+                        raise
+                    logger.info(f"Downloading NLTK data: {package}")
+                    nltk.download(package, quiet=True)
+            
+            from nltk.corpus import stopwords
+            from app.utils.fast_vader import FastSentimentIntensityAnalyzer
+            from nltk.tokenize import NLTKWordTokenizer, sent_tokenize, word_tokenize
+            
+            resources = NLPResources(
+                sia=FastSentimentIntensityAnalyzer(),
+                stop_words=set(stopwords.words('english')),
+                word_tokenize=word_tokenize,
+                sent_tokenize=sent_tokenize,
+                treebank_tokenize=NLTKWordTokenizer().tokenize
+            )
+            # Load the tokenizer models into NLTK's cache as well
+            word_tokenize('warm up')
+            _resources = resources
+    
+    return _resources
+
+class SentimentCache:
+    """
+    Bounded LRU cache of sentiment scores keyed by content hash
+    
+    Holds both whole-document and per-sentence scores.
+    """
+    
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or int(os.getenv('SENTIMENT_CACHE_SIZE', 50000))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+    
+    @staticmethod
+    def make_key(text):
+        return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+    
+    def get(self, key):
+        with self._lock:
+            score = self._entries.get(key)
+            if score is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return score
+    
+    def put(self, key, score):
+        with self._lock:
+            self._entries[key] = score
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._entries)
+        return stats
 
 class NLPProcessor:
     """
     Handles NLP operations for news content analysis
+    
+    Construction is cheap; NLTK resources load on first use.
     """
     
-    def __init__(self):
-        self.sia = SentimentIntensityAnalyzer()
-        self.stop_words = set(stopwords.words('english'))
-        self.vectorizer = TfidfVectorizer(stop_words='english', max_features=100)
+    @property
+    def tfidf_model(self):
+        """Corpus-fitted model, as last published by the refit job"""
+        return tfidf_model
+    
+    @property
+    def sia(self):
+        return get_nlp_resources().sia
     
-    def extract_keywords(self, text, top_n=10):
+    @property
+    def stop_words(self):
+        return get_nlp_resources().stop_words
+    
+    def extract_keywords(self, text, top_n=10, ranked=False):
         """
         Extract important keywords from text
         
         Args:
             text (str): Text to analyze
             top_n (int): Number of top keywords to return
+            ranked (bool): Rank keywords by TF-IDF salience instead of
+                returning them in order of first appearance
         
         Returns:
             list: List of keywords
@@ -54,12 +247,9 @@ class NLPProcessor:
             if not text:
                 return []
             
-            # Tokenize and filter
-            tokens = word_tokenize(text.lower())
-            keywords = [
-                word for word in tokens
-                if word.isalpha() and word not in self.stop_words and len(word) > 3
-            ]
+            keywords = self.keyword_candidates(text)
+            if ranked:
+                return self._rank_keywords(keywords, top_n)
             
             # Remove duplicates while preserving order
             seen = set()
@@ -75,10 +265,80 @@ class NLPProcessor:
             logger.error(f"Error extracting keywords: {e}")
             return []
     
+    def keyword_candidates(self, text):
+        """
+        Alphabetic, non-stopword tokens longer than 3 characters, in order
+        
+        Uses the cached KeywordTokenizer unless KEYWORD_FAST_PATH is
+        disabled, in which case every call runs word_tokenize() in full.
+        
+        Args:
+            text (str): Text to tokenize
+        
+        Returns:
+            list: Candidate keywords, with repeats
+        """
+        resources = get_nlp_resources()
+        if KEYWORD_FAST_PATH:
+            return resources.keyword_tokenizer.candidates(text.lower())
+        
+        return [
+            word for word in resources.word_tokenize(text.lower())
+            if word.isalpha() and word not in resources.stop_words and len(word) > 3
+        ]
+    
+    def extract_keywords_batch(self, texts, top_n=10, ranked=False):
+        """
+        Extract keywords from many texts
+        
+        Batches of KEYWORD_BATCH_PARALLEL_MIN texts or more are spread over
+        the enrichment process pool; smaller ones run in this process.
+        
+        Args:
+            texts (list): Texts to analyze
+            top_n (int): Number of keywords per text
+            ranked (bool): Rank keywords by TF-IDF salience
+        
+        Returns:
+            list: One keyword list per text, in order
+        """
+        texts = list(texts)
+        if len(texts) >= int(os.getenv('KEYWORD_BATCH_PARALLEL_MIN', 200)):
+            from app.utils.enrichment import extract_keywords_parallel
+            return extract_keywords_parallel(texts, top_n=top_n, ranked=ranked)
+        
+        return [self.extract_keywords(text, top_n=top_n, ranked=ranked) for text in texts]
+    
+    def _rank_keywords(self, keywords, top_n):
+        """
+        Order distinct keywords by sublinear TF times corpus IDF
+        
+        Words missing from the fitted vocabulary count as the rarest ones.
+        Without a fitted model keywords are ranked by frequency alone. Ties
+        keep their order of first appearance.
+        """
+        counts = Counter(keywords)
+        idf = self.tfidf_model.idf(counts)
+        if idf is None:
+            scores = counts
+        else:
+            default_idf = max(idf.values(), default=1.0)
+            scores = {
+                word: (1.0 + math.log(count)) * idf.get(word, default_idf)
+                for word, count in counts.items()
+            }
+        
+        return sorted(counts, key=lambda word: -scores[word])[:top_n]
+    
     def analyze_sentiment(self, text):
         """
         Analyze sentiment of the text
         
+        The text is scored sentence by sentence, up to SENTIMENT_MAX_CHARS
+        characters, and the sentence scores are averaged weighted by length
+        (whole long pages saturate VADER's compound score). Scores are
+        cached per content hash.
+        
         Args:
             text (str): Text to analyze
         
@@ -89,14 +349,103 @@ class NLPProcessor:
             if not text:
                 return 0.0
             
-            scores = self.sia.polarity_scores(text)
-            # Convert compound score from -1 to 1 range
-            return scores['compound']
+            key = sentiment_cache.make_key(text)
+            score = sentiment_cache.get(key)
+            if score is None:
+                score = self.score_sentiment(text)
+                sentiment_cache.put(key, score)
+            return score
+        
+        except Exception as e:
+            logger.error(f"Error analyzing sentiment: {e}")
+            return 0.0
+    
+    def score_sentiment(self, text, max_chars=None):
+        """
+        Sentence-chunked VADER score of a text, without the document cache
+        
+        Sentence scores go through the cache, so boilerplate repeated across
+        pages (bylines, newsletter prompts, captions) is scored once.
+        
+        Args:
+            text (str): Text to score
+            max_chars (int): Characters to score (default: SENTIMENT_MAX_CHARS)
+        
+        Returns:
+            float: Length-weighted mean of the sentence compound scores
+        """
+        try:
+            max_chars = max_chars or int(os.getenv('SENTIMENT_MAX_CHARS', 20000))
+            sia = self.sia
+            
+            total = 0.0
+            weight = 0
+            for sentence in SENTENCE_BREAK.split(text[:max_chars]):
+                sentence = sentence.strip()
+                if not sentence:
+                    continue
+                
+                # A one-sentence document and that sentence share a key and a score
+                key = sentiment_cache.make_key(sentence)
+                compound = sentiment_cache.get(key)
+                if compound is None:
+                    compound = sia.polarity_scores(sentence)['compound']
+                    sentiment_cache.put(key, compound)
+                
+                total += compound * len(sentence)
+                weight += len(sentence)
+            
+            return round(total / weight, 4) if weight else 0.0
         
         except Exception as e:
             logger.error(f"Error analyzing sentiment: {e}")
             return 0.0
     
+    def analyze_sentiment_batch(self, texts):
+        """
+        Sentiment of many texts
+        
+        Cached texts are answered here; when SENTIMENT_BATCH_PARALLEL_MIN
+        or more remain they are scored on the enrichment process pool.
+        
+        Args:
+            texts (list): Texts to analyze
+        
+        Returns:
+            list: One score per text, in order
+        """
+        texts = list(texts)
+        scores = [0.0] * len(texts)
+        
+        # Score each distinct uncached text once
+        pending = {}
+        for i, text in enumerate(texts):
+            if not text:
+                continue
+            key = sentiment_cache.make_key(text)
+            score = sentiment_cache.get(key)
+            if score is None:
+                pending.setdefault(key, (text, []))[1].append(i)
+            else:
+                scores[i] = score
+        
+        if not pending:
+            return scores
+        
+        keys = list(pending)
+        pending_texts = [pending[key][0] for key in keys]
+        if len(pending_texts) >= int(os.getenv('SENTIMENT_BATCH_PARALLEL_MIN', 100)):
+            from app.utils.enrichment import analyze_sentiment_parallel
+            fresh = analyze_sentiment_parallel(pending_texts)
+        else:
+            fresh = [self.score_sentiment(text) for text in pending_texts]
+        
+        for key, score in zip(keys, fresh):
+            sentiment_cache.put(key, score)
+            for i in pending[key][1]:
+                scores[i] = score
+        return scores
+    
     def calculate_similarity(self, text1, text2):
         """
         Calculate similarity between two texts
@@ -112,7 +461,15 @@ class NLPProcessor:
             if not text1 or not text2:
                 return 0.0
             
-            # Vectorize texts
+            # Corpus-fitted model: rows are L2-normalized, so cosine is a dot product
+            vectors = self.tfidf_model.transform([text1, text2])
+            if vectors is not None:
+                return self.vector_similarity(vectors[0], vectors[1])
+            
+            # No model fitted yet, fall back to fitting on the pair
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            from sklearn.metrics.pairwise import cosine_similarity
+            
             tfidf = TfidfVectorizer(stop_words='english', max_features=100)
             vectors = tfidf.fit_transform([text1, text2])
             
@@ -125,6 +482,53 @@ class NLPProcessor:
             logger.error(f"Error calculating similarity: {e}")
             return 0.0
     
+    def similarity_matrix(self, texts, vectors=None):
+        """
+        Pairwise cosine similarity of many texts from one sparse product
+        
+        Args:
+            texts (list): Texts to compare
+            vectors (list): Optional precomputed 1-row vectors, aligned with
+                texts; None entries are vectorized from their text
+        
+        Returns:
+            numpy.ndarray: n x n similarity matrix with ones on the diagonal
+        """
+        vectors = list(vectors) if vectors is not None else [None] * len(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        
+        if missing:
+            fresh = self.tfidf_model.transform([texts[i] or '' for i in missing])
+            if fresh is None:
+                # No model fitted yet: fit once on the whole batch instead
+                from sklearn.feature_extraction.text import TfidfVectorizer
+                
+                tfidf = TfidfVectorizer(stop_words='english', max_features=100)
+                matrix = tfidf.fit_transform([text or '' for text in texts])
+                vectors = [matrix[i] for i in range(len(texts))]
+            else:
+                for row, i in enumerate(missing):
+                    vectors[i] = fresh[row]
+        
+        matrix = vstack(vectors).tocsr()
+        similarity = (matrix @ matrix.T).toarray()
+        np.clip(similarity, 0.0, 1.0, out=similarity)
+        np.fill_diagonal(similarity, 1.0)
+        return similarity
+    
+    def vector_similarity(self, vector1, vector2):
+        """
+        Cosine similarity of two L2-normalized sparse TF-IDF rows
+        
+        Args:
+            vector1 (csr_matrix): First 1-row vector
+            vector2 (csr_matrix): Second 1-row vector
+        
+        Returns:
+            float: Similarity score between 0 and 1
+        """
+        return float(vector1.multiply(vector2).sum())
+    
     def detect_sensationalism(self, text):
         """
         Detect sensational or clickbait language
@@ -136,18 +540,13 @@ class NLPProcessor:
             float: Sensationalism score (0 = not sensational, 1 = highly sensational)
         """
         try:
-            sensational_words = [
-                'shocking', 'amazing', 'incredible', 'unbelievable',
-                'must see', 'you won\'t believe', 'doctors hate',
-                'celebrity', 'scandal', 'exposé', 'viral'
-            ]
-            
-            text_lower = text.lower()
-            count = sum(1 for word in sensational_words if word in text_lower)
+            matches = lexicon_matcher.scan(text)
+            terms = lexicon_matcher.distinct_terms(
+                matches.get('sensational', []) + matches.get('clickbait', [])
+            )
             
             # Normalize score
-            score = min(count / len(sensational_words), 1.0)
-            return score
+            return min(len(terms) / SENSATIONAL_TERMS_FOR_MAX, 1.0)
         
         except Exception as e:
             logger.error(f"Error detecting sensationalism: {e}")
@@ -165,13 +564,16 @@ class NLPProcessor:
         """
         try:
             # Simple entity extraction (can be enhanced with spaCy)
-            sentences = sent_tokenize(text)
+            sentences = get_nlp_resources().sent_tokenize(text)
             
             return {
                 'sentences': len(sentences),
-                'words': len(word_tokenize(text))
+                'words': len(get_nlp_resources().word_tokenize(text))
             }
         
         except Exception as e:
             logger.error(f"Error extracting entities: {e}")
             return {}
+
+# Shared per-process cache of sentiment scores
+sentiment_cache = SentimentCache()
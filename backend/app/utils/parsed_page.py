@@ -0,0 +1,157 @@
+"""
+Parsed web page shared by the scraper's text and metadata views
+"""
+
+from bs4 import BeautifulSoup
+from urllib.parse import urljoin, urldefrag, urlparse
+from app.utils.text_extractors import SoupExtractor, detect_encoding
+import threading
+
+class ParsedPage:
+    """
+    One downloaded page, parsed at most once
+
+    Every derived view (cleaned text, metadata, canonical URL, outbound
+    links) is computed lazily and memoized. Text comes from the configured
+    extractor, which streams over the raw body; the parse tree is only
+    built when a view needs it, and at most once. Pages are read-only once
+    built, so they can be shared between threads.
+    """
+
+    __slots__ = ('_url', '_content', '_headers', '_digest', '_truncated', '_extractor',
+                 '_soup', '_derived', '_lock')
+
+    def __init__(self, url, content, headers=None, digest=None, text=None, extractor=None,
+                 truncated=False):
+        self._url = url
+        self._content = content
+        self._digest = digest
+        self._truncated = truncated
+        self._extractor = extractor or SoupExtractor()
+        self._headers = {k.lower(): v for k, v in (headers or {}).items()}
+        self._soup = None
+        self._derived = {'text': text} if text is not None else {}
+        self._lock = threading.RLock()
+
+    def __setattr__(self, name, value):
+        if hasattr(self, '_lock'):
+            raise AttributeError('ParsedPage is immutable')
+        object.__setattr__(self, name, value)
+
+    @property
+    def url(self):
+        return self._url
+
+    @property
+    def content(self):
+        return self._content
+
+    @property
+    def digest(self):
+        """SHA-256 of the body when it came from the response cache"""
+        return self._digest
+
+    @property
+    def truncated(self):
+        """True if only a prefix of the body was downloaded"""
+        return self._truncated
+
+    @property
+    def headers(self):
+        return dict(self._headers)
+
+    @property
+    def domain(self):
+        return urlparse(self._url).netloc
+
+    @property
+    def text(self):
+        """Visible text with whitespace collapsed, or None if the page is empty"""
+        return self._derive('text', self._extract_text)
+
+    @property
+    def metadata(self):
+        """Title, description, author and publish date from the page head"""
+        return dict(self._derive('metadata', self._extract_metadata))
+
+    @property
+    def canonical_url(self):
+        """The page's declared canonical URL, falling back to the fetched URL"""
+        return self._derive('canonical_url', self._extract_canonical_url)
+
+    @property
+    def links(self):
+        """Absolute http(s) URLs of outbound links, in document order"""
+        return list(self._derive('links', self._extract_links))
+
+    def _derive(self, name, compute):
+        if name not in self._derived:
+            with self._lock:
+                if name not in self._derived:
+                    self._derived[name] = compute()
+        return self._derived[name]
+
+    @property
+    def soup(self):
+        """The parse tree; callers must not modify it"""
+        if self._soup is None:
+            with self._lock:
+                if self._soup is None:
+                    encoding = detect_encoding(self._content, self._headers.get('content-type'))
+                    soup = BeautifulSoup(self._content, 'html.parser', from_encoding=encoding)
+                    object.__setattr__(self, '_soup', soup)
+        return self._soup
+
+    def _extract_text(self):
+        extract_from_soup = getattr(self._extractor, 'extract_from_soup', None)
+        if extract_from_soup is not None:
+            return extract_from_soup(self.soup)
+        return self._extractor.extract(self._content, self._headers.get('content-type'))
+
+    def _extract_metadata(self):
+        soup = self.soup
+        return {
+            'url': self._url,
+            'title': soup.title.string if soup.title else 'Unknown',
+            'description': self._get_meta_content('description'),
+            'author': self._get_meta_content('author'),
+            'publish_date': self._get_meta_content('article:published_time'),
+            'domain': self.domain
+        }
+
+    def _extract_canonical_url(self):
+        link = self.soup.find('link', rel='canonical', href=True)
+        if link:
+            return urljoin(self._url, link['href'].strip())
+
+        og_url = self._get_meta_content('og:url')
+        return urljoin(self._url, og_url.strip()) if og_url else self._url
+
+    def _extract_links(self):
+        base_url = self._url
+        base = self.soup.find('base', href=True)
+        if base:
+            base_url = urljoin(self._url, base['href'].strip())
+
+        links = []
+        seen = set()
+        page_url = urldefrag(self._url)[0]
+        for anchor in self.soup.find_all('a', href=True):
+            url = urldefrag(urljoin(base_url, anchor['href'].strip()))[0]
+            if urlparse(url).scheme not in ('http', 'https') or url == page_url or url in seen:
+                continue
+            seen.add(url)
+            links.append(url)
+
+        return tuple(links)
+
+    def _get_meta_content(self, meta_name):
+        """
+        Extract content from meta tags
+        """
+        try:
+            meta = self.soup.find('meta', attrs={'name': meta_name}) or \
+                   self.soup.find('meta', attrs={'property': meta_name})
+            return meta.get('content', '') if meta else ''
+        except Exception:
+            return ''
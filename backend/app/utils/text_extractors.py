@@ -0,0 +1,240 @@
+"""
+HTML-to-text extraction backends for the web scraper
+"""
+
+from html.parser import HTMLParser
+import codecs
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+# Elements whose contents never count as article text
+BOILERPLATE_TAGS = frozenset(['script', 'style', 'nav', 'footer', 'noscript', 'template'])
+
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([a-zA-Z0-9_\-]+)', re.IGNORECASE)
+_HEADER_CHARSET_RE = re.compile(r'charset=["\']?([a-zA-Z0-9_\-]+)', re.IGNORECASE)
+
+def collapse_whitespace(text):
+    """
+    Collapse extracted text into single-spaced phrases
+
+    Returns:
+        str: Cleaned text, or None if nothing is left
+    """
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    text = ' '.join(chunk for chunk in chunks if chunk)
+    return text if text else None
+
+def detect_encoding(content, content_type=None):
+    """
+    Pick a text encoding for an HTML body
+
+    The Content-Type charset wins, then a BOM, then a <meta charset> in the
+    first kilobytes of the document. Otherwise the body is UTF-8 if its
+    first 64 KB decode as UTF-8, and Windows-1252 if they do not. Only the
+    bytes already read are inspected, so a truncated prefix works too.
+    """
+    if content_type:
+        match = _HEADER_CHARSET_RE.search(content_type)
+        if match and _is_known_encoding(match.group(1)):
+            return match.group(1).lower()
+
+    if content.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if content.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+
+    match = _META_CHARSET_RE.search(content[:4096])
+    if match:
+        encoding = match.group(1).decode('ascii', 'ignore')
+        if _is_known_encoding(encoding):
+            return encoding.lower()
+
+    sample = content[:65536]
+    try:
+        sample.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off at the end of the sample is fine
+        if e.start < len(sample) - 3:
+            return 'windows-1252'
+
+    return 'utf-8'
+
+def _close_boilerplate(open_tags, tag):
+    """
+    Close a boilerplate element on the stack of open ones
+
+    As in a browser, an end tag closes the innermost open element of its
+    name and every element opened inside it; an end tag with no open
+    element of that name is ignored.
+    """
+    for i in range(len(open_tags) - 1, -1, -1):
+        if open_tags[i] == tag:
+            del open_tags[i:]
+            return
+
+def _is_known_encoding(name):
+    try:
+        codecs.lookup(name)
+        return True
+    except LookupError:
+        return False
+
+class _TextCollector(HTMLParser):
+    """Event handler that keeps text outside boilerplate elements"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._open_boilerplate = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in BOILERPLATE_TAGS:
+            self._open_boilerplate.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        pass
+
+    def handle_endtag(self, tag):
+        if tag in BOILERPLATE_TAGS:
+            _close_boilerplate(self._open_boilerplate, tag)
+
+    def handle_data(self, data):
+        if not self._open_boilerplate:
+            self.parts.append(data)
+
+    def unknown_decl(self, data):
+        if not self._open_boilerplate and data.startswith('CDATA['):
+            self.parts.append(data[6:])
+
+class StreamingExtractor:
+    """
+    Single-pass, event-based extractor built on the stdlib HTML tokenizer
+
+    No tree is built: the document is decoded and fed through the tokenizer
+    in chunks, and text is collected only while outside boilerplate
+    elements.
+    """
+
+    name = 'streaming'
+
+    def __init__(self, chunk_size=64 * 1024):
+        self.chunk_size = chunk_size
+
+    def extract(self, content, content_type=None):
+        decoder = codecs.getincrementaldecoder(detect_encoding(content, content_type))('replace')
+        collector = _TextCollector()
+
+        for start in range(0, len(content), self.chunk_size):
+            collector.feed(decoder.decode(content[start:start + self.chunk_size]))
+        collector.feed(decoder.decode(b'', final=True))
+        collector.close()
+
+        return collapse_whitespace(''.join(collector.parts))
+
+class _LxmlTarget:
+    """lxml parser target collecting text outside boilerplate elements"""
+
+    def __init__(self):
+        self.parts = []
+        self._open_boilerplate = []
+
+    def start(self, tag, attrib):
+        if tag in BOILERPLATE_TAGS:
+            self._open_boilerplate.append(tag)
+
+    def end(self, tag):
+        if tag in BOILERPLATE_TAGS:
+            _close_boilerplate(self._open_boilerplate, tag)
+
+    def data(self, data):
+        if not self._open_boilerplate:
+            self.parts.append(data)
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        return ''.join(self.parts)
+
+class LxmlExtractor:
+    """
+    Event-based extractor on libxml2's HTML parser (requires lxml)
+
+    Same boilerplate rules as the streaming extractor, with the
+    tokenizing done in C.
+    """
+
+    name = 'lxml'
+
+    def __init__(self):
+        from lxml import etree
+        self._etree = etree
+
+    def extract(self, content, content_type=None):
+        parser = self._etree.HTMLParser(
+            target=_LxmlTarget(),
+            encoding=detect_encoding(content, content_type),
+            remove_comments=True
+        )
+        parser.feed(content)
+        return collapse_whitespace(parser.close())
+
+class SoupExtractor:
+    """
+    The original BeautifulSoup get_text() extraction
+
+    Reuses the page's parse tree, so it is the cheapest option when the
+    tree is needed anyway.
+    """
+
+    name = 'bs4'
+
+    def extract(self, content, content_type=None):
+        from bs4 import BeautifulSoup
+        encoding = detect_encoding(content, content_type)
+        return self.extract_from_soup(BeautifulSoup(content, 'html.parser', from_encoding=encoding))
+
+    def extract_from_soup(self, soup):
+        from bs4 import CData, NavigableString
+
+        # Same strings get_text() would return, minus script and style
+        # contents, without decomposing nodes out of a shared tree.
+        strings = (
+            string for string in soup.descendants
+            if type(string) in (NavigableString, CData)
+            and string.parent.name not in ('script', 'style')
+        )
+        return collapse_whitespace(''.join(strings))
+
+EXTRACTORS = {
+    'streaming': StreamingExtractor,
+    'lxml': LxmlExtractor,
+    'bs4': SoupExtractor
+}
+
+def get_extractor(name=None):
+    """
+    Build a text extractor by name
+
+    Args:
+        name (str): streaming, lxml or bs4 (default: SCRAPER_TEXT_EXTRACTOR)
+
+    Returns:
+        An extractor; falls back to the streaming one if lxml is unavailable
+    """
+    name = (name or os.getenv('SCRAPER_TEXT_EXTRACTOR', 'streaming')).lower()
+
+    extractor_class = EXTRACTORS.get(name)
+    if extractor_class is None:
+        logger.warning(f"Unknown text extractor '{name}', using streaming")
+        return StreamingExtractor()
+
+    try:
+        return extractor_class()
+    except ImportError as e:
+        logger.warning(f"Text extractor '{name}' unavailable ({e}), using streaming")
+        return StreamingExtractor()
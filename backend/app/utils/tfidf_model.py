@@ -0,0 +1,241 @@
+"""
+Corpus-fitted TF-IDF model for content similarity
+Fitted on the article corpus by the refit job, persisted to disk and loaded by every process
+"""
+
+from scipy.sparse import csr_matrix
+import logging
+import numpy as np
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# App-owned directory for persisted models; never a shared temp directory,
+# since loading a model unpickles it
+APP_DATA_DIR = os.getenv('APP_DATA_DIR') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'instance'
+)
+
+class TfidfModel:
+    """
+    Process-wide handle on the fitted TF-IDF vectorizer
+
+    The vectorizer is loaded from TFIDF_MODEL_PATH, which every worker
+    shares, and reloaded when the file's mtime changes. Serving processes
+    never fit: the refit job (app.services.tfidf_refit, run by the
+    enrichment worker) fits on a sample of the corpus and publishes the
+    model by writing a temporary file, renaming it over the old one and
+    then swapping a single reference, so requests only ever see a
+    complete model.
+
+    Loading a model unpickles it, so the file is only loaded if it is
+    owned by the user this process runs as and nobody else can write to
+    it; TFIDF_MODEL_PATH defaults to APP_DATA_DIR/tfidf.joblib.
+    """
+
+    def __init__(self, path=None, max_features=None, fit_sample=None):
+        self.path = path or os.getenv('TFIDF_MODEL_PATH') or os.path.join(APP_DATA_DIR, 'tfidf.joblib')
+        self.max_features = max_features or int(os.getenv('TFIDF_MAX_FEATURES', 50000))
+        self.fit_sample = fit_sample or int(os.getenv('TFIDF_FIT_SAMPLE', 50000))
+
+        # (version, vectorizer), replaced as a whole on every swap
+        self._state = (None, None)
+        # Marker of the corpus the current model was fitted on
+        self._corpus = None
+        self._loaded_mtime = None
+        self._checked_at = float('-inf')
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self._get_state()[0]
+
+    @property
+    def is_fitted(self):
+        return self._get_state()[1] is not None
+
+    @property
+    def corpus(self):
+        """Marker of the corpus the current model was fitted on (see the refit job)"""
+        self._get_state()
+        return self._corpus
+
+    def transform(self, texts):
+        """
+        Vectorize texts with the fitted model
+
+        Returns:
+            scipy.sparse.csr_matrix: L2-normalized rows, or None if no model is fitted yet
+        """
+        vectorizer = self._get_state()[1]
+        if vectorizer is None:
+            return None
+        return vectorizer.transform(texts)
+
+    def idf(self, terms):
+        """
+        Corpus IDF of the given terms
+
+        Returns:
+            dict: term -> idf for the terms in the vocabulary, or None if no model is fitted yet
+        """
+        vectorizer = self._get_state()[1]
+        if vectorizer is None:
+            return None
+
+        vocabulary = vectorizer.vocabulary_
+        weights = vectorizer.idf_
+        return {
+            term: float(weights[vocabulary[term]])
+            for term in terms if term in vocabulary
+        }
+
+    def vectorize_for_storage(self, text):
+        """
+        Sparse vector of a text in the form stored on Article
+
+        Returns:
+            tuple: ({'indices': [...], 'values': [...]}, version), or ({}, None) if unfitted
+        """
+        version, vectorizer = self._get_state()
+        if vectorizer is None or not text:
+            return {}, None
+
+        return self.storage_form(vectorizer.transform([text]).tocsr()), version
+
+    @staticmethod
+    def storage_form(row):
+        """A 1-row csr_matrix in the form stored on Article"""
+        return {
+            'indices': row.indices.tolist(),
+            'values': [round(float(v), 6) for v in row.data]
+        }
+
+    def from_storage(self, stored, version):
+        """
+        Rebuild a stored vector as a 1-row sparse matrix
+
+        Returns:
+            csr_matrix: The vector, or None if it was made by another model version
+        """
+        current_version, vectorizer = self._get_state()
+        if vectorizer is None or not stored or version != current_version:
+            return None
+
+        indices = stored.get('indices', [])
+        values = stored.get('values', [])
+        return csr_matrix(
+            (values, indices, [0, len(indices)]),
+            shape=(1, len(vectorizer.vocabulary_))
+        )
+
+    def fit(self, texts, corpus=None):
+        """
+        Fit a new model on the given texts and publish it
+
+        Returns:
+            str: The new model version, or None if there was too little text
+        """
+        version, vectorizer = self.build(texts)
+        if version is not None:
+            self.publish(version, vectorizer, corpus)
+        return version
+
+    def build(self, texts):
+        """
+        Fit a new vectorizer without publishing it
+
+        Returns:
+            tuple: (version, vectorizer), or (None, None) if there was too little text
+        """
+        texts = [text for text in texts if text]
+        if len(texts) < 2:
+            logger.info("Not enough articles to fit the TF-IDF model")
+            return None, None
+
+        # sklearn loads on first fit, not at import
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        vectorizer = TfidfVectorizer(
+            stop_words='english',
+            max_features=self.max_features,
+            sublinear_tf=True,
+            dtype=np.float32
+        )
+        vectorizer.fit(texts)
+        version = f"{int(time.time())}-{len(texts)}"
+        logger.info(f"TF-IDF model {version} fitted on {len(texts)} articles")
+        return version, vectorizer
+
+    def publish(self, version, vectorizer, corpus=None):
+        """Write a fitted model to TFIDF_MODEL_PATH and make it current in this process"""
+        import joblib
+
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        # mkstemp creates the file readable and writable by this user only
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            joblib.dump({'version': version, 'vectorizer': vectorizer, 'corpus': corpus}, tmp_path)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            self._state = (version, vectorizer)
+            self._corpus = corpus
+            self._loaded_mtime = os.path.getmtime(self.path)
+
+    def _get_state(self):
+        """Return the current (version, vectorizer), reloading it if the file changed"""
+        now = time.monotonic()
+        if now - self._checked_at < 5:
+            return self._state
+
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return self._state
+
+            if mtime != self._loaded_mtime:
+                try:
+                    data = self._load_trusted(self.path)
+                    self._state = (data['version'], data['vectorizer'])
+                    self._corpus = data.get('corpus')
+                    self._loaded_mtime = mtime
+                except Exception as e:
+                    logger.warning(f"Could not load TF-IDF model from {self.path}: {e}")
+                    # Not retried until the file changes
+                    self._loaded_mtime = mtime
+
+            return self._state
+
+    @staticmethod
+    def _load_trusted(path):
+        """
+        Unpickle a model file, refusing one another user could have written
+
+        The checks run on the opened file (not the path), and symlinks are
+        not followed, so the file cannot be swapped after it was checked.
+        """
+        import joblib
+
+        fd = os.open(path, os.O_RDONLY | getattr(os, 'O_NOFOLLOW', 0))
+        with os.fdopen(fd, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_uid != os.geteuid():
+                raise PermissionError(f"{path} is owned by uid {stat.st_uid}, not by this process (uid {os.geteuid()})")
+            if stat.st_mode & 0o022:
+                raise PermissionError(f"{path} is writable by other users (mode {stat.st_mode & 0o777:o})")
+            return joblib.load(f)
+
+# Shared per-process model used by the NLP processor and article routes
+tfidf_model = TfidfModel()
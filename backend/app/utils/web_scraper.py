@@ -3,23 +3,151 @@ Web Scraper for fetching and parsing news content
 """
 
 import logging
+import os
 import requests
-from bs4 import BeautifulSoup
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import closing
+from collections import OrderedDict
 from urllib.parse import urlparse
 from datetime import datetime
+from urllib3.exceptions import ReadTimeoutError
+from app.utils.http_cache import HTTPCache
+from app.utils.http_session import get_shared_session
+from app.utils.parsed_page import ParsedPage
+from app.utils.text_extractors import get_extractor
 
 logger = logging.getLogger(__name__)
 
+_fetch_executor = None
+_fetch_executor_pid = None
+_fetch_executor_lock = threading.Lock()
+
+def _get_fetch_executor():
+    """
+    Return the process-wide bounded thread pool used for parallel fetches
+    
+    Threads do not survive a fork, so each gunicorn worker builds its own.
+    """
+    global _fetch_executor, _fetch_executor_pid
+    
+    with _fetch_executor_lock:
+        if _fetch_executor is None or _fetch_executor_pid != os.getpid():
+            _fetch_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv('SCRAPER_FETCH_WORKERS', 8)),
+                thread_name_prefix='scraper'
+            )
+            _fetch_executor_pid = os.getpid()
+        return _fetch_executor
+
+class ContentRejected(requests.exceptions.RequestException):
+    """Raised when a response is refused before its body is read"""
+
+class DownloadedResponse:
+    """
+    A response body read by WebScraper._download
+    
+    truncated is set when reading stopped at the byte cap or the download
+    time limit; content then holds the prefix that was read.
+    """
+    
+    def __init__(self, url, status_code, headers, content, truncated=False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = dict(headers)
+        self.content = content
+        self.truncated = truncated
+
+def _response_socket(raw):
+    """
+    The socket a streamed urllib3 response is read from, or None
+
+    http.client detaches the socket from its connection once the headers
+    are read, so it is reached through the response's file object. These
+    are private attributes of urllib3 and http.client;
+    tests/test_web_scraper.py fails if the path stops resolving, and
+    callers fall back to checking the deadline between chunks.
+    """
+    fp = getattr(getattr(raw, '_fp', None), 'fp', None)
+    return getattr(getattr(fp, 'raw', None), '_sock', None)
+
 class WebScraper:
     """
     Scrapes and extracts content from web pages
     """
     
-    def __init__(self):
+    def __init__(self, cache=None, session=None, extractor=None):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
         self.timeout = 10
+        self.connect_timeout = float(os.getenv('SCRAPER_CONNECT_TIMEOUT', 5))
+        self.read_timeout = float(os.getenv('SCRAPER_READ_TIMEOUT', 5))
+        self.max_bytes = int(os.getenv('SCRAPER_MAX_BYTES', 5 * 1024 * 1024))
+        self.chunk_size = 64 * 1024
+        self.allowed_content_types = set(
+            t.strip().lower() for t in os.getenv(
+                'SCRAPER_ALLOWED_CONTENT_TYPES', 'text/html,application/xhtml+xml,text/plain'
+            ).split(',') if t.strip()
+        )
+        self._session = session
+        self.extractor = extractor or get_extractor()
+        self.cache = cache if cache is not None else self._create_cache()
+        
+        # Extracted text per body digest, so unchanged pages are not re-parsed
+        self._text_cache = OrderedDict()
+        self._text_cache_size = 256
+        self._text_cache_lock = threading.Lock()
+    
+    @property
+    def session(self):
+        """Pooled keep-alive session, shared by every scraper in the process"""
+        return self._session or get_shared_session()
+    
+    def _create_cache(self):
+        """Create the shared response cache unless it is disabled"""
+        if os.getenv('SCRAPER_CACHE_ENABLED', 'true').lower() not in ('1', 'true', 'yes'):
+            return None
+        try:
+            return HTTPCache()
+        except OSError as e:
+            logger.warning(f"HTTP response cache disabled: {e}")
+            return None
+    
+    def fetch_page(self, url):
+        """
+        Download and wrap a page for parsing
+        
+        The page is downloaded once and parsed at most once, however many
+        of its views (text, metadata, canonical URL, links) are used.
+        
+        Args:
+            url (str): URL to fetch
+        
+        Returns:
+            ParsedPage: The fetched page, or None if the download failed
+        """
+        try:
+            response = self._get(url)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Error fetching {url}: {e}")
+            return None
+        
+        digest = getattr(response, 'digest', None)
+        text = None
+        if digest:
+            with self._text_cache_lock:
+                if digest in self._text_cache:
+                    self._text_cache.move_to_end(digest)
+                    text = self._text_cache[digest]
+        
+        return ParsedPage(
+            url, response.content, response.headers,
+            digest=digest, text=text, extractor=self.extractor,
+            truncated=getattr(response, 'truncated', False)
+        )
     
     def scrape(self, url):
         """
@@ -32,32 +160,69 @@ class WebScraper:
             str: Extracted text content, or None if failed
         """
         try:
-            response = requests.get(url, headers=self.headers, timeout=self.timeout)
-            response.raise_for_status()
+            page = self.fetch_page(url)
+            if page is None:
+                return None
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            text = page.text
             
-            # Remove script and style elements
-            for script in soup(['script', 'style']):
-                script.decompose()
+            # Remember the text per body digest so unchanged pages are not re-parsed
+            if page.digest and text:
+                with self._text_cache_lock:
+                    self._text_cache[page.digest] = text
+                    if len(self._text_cache) > self._text_cache_size:
+                        self._text_cache.popitem(last=False)
             
-            # Extract text
-            text = soup.get_text()
-            
-            # Clean up text
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
-            
-            return text if text else None
+            return text
         
-        except requests.exceptions.RequestException as e:
-            logger.warning(f"Error scraping {url}: {e}")
-            return None
         except Exception as e:
             logger.error(f"Unexpected error scraping {url}: {e}")
             return None
     
+    def scrape_many(self, urls, deadline=None):
+        """
+        Scrape several URLs concurrently under one overall deadline
+        
+        Args:
+            urls (list): URLs to scrape
+            deadline (float): Seconds to wait for the whole batch
+                (default: SCRAPER_FETCH_DEADLINE)
+        
+        Returns:
+            dict: 'results' maps each URL that arrived in time to its text;
+                'failed' and 'timed_out' list the URLs that did not
+        """
+        if deadline is None:
+            deadline = float(os.getenv('SCRAPER_FETCH_DEADLINE', 15))
+        
+        unique_urls = list(dict.fromkeys(urls))
+        executor = _get_fetch_executor()
+        futures = {executor.submit(self.scrape, url): url for url in unique_urls}
+        done, pending = wait(futures, timeout=deadline)
+        
+        results = {}
+        failed = set()
+        for future in done:
+            url = futures[future]
+            content = future.result()
+            if content:
+                results[url] = content
+            else:
+                failed.add(url)
+        
+        # Queued fetches are dropped; running ones finish in the background
+        # and still populate the response cache for the next request.
+        timed_out = set()
+        for future in pending:
+            future.cancel()
+            timed_out.add(futures[future])
+        
+        return {
+            'results': results,
+            'failed': [url for url in unique_urls if url in failed],
+            'timed_out': [url for url in unique_urls if url in timed_out]
+        }
+    
     def extract_metadata(self, url):
         """
         Extract metadata from a webpage
@@ -69,36 +234,157 @@ class WebScraper:
             dict: Extracted metadata
         """
         try:
-            response = requests.get(url, headers=self.headers, timeout=self.timeout)
+            page = self.fetch_page(url)
+            if page is not None:
+                return page.metadata
+        
+        except Exception as e:
+            logger.warning(f"Error extracting metadata from {url}: {e}")
+        
+        return {'url': url, 'domain': urlparse(url).netloc}
+    
+    def _get(self, url):
+        """
+        GET a URL through the response cache
+        
+        Fresh cache entries are returned without touching the network; stale
+        ones are revalidated with a conditional request.
+        
+        Returns:
+            DownloadedResponse or CacheEntry: Object exposing status_code, headers and content
+        """
+        if self.cache is None:
+            return self._download(url, self.headers)
+        
+        entry = self.cache.lookup(url)
+        if self.cache.is_fresh(entry):
+            if self.cache.load(entry):
+                self.cache.record_hit(entry)
+                return entry
+            # Evicted since the lookup: a plain miss
+            entry = None
+        
+        headers = dict(self.headers)
+        if entry is not None:
+            headers.update(entry.conditional_headers())
+        
+        response = self._download(url, headers)
+        if entry is not None and response.status_code == 304:
+            if self.cache.load(entry):
+                return self.cache.revalidate(entry)
+            # Evicted while revalidating; fetch the body itself
+            response = self._download(url, self.headers)
+        
+        self.cache.record_miss()
+        if response.status_code != 200 or response.truncated:
+            return response
+        
+        stored = self.cache.store(url, response.content, response.status_code, response.headers)
+        return stored if stored is not None else response
+    
+    def _download(self, url, headers):
+        """
+        Stream a response body with size, type and time bounds
+        
+        The Content-Type is checked before any of the body is read. The body
+        is read in chunks and reading stops at max_bytes or once the whole
+        download has taken longer than self.timeout; whatever prefix was
+        read is kept and the response is marked truncated.
+        
+        Raises:
+            ContentRejected: If the Content-Type is not on the allowlist
+            requests.exceptions.RequestException: On connection or HTTP errors
+        """
+        response = self.session.get(
+            url, headers=headers, stream=True,
+            timeout=(self.connect_timeout, self.read_timeout)
+        )
+        try:
+            if response.status_code == 304:
+                return DownloadedResponse(url, 304, response.headers, b'')
+            
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            content_type = response.headers.get('Content-Type', '')
+            mime_type = content_type.split(';')[0].strip().lower()
+            if mime_type and mime_type not in self.allowed_content_types:
+                raise ContentRejected(f"Unsupported content type '{mime_type}' for {url}")
             
-            metadata = {
-                'url': url,
-                'title': soup.title.string if soup.title else 'Unknown',
-                'description': self._get_meta_content(soup, 'description'),
-                'author': self._get_meta_content(soup, 'author'),
-                'publish_date': self._get_meta_content(soup, 'article:published_time'),
-                'domain': urlparse(url).netloc
-            }
+            chunks = []
+            size = 0
+            truncated = False
+            deadline = time.monotonic() + self.timeout
+            with closing(self._iter_body(response, deadline)) as body:
+                for chunk in body:
+                    if chunk is None:
+                        truncated = True
+                        logger.info(f"Stopped reading {url} after {self.timeout}s")
+                        break
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= self.max_bytes:
+                        truncated = True
+                        logger.info(f"Stopped reading {url} at the {self.max_bytes} byte cap")
+                        break
             
-            return metadata
-        
-        except Exception as e:
-            logger.warning(f"Error extracting metadata from {url}: {e}")
-            return {'url': url, 'domain': urlparse(url).netloc}
+            content = b''.join(chunks)[:self.max_bytes]
+            return DownloadedResponse(url, response.status_code, response.headers, content, truncated)
+        finally:
+            response.close()
     
-    def _get_meta_content(self, soup, meta_name):
+    def _iter_body(self, response, deadline):
         """
-        Extract content from meta tags
+        Yield body chunks as they arrive, then None if the deadline passes
+        
+        Every socket read is bounded by the time left, so a server trickling
+        bytes just under the read timeout is still cut off at the deadline:
+        each read returns whatever one recv() delivers (read1) and the
+        socket timeout shrinks to the remaining time before each one. The
+        socket's own timeout is restored afterwards, as its connection goes
+        back to the pool once the body is read.
         """
+        raw = response.raw
+        sock = _response_socket(raw)
+        if not hasattr(raw, 'read1') or sock is None:
+            # No per-read control; check the deadline between chunks
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                yield chunk
+                if time.monotonic() > deadline:
+                    yield None
+                    return
+            return
+        
+        original_timeout = sock.gettimeout()
         try:
-            meta = soup.find('meta', attrs={'name': meta_name}) or \
-                   soup.find('meta', attrs={'property': meta_name})
-            return meta.get('content', '') if meta else ''
-        except:
-            return ''
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    yield None
+                    return
+                try:
+                    sock.settimeout(min(self.read_timeout, remaining))
+                except OSError:
+                    # Already closed; whatever is left is in the read buffer
+                    pass
+                try:
+                    chunk = raw.read1(self.chunk_size, decode_content=True)
+                except (socket.timeout, ReadTimeoutError):
+                    if time.monotonic() >= deadline:
+                        yield None
+                        return
+                    raise requests.exceptions.ReadTimeout(f"Read timed out after {self.read_timeout}s")
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            try:
+                sock.settimeout(original_timeout)
+            except OSError:
+                pass
+    
+    def get_cache_stats(self):
+        """Return response cache counters, or None if caching is disabled"""
+        return self.cache.get_stats() if self.cache is not None else None
     
     def check_availability(self, url):
         """
@@ -111,7 +397,10 @@ class WebScraper:
             bool: True if accessible, False otherwise
         """
         try:
-            response = requests.head(url, headers=self.headers, timeout=self.timeout)
+            if self.cache is not None and self.cache.is_fresh(self.cache.lookup(url)):
+                return True
+            
+            response = self.session.head(url, headers=self.headers, timeout=self.timeout)
             return response.status_code < 400
         except:
             return False
@@ -0,0 +1,62 @@
+"""
+Benchmark for NLPProcessor keyword extraction
+
+Measures documents per second of extract_keywords with the word_tokenize
+path and with the cached fast path (checking that both return the same
+keywords), and of extract_keywords_batch run inline and across the
+enrichment process pool. Documents are the text of the HTML fixtures.
+
+Usage (from backend/):
+    python -m benchmarks.bench_keywords [--repeat N] [--batch N]
+"""
+
+import argparse
+import time
+
+from app.utils import nlp_processor
+from app.utils.text_extractors import SoupExtractor
+from benchmarks.bench_text_extraction import FIXTURES_DIR, load_fixtures
+
+def docs_per_second(function, texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(texts)
+    return len(texts) * repeat / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--batch', type=int, default=2000)
+    args = parser.parse_args()
+
+    extractor = SoupExtractor()
+    texts = [extractor.extract(content) for content in load_fixtures(FIXTURES_DIR).values()]
+    if not texts:
+        raise SystemExit(f"No .html fixtures found in {FIXTURES_DIR}")
+
+    processor = nlp_processor.NLPProcessor()
+    single = lambda batch: [processor.extract_keywords(text) for text in batch]
+
+    nlp_processor.KEYWORD_FAST_PATH = False
+    expected = single(texts)
+    slow = docs_per_second(single, texts, args.repeat)
+
+    nlp_processor.KEYWORD_FAST_PATH = True
+    identical = single(texts) == expected
+    fast = docs_per_second(single, texts, args.repeat)
+
+    print(f"{len(texts)} fixtures, {args.repeat} rounds")
+    print(f"word_tokenize   {slow:10.1f} docs/s")
+    print(f"fast path       {fast:10.1f} docs/s   ({fast / slow:.1f}x, identical: {identical})")
+
+    # Distinct texts, as a bulk job would see them; the pool start-up is included
+    batch = [f"{texts[i % len(texts)]} Batch document {i}." for i in range(args.batch)]
+    inline = docs_per_second(single, batch, 1)
+    parallel = docs_per_second(
+        lambda docs: nlp_processor.NLPProcessor().extract_keywords_batch(docs), batch, 1
+    )
+    print(f"batch inline    {inline:10.1f} docs/s   ({len(batch)} docs)")
+    print(f"batch parallel  {parallel:10.1f} docs/s")
+
+if __name__ == '__main__':
+    main()
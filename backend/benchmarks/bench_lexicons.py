@@ -0,0 +1,79 @@
+"""
+Benchmark for the multi-lexicon indicator matcher
+
+Compares, on large pages and lexicons of thousands of terms:
+  - the old approach: lowercase the page, then one substring scan per term
+    (presence only, no offsets)
+  - LexiconMatcher.find(): one regex pass reporting every match with offsets
+
+Lexicon terms are random one- to three-word phrases drawn from the page
+vocabulary, so a realistic share of them occurs in the pages.
+
+Usage (from backend/):
+    python -m benchmarks.bench_lexicons [--terms N ...] [--page-kb N] [--repeat N]
+"""
+
+import argparse
+import random
+import time
+
+from app.utils.lexicon_matcher import LexiconMatcher
+from app.utils.text_extractors import SoupExtractor
+from benchmarks.bench_text_extraction import FIXTURES_DIR, load_fixtures
+
+def make_page(vocabulary, size, rng):
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(vocabulary)
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)
+
+def make_lexicons(vocabulary, terms, rng, names=('sensational', 'citation', 'hedging', 'clickbait')):
+    per_lexicon = terms // len(names)
+    return {
+        name: [' '.join(rng.sample(vocabulary, rng.randint(1, 3))) for _ in range(per_lexicon)]
+        for name in names
+    }
+
+def substring_scan(lexicons, page):
+    lowered = page.lower()
+    return {name: [term for term in terms if term in lowered] for name, terms in lexicons.items()}
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--terms', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--page-kb', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    extractor = SoupExtractor()
+    text = ' '.join(extractor.extract(content) for content in load_fixtures(FIXTURES_DIR).values())
+    # Pad the fixture vocabulary so thousands of distinct terms can be drawn from it
+    vocabulary = sorted(set(text.lower().split()) | {f"term{i}" for i in range(5000)})
+    page = make_page(vocabulary, args.page_kb * 1024, rng)
+
+    print(f"page {len(page) / 1024:.0f} KB, {len(vocabulary)} word vocabulary")
+    print(f"{'terms':>7} {'compile s':>10} {'substring s':>12} {'matcher s':>10} {'speedup':>8} {'matches':>9}")
+
+    for terms in args.terms:
+        lexicons = make_lexicons(vocabulary, terms, rng)
+        matcher = LexiconMatcher(lexicons=lexicons, path='')
+
+        compile_s, _ = timed(matcher.reload, 1)
+        substring_s, _ = timed(lambda: substring_scan(lexicons, page), args.repeat)
+        matcher_s, matches = timed(lambda: matcher.find(page), args.repeat)
+
+        print(f"{terms:>7} {compile_s:>10.3f} {substring_s:>12.3f} {matcher_s:>10.3f} "
+              f"{substring_s / matcher_s:>7.1f}x {len(matches):>9}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Benchmark for verify() candidate retrieval against a seeded local mongod
+
+Compares, per query:
+  - index: the in-memory keyword index ranks article ids, then the top
+    articles are loaded with one find() and their sources resolved through
+    the source registry (both warm, as in a long-running worker)
+  - aggregate: one aggregation doing candidate selection, source grouping
+    and the trusted source join
+
+Reports the latency percentiles and the number of server commands per
+query, and how far the two engines agree on the candidates (mean Jaccard
+overlap of the returned article urls). The database (default trueline_bench) is dropped and reseeded
+unless --no-seed is given; never point this at a real database.
+
+Usage (from backend/):
+    python -m benchmarks.bench_retrieval [--uri mongodb://localhost:27017] [--articles N] [--sources N] [--queries N]
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import mongoengine as me
+from pymongo import monitoring
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+def seed(db, articles, sources, vocabulary, rng):
+    db.articles.drop()
+    db.trusted_sources.drop()
+
+    names = [f"source{i}" for i in range(sources)]
+    db.trusted_sources.insert_many([
+        {
+            'name': name,
+            'url': f"https://{name}.example.com",
+            'domain': f"{name}.example.com",
+            'trustworthiness_score': round(rng.uniform(0.3, 1.0), 2),
+            'is_active': True
+        }
+        for name in names
+    ])
+
+    now = datetime.utcnow()
+    batch = []
+    for i in range(articles):
+        batch.append({
+            'title': f"Article {i}",
+            'url': f"https://{rng.choice(names)}.example.com/{i}",
+            'content': ' '.join(rng.choices(vocabulary, k=400)),
+            'source': rng.choice(names),
+            # Some stored keywords are capitalized, as client-supplied ones can be
+            'keywords': [k.capitalize() if rng.random() < 0.2 else k for k in rng.sample(vocabulary, 10)],
+            'minhash': [rng.getrandbits(31) for _ in range(128)],
+            'tfidf_vector': {'indices': sorted(rng.sample(range(5000), 50)), 'values': [0.1] * 50},
+            'tfidf_version': 'bench',
+            'status': 'verified',
+            'verified_date': now - timedelta(minutes=i)
+        })
+        if len(batch) == 5000:
+            db.articles.insert_many(batch)
+            batch = []
+    if batch:
+        db.articles.insert_many(batch)
+
+    # As Article's status_keywords_ci index
+    db.articles.create_index(
+        [('status', 1), ('keywords', 1)], name='status_keywords_ci', collation={'locale': 'en', 'strength': 2}
+    )
+    db.trusted_sources.create_index('domain')
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+def run(name, function, queries, counter):
+    latencies = []
+    commands = counter.count
+    for keywords in queries:
+        started = time.perf_counter()
+        function(keywords)
+        latencies.append((time.perf_counter() - started) * 1000)
+    commands = (counter.count - commands) / len(queries)
+
+    print(f"{name:>10} {percentile(latencies, 0.5):>8.2f} {percentile(latencies, 0.95):>8.2f} "
+          f"{sum(latencies) / len(latencies):>8.2f} {commands:>9.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--uri', default='mongodb://localhost:27017')
+    parser.add_argument('--db', default='trueline_bench')
+    parser.add_argument('--articles', type=int, default=50000)
+    parser.add_argument('--sources', type=int, default=200)
+    parser.add_argument('--vocabulary', type=int, default=5000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--no-seed', action='store_true')
+    args = parser.parse_args()
+
+    # The listener must be registered before the client is created
+    counter = CommandCounter()
+    monitoring.register(counter)
+
+    # Importing the services connects the app's default database; rebind it
+    from app.models import Article
+    from app.services.verification_service import VerificationService
+    me.disconnect()
+    me.connect(args.db, host=args.uri, serverSelectionTimeoutMS=2000)
+    try:
+        me.get_db().command('ping')
+    except Exception as e:
+        raise SystemExit(f"No mongod at {args.uri}: {e}")
+
+    rng = random.Random(1)
+    vocabulary = [f"word{i}" for i in range(args.vocabulary)]
+    if not args.no_seed:
+        started = time.perf_counter()
+        seed(Article._get_collection().database, args.articles, args.sources, vocabulary, rng)
+        print(f"seeded {args.articles} articles, {args.sources} sources in {time.perf_counter() - started:.1f}s")
+
+    service = VerificationService()
+    service.match_limit = args.limit
+    service.keyword_index.rebuild()
+    service.source_registry.active_sources()
+
+    queries = [rng.sample(vocabulary, rng.randint(2, 4)) for _ in range(args.queries)]
+
+    def index_path(keywords):
+        articles = service._find_matching_articles('', keywords=keywords)
+        sources = service._find_reporting_sources(articles, keywords)
+        return service._analyze_source_reliability(sources)
+
+    def aggregate_path(keywords):
+        articles, trust = service._find_matching_articles_aggregate(keywords)
+        sources = service._find_reporting_sources(articles, keywords)
+        return service._analyze_source_reliability(sources, trust)
+
+    # One untimed pass each, so both run against a warm cache
+    for keywords in queries[:10]:
+        index_path(keywords)
+        aggregate_path(keywords)
+
+    print(f"{'engine':>10} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8} {'commands':>9}")
+    run('index', index_path, queries, counter)
+    run('aggregate', aggregate_path, queries, counter)
+
+    overlaps = []
+    for keywords in queries:
+        by_index = {a['url'] for a in service._find_matching_articles('', keywords=keywords)}
+        by_aggregate = {a['url'] for a in service._find_matching_articles_aggregate(keywords)[0]}
+        union = by_index | by_aggregate
+        overlaps.append(len(by_index & by_aggregate) / len(union) if union else 1.0)
+    print(f"candidate overlap: mean {sum(overlaps) / len(overlaps):.3f}, "
+          f"identical for {sum(o == 1.0 for o in overlaps)}/{len(overlaps)} queries")
+
+if __name__ == '__main__':
+    main()
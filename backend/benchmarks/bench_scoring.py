@@ -0,0 +1,56 @@
+"""
+Benchmark for batch credibility scoring
+
+Compares scoring N stories with one CredibilityAnalyzer.calculate_score
+call each against one calculate_scores call over arrays, and checks that
+both give the same scores.
+
+Usage (from backend/):
+    python -m benchmarks.bench_scoring [--stories N ...]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.utils.credibility_analyzer import CredibilityAnalyzer
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--stories', type=int, nargs='+', default=[1000, 100000, 1000000])
+    args = parser.parse_args()
+
+    analyzer = CredibilityAnalyzer()
+    rng = np.random.default_rng(1)
+
+    print(f"{'stories':>9} {'loop s':>8} {'batch s':>8} {'speedup':>8} {'max diff':>9}")
+    for n in args.stories:
+        num_sources = rng.integers(0, 8, n)
+        reliability = np.where(rng.random(n) < 0.2, np.nan, rng.random(n))
+        consistency = rng.random(n)
+        spread = rng.random(n) < 0.5
+        original = rng.random(n) < 0.3
+
+        started = time.perf_counter()
+        expected = [
+            analyzer.calculate_score(
+                num_sources=int(num_sources[i]),
+                source_reliability=None if np.isnan(reliability[i]) else {'source': float(reliability[i])},
+                content_consistency=consistency[i],
+                spread_pattern=bool(spread[i]),
+                original_reporting=bool(original[i])
+            )
+            for i in range(n)
+        ]
+        loop_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        scores = analyzer.calculate_scores(num_sources, reliability, consistency, spread, original)
+        batch_s = time.perf_counter() - started
+
+        diff = float(np.abs(np.asarray(expected) - scores).max())
+        print(f"{n:>9} {loop_s:>8.3f} {batch_s:>8.4f} {loop_s / batch_s:>7.0f}x {diff:>9.1e}")
+
+if __name__ == '__main__':
+    main()
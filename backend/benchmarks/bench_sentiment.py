@@ -0,0 +1,79 @@
+"""
+Benchmark for NLPProcessor sentiment scoring
+
+Measures documents per second of:
+  - whole-text NLTK VADER polarity_scores (how analyze_sentiment used to work)
+  - sentence-chunked, capped scoring with every sentence new to the cache
+  - analyze_sentiment on documents already scored (content-hash cache)
+  - analyze_sentiment_batch on new documents, inline and on the pool
+
+Documents are long pages built from the fixture text, with a document
+number added to every sentence so no two documents share a sentence.
+
+Usage (from backend/):
+    python -m benchmarks.bench_sentiment [--repeat N] [--batch N] [--pages N]
+"""
+
+import argparse
+import os
+import time
+
+from app.utils.nlp_processor import SENTENCE_BREAK, NLPProcessor, sentiment_cache
+from app.utils.text_extractors import SoupExtractor
+from benchmarks.bench_text_extraction import FIXTURES_DIR, load_fixtures
+
+def docs_per_second(function, texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(texts)
+    return len(texts) * repeat / (time.perf_counter() - start)
+
+def make_documents(fixtures, count, pages, tag):
+    """count distinct documents of `pages` fixture texts each"""
+    sentences = [sentence for text in fixtures for sentence in SENTENCE_BREAK.split(text) if sentence.strip()]
+    return [
+        ' '.join(f"{sentence} ({tag}{i}.{j})" for j, sentence in enumerate(sentences * pages))
+        for i in range(count)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=50, help='Documents per single-document run')
+    parser.add_argument('--batch', type=int, default=200)
+    parser.add_argument('--pages', type=int, default=8, help='Copies of the fixture text per document')
+    args = parser.parse_args()
+
+    extractor = SoupExtractor()
+    fixtures = [extractor.extract(content) for content in load_fixtures(FIXTURES_DIR).values()]
+    if not fixtures:
+        raise SystemExit(f"No .html fixtures found in {FIXTURES_DIR}")
+
+    from nltk.sentiment import SentimentIntensityAnalyzer
+
+    processor = NLPProcessor()
+    sia = SentimentIntensityAnalyzer()
+    rows = []
+
+    # Each round gets its own documents so the chunked run never hits the cache
+    texts = make_documents(fixtures, args.repeat, args.pages, 'whole')
+    rows.append(('whole text', docs_per_second(lambda docs: [sia.polarity_scores(t)['compound'] for t in docs], texts, 1)))
+    texts = make_documents(fixtures, args.repeat, args.pages, 'chunked')
+    rows.append(('chunked', docs_per_second(lambda docs: [processor.score_sentiment(t) for t in docs], texts, 1)))
+    rows.append(('cached', docs_per_second(lambda docs: [processor.analyze_sentiment(t) for t in docs], texts, 20)))
+
+    # Pool start-up is included in the parallel figure
+    batch = make_documents(fixtures, args.batch, args.pages, 'inline')
+    os.environ['SENTIMENT_BATCH_PARALLEL_MIN'] = str(len(batch) + 1)
+    rows.append(('batch inline', docs_per_second(processor.analyze_sentiment_batch, batch, 1)))
+    batch = make_documents(fixtures, args.batch, args.pages, 'parallel')
+    os.environ['SENTIMENT_BATCH_PARALLEL_MIN'] = '1'
+    rows.append(('batch parallel', docs_per_second(processor.analyze_sentiment_batch, batch, 1)))
+
+    print(f"documents of ~{sum(map(len, texts)) // len(texts)} chars, {os.cpu_count()} CPUs")
+    baseline = rows[0][1]
+    for name, rate in rows:
+        print(f"{name:<15} {rate:10.1f} docs/s   ({rate / baseline:.1f}x)")
+    print(f"cache: {sentiment_cache.get_stats()}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark for application startup time and per-worker memory
+
+Measures, each in a fresh interpreter:
+  - import time and RSS of `import app` (nothing is loaded yet)
+  - time and RSS after app.warm_up() loads the models
+  - per-worker memory for N workers, either forked from a warmed master
+    (gunicorn preload) or each loading the models itself (no preload)
+
+Per-worker memory is read from /proc/<pid>/smaps_rollup (Linux): private
+pages are what each extra worker really costs, PSS splits shared pages
+between the processes sharing them.
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup [--workers N]
+"""
+
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+
+SAMPLE_TEXT = (
+    "Officials confirmed on Tuesday that the new transit line will open next "
+    "month, ending years of delays. Critics said the project ran over budget."
+)
+
+def memory_kb():
+    """RSS, PSS and private memory of this process in kB"""
+    fields = {}
+    with open('/proc/self/smaps_rollup') as rollup:
+        for line in rollup:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(':'):
+                fields[parts[0][:-1]] = int(parts[1])
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    }
+
+def serve_once():
+    """Stand-in for a worker's first request"""
+    from app.utils.nlp_processor import NLPProcessor
+    processor = NLPProcessor()
+    processor.extract_keywords(SAMPLE_TEXT)
+    processor.analyze_sentiment(SAMPLE_TEXT)
+
+def child_startup():
+    started = time.perf_counter()
+    import app
+    imported = time.perf_counter()
+    after_import = memory_kb()
+
+    app.warm_up()
+    warmed = time.perf_counter()
+
+    print(json.dumps({
+        'import_s': imported - started,
+        'import_rss': after_import['rss'],
+        'warm_up_s': warmed - imported,
+        'warm_rss': memory_kb()['rss']
+    }))
+
+def child_workers(workers, preload):
+    """Start workers the way gunicorn would and report their memory"""
+    if preload:
+        import app
+        app.warm_up()
+        gc.freeze()
+
+    reports = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        if os.fork() == 0:
+            os.close(read_fd)
+            if not preload:
+                import app
+                app.warm_up()
+            serve_once()
+            os.write(write_fd, json.dumps(memory_kb()).encode())
+            # Stay alive until every worker has measured, as real workers would
+            time.sleep(2)
+            os._exit(0)
+        os.close(write_fd)
+        reports.append(read_fd)
+
+    results = []
+    for fd in reports:
+        with os.fdopen(fd) as pipe:
+            results.append(json.loads(pipe.read()))
+    for _ in range(workers):
+        os.wait()
+
+    print(json.dumps(results))
+
+def run_child(*args):
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_startup', '--child', *args],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--child', nargs='+', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        if args.child[0] == 'startup':
+            child_startup()
+        else:
+            child_workers(int(args.child[1]), args.child[0] == 'preload')
+        return
+
+    startup = run_child('startup')
+    print(f"import app:  {startup['import_s'] * 1000:8.1f} ms  RSS {startup['import_rss'] / 1024:7.1f} MB")
+    print(f"warm_up():   {startup['warm_up_s'] * 1000:8.1f} ms  RSS {startup['warm_rss'] / 1024:7.1f} MB")
+    print()
+    print(f"{args.workers} workers    {'RSS MB':>8} {'PSS MB':>8} {'private MB':>11}")
+
+    for mode in ('preload', 'no-preload'):
+        workers = run_child(mode, str(args.workers))
+        rss = sum(w['rss'] for w in workers) / len(workers) / 1024
+        pss = sum(w['pss'] for w in workers) / len(workers) / 1024
+        private = sum(w['private'] for w in workers) / len(workers) / 1024
+        print(f"{mode:<14} {rss:>8.1f} {pss:>8.1f} {private:>11.1f}   (mean per worker)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark for the HTML-to-text extraction backends
+
+Measures throughput (MB/s) of each backend over the HTML fixtures and how
+closely its output matches the BeautifulSoup extraction WebScraper used
+before the streaming backend existed.
+
+Usage (from backend/):
+    python -m benchmarks.bench_text_extraction [--repeat N] [--fixtures DIR]
+"""
+
+import argparse
+import glob
+import os
+import time
+
+from app.utils.text_extractors import EXTRACTORS, SoupExtractor, get_extractor
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+def load_fixtures(directory):
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+        with open(path, 'rb') as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+def token_overlap(a, b):
+    """Jaccard similarity of the two outputs' word sets"""
+    a_tokens, b_tokens = set((a or '').split()), set((b or '').split())
+    if not a_tokens and not b_tokens:
+        return 1.0
+    return len(a_tokens & b_tokens) / len(a_tokens | b_tokens)
+
+def bench(extractor, pages, repeat):
+    total_bytes = sum(len(content) for content in pages.values()) * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for content in pages.values():
+            extractor.extract(content)
+    elapsed = time.perf_counter() - start
+    return total_bytes / elapsed / (1024 * 1024)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--fixtures', default=FIXTURES_DIR)
+    args = parser.parse_args()
+
+    pages = load_fixtures(args.fixtures)
+    if not pages:
+        raise SystemExit(f"No .html fixtures found in {args.fixtures}")
+
+    baseline = SoupExtractor()
+    expected = {name: baseline.extract(content) for name, content in pages.items()}
+
+    print(f"{len(pages)} fixtures, {sum(map(len, pages.values()))} bytes, {args.repeat} rounds")
+    print(f"{'backend':<10} {'MB/s':>8} {'exact':>7} {'overlap':>8}")
+
+    for name in EXTRACTORS:
+        extractor = get_extractor(name)
+        if extractor.name != name:
+            print(f"{name:<10} {'unavailable':>8}")
+            continue
+
+        outputs = {page: extractor.extract(content) for page, content in pages.items()}
+        exact = sum(outputs[page] == expected[page] for page in pages)
+        overlap = sum(token_overlap(outputs[page], expected[page]) for page in pages) / len(pages)
+        throughput = bench(extractor, pages, args.repeat)
+
+        print(f"{name:<10} {throughput:>8.2f} {exact:>3}/{len(pages):<3} {overlap:>8.3f}")
+
+if __name__ == '__main__':
+    main()
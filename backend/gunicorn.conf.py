@@ -0,0 +1,36 @@
+"""
+Gunicorn configuration for TrueLine News
+
+With GUNICORN_PRELOAD enabled (the default) the app is imported and its
+models are loaded once in the master; workers fork from it and share
+those pages copy-on-write instead of each loading its own copy.
+"""
+
+import gc
+import os
+
+bind = f"{os.getenv('FLASK_HOST', '0.0.0.0')}:{os.getenv('FLASK_PORT', 5000)}"
+workers = int(os.getenv('GUNICORN_WORKERS', 4))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+
+def when_ready(server):
+    if not preload_app:
+        return
+
+    from app import warm_up
+    warm_up()
+
+    # Move everything loaded so far out of the collector's reach, so
+    # collections in the workers do not touch (and copy) the shared pages
+    gc.freeze()
+    server.log.info("Models loaded in master; workers will share them")
+
+def post_fork(server, worker):
+    # Each worker gets its own MongoDB client and verification job threads
+    import mongoengine as me
+    from app import connect_db, start_workers
+
+    me.disconnect_all()
+    connect_db()
+    start_workers()
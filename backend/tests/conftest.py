@@ -0,0 +1,63 @@
+"""
+Shared fixtures: an in-process mock database, and a real mongod when one is reachable
+"""
+
+import os
+
+import mongoengine as me
+import pytest
+
+# Never talk to the development database from tests
+MONGODB_TEST_URI = os.getenv('MONGODB_TEST_URI', 'mongodb://localhost:27017/trueline_test')
+
+def _reset_collections():
+    """Drop the collection handles mongoengine caches per model class"""
+    from app import models
+
+    for document in vars(models).values():
+        if isinstance(document, type) and issubclass(document, me.Document) and document is not me.Document:
+            document._collection = None
+
+def _accept_bulk_sort(mongomock, monkeypatch):
+    """Let mongomock's bulk builder take the sort= pymongo 4.9+ passes for UpdateOne/ReplaceOne"""
+    builder = mongomock.collection.BulkOperationBuilder
+    for name in ('add_update', 'add_replace'):
+        method = getattr(builder, name)
+        monkeypatch.setattr(builder, name, lambda self, *args, sort=None, _method=method, **kwargs:
+                            _method(self, *args, **kwargs))
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """mongoengine's default connection, backed by mongomock"""
+    mongomock = pytest.importorskip('mongomock')
+    _accept_bulk_sort(mongomock, monkeypatch)
+
+    me.disconnect_all()
+    me.connect('trueline_test', mongo_client_class=mongomock.MongoClient)
+    _reset_collections()
+    yield me.get_db()
+    me.disconnect_all()
+    _reset_collections()
+
+@pytest.fixture
+def mongod():
+    """mongoengine's default connection to a real server; skips without one"""
+    from pymongo import MongoClient
+    from pymongo.errors import PyMongoError
+
+    try:
+        MongoClient(MONGODB_TEST_URI, serverSelectionTimeoutMS=500).admin.command('ping')
+    except PyMongoError:
+        pytest.skip(f"No mongod at {MONGODB_TEST_URI} (set MONGODB_TEST_URI)")
+
+    me.disconnect_all()
+    me.connect(host=MONGODB_TEST_URI)
+    _reset_collections()
+    db = me.get_db()
+    for name in db.list_collection_names():
+        db.drop_collection(name)
+    yield db
+    for name in db.list_collection_names():
+        db.drop_collection(name)
+    me.disconnect_all()
+    _reset_collections()
@@ -0,0 +1,83 @@
+"""
+The aggregation retrieval engine against a real mongod, compared with the index path
+
+Run with a local server, e.g. MONGODB_TEST_URI=mongodb://localhost:27017/trueline_test;
+skipped when none is reachable (mongomock cannot run the pipeline).
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import Article, TrustedSource
+from app.services.aggregate_retrieval import KEYWORD_COLLATION, AggregateRetriever
+from app.services.keyword_index import KeywordIndex
+
+QUERIES = [['election'], ['Election', 'vote'], ['economy', 'TRADE'], ['vote', 'trade'], ['nothing']]
+
+@pytest.fixture
+def corpus(mongod):
+    TrustedSource(name='BBC', url='https://www.bbc.com', domain='bbc.com', trustworthiness_score=0.9).save()
+    TrustedSource(name='Reuters', url='https://www.reuters.com', domain='reuters.com',
+                  trustworthiness_score=0.95).save()
+    TrustedSource(name='Gone', url='https://gone.example', domain='gone.example',
+                  trustworthiness_score=0.2, is_active=False).save()
+
+    now = datetime.utcnow()
+    rows = [
+        ('BBC', ['Election', 'vote'], 'verified'),
+        ('bbc', ['election', 'economy'], 'verified'),
+        ('Reuters', ['TRADE', 'economy'], 'verified'),
+        ('Reuters', ['vote'], 'verified'),
+        ('Gone', ['election'], 'verified'),
+        ('Unknown', ['trade', 'Vote'], 'verified'),
+        ('BBC', ['election', 'vote'], 'pending'),
+    ]
+    for i, (source, keywords, status) in enumerate(rows):
+        Article(
+            title=f"Article {i}", url=f"https://example.com/{i}", content=f"content {i}",
+            source=source, keywords=keywords, status=status, verified_date=now - timedelta(minutes=i)
+        ).save()
+    Article.ensure_indexes()
+    return mongod
+
+@pytest.fixture
+def service(corpus):
+    from app.services.verification_service import VerificationService
+
+    service = VerificationService()
+    service.keyword_index = KeywordIndex(rebuild_interval=3600)
+    service.keyword_index.rebuild()
+    return service
+
+def test_pipeline_returns_the_index_path_candidates(service):
+    for keywords in QUERIES:
+        by_index = service._find_matching_articles('', keywords=keywords)
+        by_aggregate, _ = service._find_matching_articles_aggregate(keywords)
+
+        assert sorted(a['url'] for a in by_aggregate) == sorted(a['url'] for a in by_index), keywords
+        assert all(set(a) == {'url', 'content', 'source', 'tfidf_vector', 'tfidf_version', 'minhash'}
+                   for a in by_aggregate)
+
+def test_ranking_and_trust_join(corpus):
+    articles, trust = AggregateRetriever().search(['ELECTION', 'vote'])
+
+    # Two matching keywords first, then newest first
+    assert [a['url'] for a in articles] == [
+        'https://example.com/0', 'https://example.com/1', 'https://example.com/3',
+        'https://example.com/4', 'https://example.com/5'
+    ]
+    # Names resolve case-insensitively; inactive and unknown sources are left unresolved
+    assert trust['Reuters'] == 0.95
+    assert {trust[name] for name in trust if name.lower() == 'bbc'} == {0.9}
+    assert trust.get('Gone') is None and trust.get('Unknown') is None
+
+def test_match_uses_the_collated_keyword_index(corpus):
+    plan = corpus.command(
+        'explain',
+        {'aggregate': 'articles', 'pipeline': AggregateRetriever().pipeline(['election'], 50, None)[:1],
+         'cursor': {}, 'collation': KEYWORD_COLLATION},
+        verbosity='queryPlanner'
+    )
+
+    assert 'status_keywords_ci' in str(plan)
@@ -0,0 +1,57 @@
+"""
+GET /api/articles pagination: keyset cursors and limit validation
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import Article
+from app.routes import articles as articles_routes
+
+@pytest.fixture
+def client(mongo):
+    from app import app
+
+    now = datetime.utcnow()
+    for i in range(7):
+        # Two articles share each timestamp, so the cursor has to break ties on _id
+        Article(title=f"Article {i}", url=f"https://example.com/{i}", content=f"content {i}",
+                source='BBC', status='verified', verified_date=now - timedelta(minutes=i // 2)).save()
+    articles_routes._count_cache.clear()
+    return app.test_client()
+
+def pages(client, limit):
+    cursor, urls = '', []
+    while cursor is not None:
+        body = client.get('/api/articles', query_string={'cursor': cursor, 'limit': limit}).get_json()
+        urls.append([article['url'] for article in body['articles']])
+        cursor = body['next_cursor']
+    return urls
+
+def test_cursor_walks_every_article_once_newest_first(client):
+    walked = pages(client, 3)
+
+    assert [len(page) for page in walked] == [3, 3, 1]
+    expected = [a.url for a in Article.objects.order_by('-verified_date', '-id')]
+    assert [url for page in walked for url in page] == expected
+
+def test_last_full_page_has_no_next_cursor(client):
+    assert [len(page) for page in pages(client, 7)] == [7]
+
+@pytest.mark.parametrize('limit, expected', [('0', 1), ('-5', 1), ('1000000', 100), ('3', 3)])
+def test_limit_is_clamped(client, limit, expected):
+    for query in ({'limit': limit}, {'limit': limit, 'cursor': ''}):
+        response = client.get('/api/articles', query_string=query)
+
+        assert response.status_code == 200
+        assert response.get_json()['limit'] == expected
+        assert len(response.get_json()['articles']) == min(expected, 7)
+
+@pytest.mark.parametrize('query', [{'limit': 'ten'}, {'limit': '2.5'}, {'offset': 'x'}, {'offset': '-1'},
+                                   {'cursor': 'not-a-cursor'}, {'cursor': 'e30='}, {'cursor': 'WzFd'}])
+def test_malformed_parameters_are_rejected(client, query):
+    response = client.get('/api/articles', query_string=query)
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
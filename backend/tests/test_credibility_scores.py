@@ -0,0 +1,44 @@
+"""
+Batch credibility scoring against the per-story calculate_score
+"""
+
+import numpy as np
+import pytest
+
+from app.utils.credibility_analyzer import CredibilityAnalyzer
+
+def test_calculate_scores_matches_calculate_score_exactly():
+    analyzer = CredibilityAnalyzer()
+    rng = np.random.default_rng(24)
+    n = 2000
+    num_sources = rng.integers(0, 12, n)
+    reliability = np.where(rng.random(n) < 0.3, np.nan, rng.random(n))
+    consistency = rng.random(n)
+    spread = rng.random(n) < 0.5
+    original = rng.random(n) < 0.5
+
+    batch = analyzer.calculate_scores(num_sources, reliability, consistency, spread, original)
+
+    single = np.array([
+        analyzer.calculate_score(
+            num_sources=int(num_sources[i]),
+            # One source with the mean, so the dict's mean is the same float
+            source_reliability=None if np.isnan(reliability[i]) else {'source': float(reliability[i])},
+            content_consistency=float(consistency[i]),
+            spread_pattern=bool(spread[i]),
+            original_reporting=bool(original[i])
+        )
+        for i in range(n)
+    ])
+    assert np.max(np.abs(batch - single)) == 0.0
+
+def test_calculate_scores_defaults_match_calculate_score():
+    analyzer = CredibilityAnalyzer()
+
+    batch = analyzer.calculate_scores([0, 1, 2, 7])
+
+    assert batch.tolist() == [analyzer.calculate_score(num_sources=k) for k in [0, 1, 2, 7]]
+
+def test_calculate_scores_rejects_mismatched_lengths():
+    with pytest.raises(ValueError, match='Expected 2 values'):
+        CredibilityAnalyzer().calculate_scores([1, 2], content_consistency=[0.5])
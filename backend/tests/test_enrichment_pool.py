@@ -0,0 +1,62 @@
+"""
+Enrichment pool sizing, and recovery from a hung pool
+"""
+
+import os
+import time
+
+import pytest
+
+from app.utils import enrichment
+
+def hang_in_worker(task):
+    parent, value = task
+    if os.getpid() != parent:
+        time.sleep(60)
+    return [value]
+
+def is_running(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            return 'zombie' not in f.read()
+    except FileNotFoundError:
+        return False
+
+@pytest.fixture
+def pool_defaults(monkeypatch):
+    monkeypatch.setattr(enrichment, '_default_start_method', enrichment._default_start_method)
+    monkeypatch.setattr(enrichment, '_default_workers', enrichment._default_workers)
+    enrichment._reset_pool()
+    yield
+    enrichment._reset_pool()
+
+def test_serving_processes_get_a_small_pool(pool_defaults, monkeypatch):
+    monkeypatch.setenv('ENRICH_START_METHOD', 'fork')
+
+    assert enrichment._default_workers == int(os.getenv('ENRICH_WORKERS', 2))
+    assert enrichment.get_enrichment_pool()._max_workers == enrichment._default_workers
+
+def test_standalone_pool_uses_every_core(pool_defaults, monkeypatch):
+    monkeypatch.delenv('ENRICH_CLI_WORKERS', raising=False)
+    enrichment.use_standalone_pool()
+
+    assert enrichment._default_start_method == 'fork'
+    assert enrichment._default_workers == (os.cpu_count() or 2)
+
+def test_hung_pool_is_terminated_and_the_batch_computed_inline(pool_defaults, monkeypatch):
+    monkeypatch.setenv('ENRICH_START_METHOD', 'fork')
+    monkeypatch.setenv('ENRICH_TIMEOUT', '1')
+    monkeypatch.setattr(enrichment, '_default_workers', 1)
+    killed = []
+    kill = os.kill
+    monkeypatch.setattr(enrichment.os, 'kill', lambda pid, sig: (killed.append(pid), kill(pid, sig)))
+
+    assert enrichment._map_chunks(hang_in_worker, [(os.getpid(), 1), (os.getpid(), 2)]) == [1, 2]
+
+    # The executor may terminate the killed worker again once it notices
+    assert len(set(killed)) == 1
+    deadline = time.monotonic() + 5
+    while is_running(killed[0]) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not is_running(killed[0])
+    assert enrichment._pool is None
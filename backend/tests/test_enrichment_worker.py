@@ -0,0 +1,91 @@
+"""
+Enrichment worker writes: computed vs client-supplied values, and the keyword index and result cache
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.models import Article
+from app.services import enrichment_worker as worker_module
+from app.services.enrichment_worker import EnrichmentWorker
+from app.services.keyword_index import KeywordIndex
+
+def features(content):
+    """Stand-in for the process pool: keywords are the words, sentiment the length"""
+    return {
+        'keywords': content.split()[:3],
+        'sentiment_score': min(len(content) / 100, 1.0),
+        'minhash': [1, 2],
+        'lsh_bands': ['b0'],
+        'tfidf_vector': {},
+        'tfidf_version': None,
+        'indicators': {}
+    }
+
+@pytest.fixture
+def worker(mongo, monkeypatch):
+    monkeypatch.setattr(worker_module, 'enrich_contents', lambda contents: [features(c) for c in contents])
+    index = KeywordIndex(rebuild_interval=3600, sync_interval=3600)
+    index.rebuild()
+    monkeypatch.setattr(worker_module, 'keyword_index', index)
+    return EnrichmentWorker(batch_size=10, use_change_streams=False)
+
+def edit(article, content):
+    """What PUT /api/articles/<id> does with a new content"""
+    article.content = content
+    article.enriched_at = None
+    article.save()
+
+def test_computed_sentiment_is_recomputed_after_an_edit(worker):
+    article = Article(title='A', url='https://example.com/a', content='storm hits coast', source='BBC').save()
+    worker.run_once()
+    article.reload()
+    assert article.sentiment_computed and article.sentiment_score == pytest.approx(0.16)
+
+    edit(article, 'storm hits the coast hard overnight')
+    worker.run_once()
+    article.reload()
+    assert article.sentiment_score == pytest.approx(0.35)
+    assert article.keywords == ['storm', 'hits', 'the']
+
+def test_supplied_sentiment_and_keywords_are_kept(worker):
+    article = Article(title='A', url='https://example.com/a', content='storm hits coast', source='BBC',
+                      keywords=['weather'], sentiment_score=-0.5).save()
+    worker.run_once()
+    edit(article, 'storm hits the coast hard overnight')
+    worker.run_once()
+
+    article.reload()
+    assert article.sentiment_score == -0.5 and not article.sentiment_computed
+    assert article.keywords == ['weather'] and not article.keywords_computed
+
+def test_batch_reindexes_and_invalidates_the_result_cache(worker, monkeypatch):
+    invalidated = []
+    monkeypatch.setattr(worker_module.result_cache, 'invalidate',
+                        lambda keywords=(), sources=(): invalidated.append((set(keywords), set(sources))))
+    article = Article(title='A', url='https://example.com/a', content='storm hits coast', source='BBC',
+                      status='verified').save()
+
+    worker.run_once()
+
+    assert [article_id for article_id, _ in worker_module.keyword_index.search(['storm'])] == [str(article.id)]
+    assert invalidated == [({'storm', 'hits', 'coast'}, {'BBC'})]
+
+def test_index_syncs_keywords_written_by_another_process(mongo, monkeypatch):
+    from app.services import keyword_index as index_module
+
+    invalidated = []
+    monkeypatch.setattr(index_module.result_cache, 'invalidate',
+                        lambda keywords=(), sources=(): invalidated.append((set(keywords), set(sources))))
+    article = Article(title='A', url='https://example.com/a', content='storm hits coast', source='BBC',
+                      keywords=['weather'], status='verified').save()
+    index = KeywordIndex(rebuild_interval=3600, sync_interval=0.0001)
+    index.rebuild()
+
+    # The worker's write, as another process sees it
+    Article.objects(id=article.id).update(set__keywords=['storm', 'coast'], set__enriched_at=datetime.utcnow())
+
+    assert [article_id for article_id, _ in index.search(['storm'])] == [str(article.id)]
+    assert index.search(['weather']) == []
+    assert invalidated == [({'weather', 'storm', 'coast'}, {'BBC'})]
@@ -0,0 +1,66 @@
+"""
+FastSentimentIntensityAnalyzer scores, checked against NLTK's VADER
+"""
+
+import random
+
+import pytest
+
+from app.utils.fast_vader import FastSentimentIntensityAnalyzer
+
+TEXTS = [
+    "The minister's plan is GREAT!!! Everyone loves it :)",
+    "This is not good, but it isn't terrible either.",
+    "Horrible, horrible news... the worst day ever :(",
+    "Kinda okay?? I guess it's fine. meh",
+    "(great) [bad] {good} 'nice' \"awful\" -happy- !sad!",
+    "Wow!!!! :-) :D <3 ;) so happy!!!",
+    "The report was neither confirmed nor denied.",
+    "Never so good, without doubt the best; hardly a failure.",
+    "Sort of, kind of, somewhat uncertain - at least not the worst!",
+    "url: https://example.com/good?bad=1 and e-mail good@bad.com",
+    "",
+    "!!!",
+    "a",
+]
+
+VOCABULARY = [
+    'good', 'bad', 'great', 'terrible', 'not', 'never', 'very', 'extremely', 'but', 'kind', 'of',
+    'love', 'hate', 'okay', 'the', 'news', 'report', 'LOVE', 'BAD', 'no', 'without', 'doubt',
+    ':)', ':(', ':D', '<3', 'sort', 'least', 'at', 'fine', 'happy', 'sad', 'fraud', 'win',
+]
+PUNCTUATION = ['', '', '', '.', ',', '!', '?', '!!', '...', ';', ':', "'", '"', '(', ')', '-']
+
+def generated_texts(count=2000, seed=7):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        words = []
+        for _ in range(rng.randint(1, 25)):
+            word = rng.choice(VOCABULARY)
+            words.append(rng.choice(PUNCTUATION) + word + rng.choice(PUNCTUATION)
+                         if rng.random() < 0.3 else word + rng.choice(PUNCTUATION))
+        texts.append(' '.join(words))
+    return texts
+
+@pytest.fixture(scope='module')
+def analyzers():
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+    try:
+        reference = SentimentIntensityAnalyzer()
+    except LookupError:
+        pytest.skip('vader_lexicon is not installed (nltk.download("vader_lexicon"))')
+    return reference, FastSentimentIntensityAnalyzer()
+
+def test_scores_match_vader_on_fixed_texts(analyzers):
+    reference, fast = analyzers
+
+    for text in TEXTS:
+        assert fast.polarity_scores(text) == reference.polarity_scores(text), text
+
+def test_scores_match_vader_on_generated_texts(analyzers):
+    reference, fast = analyzers
+
+    for text in generated_texts():
+        assert fast.polarity_scores(text) == reference.polarity_scores(text), text
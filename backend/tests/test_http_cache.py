@@ -0,0 +1,151 @@
+"""
+HTTP response cache tests against a local stub server
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import threading
+import time
+
+import pytest
+import requests
+
+from app.utils.http_cache import HTTPCache
+from app.utils.web_scraper import WebScraper
+
+BODY = b'<html><body><p>Stub article body</p></body></html>'
+ETAG = '"v1"'
+
+class StubHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        type(self).requests_seen.append(dict(self.headers))
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.send_header('ETag', ETAG)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.send_header('ETag', ETAG)
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub_url():
+    StubHandler.requests_seen = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/article"
+    server.shutdown()
+    server.server_close()
+
+def make_scraper(tmp_path, **cache_options):
+    cache = HTTPCache(directory=str(tmp_path / 'cache'), **cache_options)
+    return WebScraper(cache=cache, session=requests.Session())
+
+def test_fresh_entry_is_served_without_a_request(tmp_path, stub_url):
+    scraper = make_scraper(tmp_path, ttl=900)
+
+    first = scraper._get(stub_url)
+    second = scraper._get(stub_url)
+
+    assert first.content == BODY
+    assert second.content == BODY
+    assert len(StubHandler.requests_seen) == 1
+    stats = scraper.get_cache_stats()
+    assert (stats['misses'], stats['hits']) == (1, 1)
+
+def test_stale_entry_is_revalidated_with_304(tmp_path, stub_url):
+    scraper = make_scraper(tmp_path, ttl=0)
+
+    scraper._get(stub_url)
+    revalidated = scraper._get(stub_url)
+
+    assert revalidated.content == BODY
+    assert len(StubHandler.requests_seen) == 2
+    assert StubHandler.requests_seen[1].get('If-None-Match') == ETAG
+    assert scraper.get_cache_stats()['revalidated'] == 1
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = HTTPCache(directory=str(tmp_path / 'cache'), max_bytes=1000)
+
+    for i in range(5):
+        cache.store(f"http://stub/{i}", bytes([i]) * 300)
+        # Distinct access times, so the LRU order is well defined
+        time.sleep(0.02)
+
+    assert cache.get_stats()['bytes'] <= 1000
+    assert cache.get_stats()['evictions'] >= 2
+    assert cache.lookup('http://stub/0') is None
+    assert cache.lookup('http://stub/4').content == bytes([4]) * 300
+
+    # The evicted entry's metadata is dropped when it is looked up
+    assert len(list((tmp_path / 'cache' / 'meta').iterdir())) < 5
+
+def evict_after_lookup(cache):
+    """Remove an entry's blob right after it is looked up, as another process evicting it would"""
+    lookup = cache.lookup
+
+    def racing_lookup(url):
+        entry = lookup(url)
+        if entry is not None:
+            os.remove(cache._blob_path(entry.digest))
+        return entry
+    cache.lookup = racing_lookup
+
+def test_blob_evicted_after_a_fresh_lookup_is_a_miss(tmp_path, stub_url):
+    scraper = make_scraper(tmp_path, ttl=900)
+    scraper._get(stub_url)
+    evict_after_lookup(scraper.cache)
+
+    assert scraper._get(stub_url).content == BODY
+    assert len(StubHandler.requests_seen) == 2
+    assert 'If-None-Match' not in StubHandler.requests_seen[1]
+    assert scraper.get_cache_stats()['misses'] == 2
+
+def test_blob_evicted_during_revalidation_is_downloaded_again(tmp_path, stub_url):
+    scraper = make_scraper(tmp_path, ttl=0)
+    scraper._get(stub_url)
+    evict_after_lookup(scraper.cache)
+
+    assert scraper._get(stub_url).content == BODY
+    assert [seen.get('If-None-Match') for seen in StubHandler.requests_seen] == [None, ETAG, None]
+
+def test_partial_writes_stay_out_of_the_blob_directory(tmp_path, monkeypatch):
+    import tempfile
+
+    cache = HTTPCache(directory=str(tmp_path / 'cache'))
+    directories = []
+    mkstemp = tempfile.mkstemp
+
+    def recording_mkstemp(*args, **kwargs):
+        directories.append(kwargs.get('dir'))
+        return mkstemp(*args, **kwargs)
+    monkeypatch.setattr(tempfile, 'mkstemp', recording_mkstemp)
+
+    cache.store('http://stub/a', b'x' * 100)
+
+    assert directories and set(directories) == {str(tmp_path / 'cache' / 'tmp')}
+    assert list((tmp_path / 'cache' / 'tmp').iterdir()) == []
+
+def test_budget_covers_blobs_other_processes_stored(tmp_path):
+    first = HTTPCache(directory=str(tmp_path / 'cache'), max_bytes=1000)
+    second = HTTPCache(directory=str(tmp_path / 'cache'), max_bytes=1000)
+    first.SIZE_SCAN_INTERVAL = second.SIZE_SCAN_INTERVAL = 0
+
+    for i in range(3):
+        first.store(f"http://stub/a{i}", bytes([i]) * 300)
+        second.store(f"http://stub/b{i}", bytes([10 + i]) * 300)
+        time.sleep(0.02)
+
+    stored = sum(path.stat().st_size for path in (tmp_path / 'cache' / 'blobs').iterdir())
+    assert stored <= 1000
+    assert first.get_stats()['evictions'] + second.get_stats()['evictions'] >= 2
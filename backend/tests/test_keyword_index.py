@@ -0,0 +1,137 @@
+"""
+Keyword index: BM25 ranking, changes made during a rebuild, background rebuilds
+"""
+
+import math
+import threading
+import time
+
+import pytest
+
+from app.models import Article
+from app.services import keyword_index as index_module
+from app.services.keyword_index import KeywordIndex
+
+def save(url, keywords, status='verified'):
+    return Article(title=url, url=f"https://example.com/{url}", content=url, source='BBC',
+                   keywords=keywords, status=status).save()
+
+@pytest.fixture
+def corpus(mongo):
+    return {
+        'both': save('both', ['election', 'fraud']),
+        'election': save('election', ['Election', 'vote', 'count', 'poll']),
+        'fraud': save('fraud', ['fraud']),
+        'unrelated': save('unrelated', ['weather']),
+        'pending': save('pending', ['election', 'fraud'], status='pending'),
+    }
+
+def bm25(index, query, keywords, corpus_keywords):
+    """Reference BM25 score of one document"""
+    avg_length = sum(len(k) for k in corpus_keywords) / len(corpus_keywords)
+    score = 0.0
+    for term in set(query):
+        containing = sum(term in k for k in corpus_keywords)
+        if not containing:
+            continue
+        idf = math.log(1 + (len(corpus_keywords) - containing + 0.5) / (containing + 0.5))
+        tf = keywords.count(term)
+        norm = index.k1 * (1 - index.b + index.b * len(keywords) / avg_length)
+        score += idf * tf * (index.k1 + 1) / (tf + norm)
+    return score
+
+def test_ranks_verified_articles_by_bm25(corpus):
+    index = KeywordIndex(rebuild_interval=3600, sync_interval=0)
+
+    ranked = index.search(['ELECTION', 'fraud'])
+
+    ids = {str(article.id): name for name, article in corpus.items()}
+    assert [ids[article_id] for article_id, _ in ranked] == ['both', 'fraud', 'election']
+    corpus_keywords = [['election', 'fraud'], ['election', 'vote', 'count', 'poll'], ['fraud'], ['weather']]
+    for article_id, score in ranked:
+        keywords = [k.lower() for k in corpus[ids[article_id]].keywords]
+        assert score == pytest.approx(bm25(index, ['election', 'fraud'], keywords, corpus_keywords))
+
+def test_top_k_and_empty_queries(corpus):
+    index = KeywordIndex(rebuild_interval=3600, sync_interval=0)
+
+    assert len(index.search(['election', 'fraud'], top_k=1)) == 1
+    assert index.search([]) == [] and index.search(['  ']) == [] and index.search(['absent']) == []
+
+def test_changes_during_a_rebuild_are_replayed(corpus, monkeypatch):
+    index = KeywordIndex(rebuild_interval=3600, sync_interval=0)
+    index.rebuild()
+    added = save('added', ['fraud'])
+    objects = Article.objects
+
+    class ScanWithConcurrentWrites:
+        """Article.objects whose scan sees writes land after its first document"""
+
+        def __call__(self, **query):
+            self.queryset = objects(**query)
+            return self
+
+        def only(self, *fields):
+            self.queryset = self.queryset.only(*fields)
+            return self
+
+        def no_cache(self):
+            for i, article in enumerate(self.queryset.no_cache()):
+                yield article
+                if i == 0:
+                    index.add_article(added)
+                    index.remove_article(corpus['both'].id)
+                    corpus['fraud'].keywords = ['weather']
+                    index.add_article(corpus['fraud'])
+
+    monkeypatch.setattr(index_module.Article, 'objects', ScanWithConcurrentWrites())
+    index.rebuild()
+
+    assert [article_id for article_id, _ in index.search(['fraud'])] == [str(added.id)]
+    assert {article_id for article_id, _ in index.search(['weather'])} == {
+        str(corpus['fraud'].id), str(corpus['unrelated'].id)
+    }
+    assert index._pending is None
+
+def test_stale_index_is_rebuilt_in_the_background(corpus, monkeypatch):
+    index = KeywordIndex(rebuild_interval=3600, sync_interval=0)
+    index.search(['fraud'])
+    save('late', ['fraud'])
+    index._built_at -= 3600
+
+    scanning = threading.Event()
+    release = threading.Event()
+    rebuild = index._rebuild
+
+    def slow_rebuild():
+        scanning.set()
+        release.wait(5)
+        rebuild()
+    monkeypatch.setattr(index, '_rebuild', slow_rebuild)
+
+    started = time.monotonic()
+    before = index.search(['fraud'])
+    assert scanning.wait(5)
+    # The search that found the index stale did not wait for the rebuild
+    assert time.monotonic() - started < 1
+    assert len(before) == 2 and len(index.search(['fraud'])) == 2
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while len(index.search(['fraud'])) != 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(index.search(['fraud'])) == 3
+
+def test_failed_background_rebuild_is_retried_later(corpus, monkeypatch):
+    index = KeywordIndex(rebuild_interval=3600, sync_interval=0)
+    index.search(['fraud'])
+    index._built_at -= 3600
+    monkeypatch.setattr(index, '_rebuild', lambda: (_ for _ in ()).throw(RuntimeError('db down')))
+
+    assert len(index.search(['fraud'])) == 2
+    deadline = time.monotonic() + 5
+    while index._build_lock.locked() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert not index._build_lock.locked()
+    assert time.monotonic() - index._built_at < index.rebuild_interval
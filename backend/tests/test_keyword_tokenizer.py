@@ -0,0 +1,86 @@
+"""
+KeywordTokenizer candidates, checked against filtered word_tokenize() output
+"""
+
+import random
+import threading
+
+import pytest
+
+from app.utils.nlp_processor import KeywordTokenizer
+
+TEXTS = [
+    "The minister said the budget, announced on Monday, would \"change everything.\"",
+    "Officials (including the mayor) denied it. Reports say otherwise... Really?",
+    "He said: 'it's over.' She replied \u201cnot yet.\u201d Then silence.",
+    "U.S. markets fell 3.5% on Tuesday; analysts blamed the Fed's rate decision.",
+    "Breaking: storm hits coast! Thousands evacuated [updated]. More to follow)",
+    "Mr. Smith's co-worker didn't attend the meeting at 10 a.m. yesterday.",
+    "Prices rose -- sharply -- after the announcement (see chart).",
+    "the end.",
+    "",
+]
+
+WORDS = ['minister', 'said', 'budget', 'markets', "didn't", 'u.s.', 'co-worker', 'reports', 'the',
+         'analysts', 'storm', 'coast', 'mr.', 'evacuated', 'officials', "smith's", '3.5%', 'end']
+GLUE = ['', '', '', '.', ',', '!', '?', '"', "'", ')', '(', ']', '...', ':', ';', '\u201d', '\u2019']
+
+def generated_texts(count=500, seed=11):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        words = [rng.choice(GLUE[:3] + ['(', '"']) + rng.choice(WORDS) + rng.choice(GLUE)
+                 for _ in range(rng.randint(1, 30))]
+        texts.append(' '.join(words))
+    return texts
+
+@pytest.fixture(scope='module')
+def tokenizers():
+    import nltk
+    from nltk.corpus import stopwords
+    from nltk.tokenize import NLTKWordTokenizer, sent_tokenize, word_tokenize
+
+    try:
+        nltk.data.find('tokenizers/punkt')
+        stop_words = set(stopwords.words('english'))
+        word_tokenize('warm up')
+    except LookupError:
+        pytest.skip('NLTK punkt/stopwords data is not installed')
+
+    def reference(text):
+        return [word for word in word_tokenize(text)
+                if word.isalpha() and word not in stop_words and len(word) > 3]
+    return KeywordTokenizer(sent_tokenize, NLTKWordTokenizer().tokenize, stop_words, cache_size=64), reference
+
+def test_candidates_match_word_tokenize(tokenizers):
+    tokenizer, reference = tokenizers
+
+    for text in TEXTS + generated_texts():
+        text = text.lower()
+        assert tokenizer.candidates(text) == reference(text), text
+
+def test_caches_stay_bounded(tokenizers):
+    tokenizer, _ = tokenizers
+
+    tokenizer.candidates(' '.join(f"word{i}x" for i in range(1000)) + '.')
+
+    info = tokenizer.cache_info()
+    assert info['inner']['currsize'] <= 64 and info['final']['currsize'] <= 64
+
+def test_threads_share_the_caches(tokenizers):
+    tokenizer, reference = tokenizers
+    texts = [text.lower() for text in generated_texts(200, seed=3)]
+    expected = [reference(text) for text in texts]
+    mismatches = []
+
+    def run():
+        for text, tokens in zip(texts, expected):
+            if tokenizer.candidates(text) != tokens:
+                mismatches.append(text)
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert mismatches == []
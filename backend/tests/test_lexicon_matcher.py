@@ -0,0 +1,79 @@
+"""
+One-pass lexicon matching, checked against a per-phrase scan
+"""
+
+import re
+
+from app.utils.credibility_analyzer import CredibilityAnalyzer
+from app.utils.lexicon_matcher import DEFAULT_LEXICONS, LexiconMatcher
+
+TEXTS = [
+    "SHOCKING: you won't believe what happens next, according to sources say nobody.",
+    "The minister said in a statement that the figures were unverified.",
+    "Doctors hate this one trick!  It goes viral, and it is believed to be a bombshell.",
+    "According   to court documents, the claim could be true; some say it might be.",
+    "You won’t believe the jaw-dropping exposé. Here’s why it matters.",
+    "A quiet report with nothing to flag, published in a journal.",
+    "Reportedly, the celebrity scandal was rumoured, then confirmed by officials.",
+    "",
+]
+
+def per_phrase_terms(text):
+    """The old scan: one search per phrase over the normalized text, on word boundaries"""
+    normalized = LexiconMatcher.normalize(text)
+    found = {}
+    for name, terms in DEFAULT_LEXICONS.items():
+        for term in terms:
+            term = LexiconMatcher.normalize(term)
+            if re.search(r'(?<!\w)' + re.escape(term) + r'(?!\w)', normalized):
+                found.setdefault(name, set()).add(term)
+    return found
+
+def test_matches_every_phrase_the_per_phrase_scan_finds():
+    matcher = LexiconMatcher(path='')
+
+    for text in TEXTS:
+        scanned = {name: matcher.distinct_terms(matches) for name, matches in matcher.scan(text).items() if matches}
+        assert scanned == per_phrase_terms(text), text
+
+def test_same_flags_as_substring_scan_for_whole_words():
+    matcher = LexiconMatcher(path='')
+
+    for text in TEXTS:
+        terms = {match['term'] for match in matcher.find(text)}
+        # The old checks, on whitespace-collapsed text (runs of spaces now match a space)
+        lowered = ' '.join(text.lower().replace('’', "'").split())
+        for term in ('shocking', 'amazing', 'unbelievable', 'viral', 'according to', 'sources say'):
+            assert (term in terms) == (term in lowered), (term, text)
+
+def test_offsets_point_at_the_matched_text():
+    text = "It GOES   viral: ‘they don’t want you to know’"
+    matches = LexiconMatcher(path='').find(text)
+
+    assert [(m['term'], text[m['start']:m['end']]) for m in matches] == [
+        ('goes viral', 'GOES   viral'),
+        ('viral', 'viral'),
+        ("they don't want you to know", 'they don’t want you to know'),
+    ]
+
+def test_unicode_case_folds_resolve_to_their_terms():
+    matcher = LexiconMatcher(path='')
+
+    assert [m['term'] for m in matcher.find('ſhocking news')] == ['shocking']
+    assert [m['term'] for m in matcher.find('SHOCKİNG')] == ['shocking']
+    assert [m['term'] for m in matcher.find('ıt ıs saıd')] == ['it is said']
+
+def test_folded_text_still_yields_indicators():
+    analysis = CredibilityAnalyzer().detect_misinformation_indicators('ſhocking news')
+
+    assert 'error' not in analysis
+    assert analysis['indicators']['sensational_language'] is True
+
+def test_lexicon_file_replaces_a_builtin_lexicon(tmp_path):
+    path = tmp_path / 'lexicons.json'
+    path.write_text('{"sensational": ["stunning"], "custom": ["red flag"]}')
+    matcher = LexiconMatcher(path=str(path))
+
+    scanned = matcher.scan('A stunning, shocking red flag.')
+    assert [m['term'] for m in scanned['sensational']] == ['stunning']
+    assert [m['term'] for m in scanned['custom']] == ['red flag']
@@ -0,0 +1,85 @@
+"""
+Corpus rescoring: stored scores, and resuming from the checkpoint
+"""
+
+import json
+
+import pytest
+
+from app.models import Article, TrustedSource
+from app.services import rescore_job as rescore_module
+from app.services.rescore_job import RescoreJob
+from app.services.source_registry import SourceRegistry
+from app.utils.credibility_analyzer import CredibilityAnalyzer
+
+@pytest.fixture
+def articles(mongo, monkeypatch):
+    TrustedSource(name='BBC', url='https://www.bbc.co.uk', domain='bbc.co.uk', trustworthiness_score=0.9).save()
+    TrustedSource(name='Tabloid', url='https://tabloid.example', domain='tabloid.example',
+                  trustworthiness_score=0.2).save()
+    monkeypatch.setattr(rescore_module, 'source_registry', SourceRegistry(ttl=3600))
+    return [
+        Article(title=f"story {i}", url=f"https://example.com/{i}", content='text',
+                source=['BBC', 'Tabloid', 'Unknown'][i % 3],
+                reporting_sources=['BBC', 'Tabloid'][:i % 3], verified_sources=i % 4,
+                is_original=i % 2 == 0).save()
+        for i in range(10)
+    ]
+
+def expected_score(article):
+    sources = list(dict.fromkeys([article.source] + article.reporting_sources))
+    trust = {'BBC': 0.9, 'Tabloid': 0.2, 'Unknown': 0.5}
+    num_sources = max(article.verified_sources, len(sources))
+    return CredibilityAnalyzer().calculate_score(
+        num_sources=num_sources,
+        source_reliability={'mean': sum(trust[s] for s in sources) / len(sources)},
+        spread_pattern=num_sources > 1,
+        original_reporting=article.is_original
+    )
+
+def stored_scores():
+    return {article.url: article.credibility_score for article in Article.objects}
+
+def test_rescores_every_article(articles, tmp_path):
+    stats = RescoreJob(batch_size=3, checkpoint_path=str(tmp_path / 'checkpoint.json')).run()
+
+    assert stats['scanned'] == 10 and stats['updated'] == 10
+    assert stored_scores() == {article.url: expected_score(article) for article in articles}
+    assert json.loads((tmp_path / 'checkpoint.json').read_text())['done']
+
+    # Nothing changed, so a second run writes nothing
+    assert RescoreJob(batch_size=3, checkpoint_path=str(tmp_path / 'checkpoint.json')).run()['updated'] == 0
+
+def test_interrupted_run_resumes_after_the_checkpoint(articles, tmp_path, monkeypatch):
+    checkpoint_path = str(tmp_path / 'checkpoint.json')
+    job = RescoreJob(batch_size=3, checkpoint_path=checkpoint_path)
+    rescore_batch = job._rescore_batch
+    batches = []
+
+    def crash_on_third_batch(collection, documents):
+        if len(batches) == 2:
+            raise RuntimeError('killed')
+        batches.append([document['_id'] for document in documents])
+        return rescore_batch(collection, documents)
+    monkeypatch.setattr(job, '_rescore_batch', crash_on_third_batch)
+
+    with pytest.raises(RuntimeError):
+        job.run()
+    checkpoint = json.loads(open(checkpoint_path).read())
+    assert checkpoint['last_id'] == str(batches[-1][-1]) and checkpoint['scanned'] == 6
+
+    stats = RescoreJob(batch_size=3, checkpoint_path=checkpoint_path).run()
+
+    assert stats['scanned'] == 4 and stats['total_scanned'] == 10
+    assert stored_scores() == {article.url: expected_score(article) for article in articles}
+
+def test_checkpoint_from_other_weights_is_discarded(articles, tmp_path):
+    checkpoint_path = tmp_path / 'checkpoint.json'
+    checkpoint_path.write_text(json.dumps({
+        'last_id': str(articles[-1].id), 'scanned': 10, 'updated': 10,
+        'weights': {'source_reliability': 1.0}, 'started_at': '2024-01-01T00:00:00'
+    }))
+
+    stats = RescoreJob(batch_size=3, checkpoint_path=str(checkpoint_path)).run()
+
+    assert stats['scanned'] == 10 and stats['total_scanned'] == 10
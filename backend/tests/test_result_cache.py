@@ -0,0 +1,115 @@
+"""
+Verification result cache: coalescing, invalidation, eviction
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.services.result_cache import VerificationResultCache
+
+def test_concurrent_misses_compute_once():
+    cache = VerificationResultCache(max_entries=10, ttl=60)
+    computing = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        computing.set()
+        release.wait(5)
+        return {'verdict': 'true'}
+
+    results = []
+    owner = threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+    owner.start()
+    assert computing.wait(5)
+    waiters = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+        for _ in range(4)
+    ]
+    for thread in waiters:
+        thread.start()
+    while cache.get_stats()['coalesced'] < 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in [owner] + waiters:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(cached for _, cached in results) == [False, True, True, True, True]
+    assert all(result == {'verdict': 'true'} for result, _ in results)
+    assert cache.get_stats()['inflight'] == 0
+
+def test_waiters_get_the_owners_exception():
+    cache = VerificationResultCache(max_entries=10, ttl=60)
+    computing = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        computing.set()
+        release.wait(5)
+        raise RuntimeError('search backend down')
+
+    errors = []
+
+    def call():
+        try:
+            cache.get_or_compute('k', fail)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    owner = threading.Thread(target=call)
+    owner.start()
+    assert computing.wait(5)
+    waiter = threading.Thread(target=call)
+    waiter.start()
+    while cache.get_stats()['coalesced'] < 1:
+        time.sleep(0.001)
+    release.set()
+    owner.join(5)
+    waiter.join(5)
+
+    assert errors == ['search backend down'] * 2
+    assert cache.get_stats()['entries'] == 0
+
+def test_result_computed_across_an_invalidation_is_not_stored():
+    cache = VerificationResultCache(max_entries=10, ttl=60)
+
+    def compute():
+        # A write lands while the result is being computed
+        cache.invalidate(keywords=['unrelated'])
+        return {'verdict': 'stale'}
+
+    assert cache.get_or_compute('k', compute) == ({'verdict': 'stale'}, False)
+    assert cache.get_or_compute('k', lambda: {'verdict': 'fresh'}) == ({'verdict': 'fresh'}, False)
+    assert cache.get_or_compute('k', lambda: pytest.fail('not cached')) == ({'verdict': 'fresh'}, True)
+
+def test_invalidation_drops_entries_by_keyword_and_source():
+    cache = VerificationResultCache(max_entries=10, ttl=60)
+    tags = lambda result: VerificationResultCache.tags_for(result['keywords'], result['sources'])
+    cache.get_or_compute('a', lambda: {'keywords': ['Election'], 'sources': ['BBC']}, tags)
+    cache.get_or_compute('b', lambda: {'keywords': ['weather'], 'sources': ['Reuters']}, tags)
+    cache.get_or_compute('c', lambda: {'keywords': ['vote'], 'sources': ['AP']}, tags)
+
+    cache.invalidate(keywords=[' election '])
+    cache.invalidate(sources=['reuters'])
+
+    assert cache.get_stats()['entries'] == 1
+    assert cache.get_or_compute('c', lambda: pytest.fail('not cached'))[1]
+    assert not cache.get_or_compute('a', lambda: {'keywords': [], 'sources': []})[1]
+    assert cache._tags.keys() == {'kw:vote', 'src:ap'}
+
+def test_errors_are_not_cached_and_old_entries_are_evicted():
+    cache = VerificationResultCache(max_entries=2, ttl=60)
+    cache.get_or_compute('error', lambda: {'error': 'timeout'})
+    for key in ['a', 'b', 'c']:
+        cache.get_or_compute(key, lambda: {'verdict': key})
+
+    assert list(cache._entries) == ['b', 'c']
+
+def test_keys_normalize_queries():
+    make_key = VerificationResultCache.make_key
+    assert make_key('  Is the  Election rigged?', 'quick') == make_key('is the election RIGGED', 'quick')
+    assert make_key('https://example.com/a/', 'deep') == 'deep:https://example.com/a'
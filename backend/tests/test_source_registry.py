@@ -0,0 +1,50 @@
+"""
+Trusted source resolution through the in-process registry
+"""
+
+import pytest
+
+from app.models import TrustedSource
+from app.services.source_registry import DEFAULT_TRUST_SCORE, SourceRegistry, registrable_domain
+
+@pytest.fixture
+def registry(mongo):
+    TrustedSource(name='BBC', url='https://www.bbc.co.uk', domain='bbc.co.uk', trustworthiness_score=0.9).save()
+    TrustedSource(name='Gone Daily', url='https://gone.example', domain='gone.example',
+                  trustworthiness_score=0.2, is_active=False).save()
+    return SourceRegistry(ttl=3600)
+
+def test_names_and_urls_resolve(registry):
+    assert registry.lookup('bbc').name == 'BBC'
+    assert registry.lookup('https://news.bbc.co.uk/world/1').name == 'BBC'
+    assert registry.lookup('Unknown') is None
+
+def test_deactivated_source_keeps_its_score_by_name(registry):
+    # As before the registry: scores looked sources up by name, active or not
+    assert registry.get_scores(['Gone Daily', 'BBC', 'Unknown']) == {
+        'Gone Daily': 0.2, 'BBC': 0.9, 'Unknown': DEFAULT_TRUST_SCORE
+    }
+
+def test_deactivated_source_is_not_matched_by_default_or_by_domain(registry):
+    assert registry.lookup('Gone Daily') is None
+    assert registry.lookup('Gone Daily', include_inactive=True).trustworthiness_score == 0.2
+    assert registry.lookup('https://gone.example/story', include_inactive=True) is None
+    assert [source.name for source in registry.active_sources()] == ['BBC']
+
+def test_saving_a_source_reloads_the_registry(registry):
+    assert registry.lookup('Reuters') is None
+
+    TrustedSource(name='Reuters', url='https://www.reuters.com', domain='reuters.com').save()
+    registry.invalidate()
+
+    assert registry.lookup('reuters').domain == 'reuters.com'
+
+@pytest.mark.parametrize('value, expected', [
+    ('https://www.bbc.co.uk/news', 'bbc.co.uk'),
+    ('edition.cnn.com', 'cnn.com'),
+    ('reuters.com:443/path', 'reuters.com'),
+    ('Not a host', ''),
+    ('', ''),
+])
+def test_registrable_domain(value, expected):
+    assert registrable_domain(value) == expected
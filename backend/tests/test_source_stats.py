@@ -0,0 +1,81 @@
+"""
+Trusted source article counters: incremental updates, reconciliation, deletes
+"""
+
+import pytest
+
+from app.models import Article, TrustedSource
+from app.services import source_stats as stats_module
+from app.services.source_registry import SourceRegistry
+
+@pytest.fixture
+def stats(mongo, monkeypatch):
+    TrustedSource(name='BBC', url='https://www.bbc.co.uk', domain='bbc.co.uk').save()
+    TrustedSource(name='Reuters', url='https://www.reuters.com', domain='reuters.com').save()
+    # The shared instance, which the post_delete signal reports to
+    monkeypatch.setattr(stats_module.source_stats, 'source_registry', SourceRegistry(ttl=3600))
+    return stats_module.source_stats
+
+def counters(name):
+    source = TrustedSource.objects(name=name).first()
+    return source.article_count, source.verified_count, source.verification_rate
+
+def save(url, source, status='pending'):
+    return Article(title=url, url=f"https://example.com/{url}", content='text', source=source, status=status).save()
+
+def test_deltas_of_creates_updates_and_deletes():
+    deltas = stats_module.SourceStats.deltas
+    assert deltas(after=('BBC', 'verified')) == [('BBC', 1, 1)]
+    assert deltas(before=('BBC', 'pending'), after=('BBC', 'verified')) == [('BBC', -1, 0), ('BBC', 1, 1)]
+    assert deltas(before=('BBC', 'verified')) == [('BBC', -1, -1)]
+
+def test_a_batch_is_summed_per_source_and_recomputes_the_rate(stats):
+    updated = stats.apply(
+        stats.deltas(after=('BBC', 'verified')) +
+        stats.deltas(after=('https://www.bbc.co.uk/news/1', 'pending')) +
+        stats.deltas(before=('BBC', 'pending'), after=('BBC', 'verified')) +
+        stats.deltas(after=('Reuters', 'pending')) +
+        stats.deltas(before=('Reuters', 'pending'), after=('Reuters', 'pending')) +
+        stats.deltas(after=('Unknown Blog', 'verified'))
+    )
+
+    # Reuters' second write nets to zero, and unknown sources are not counted
+    assert updated == 2
+    assert counters('BBC') == (2, 2, 1.0)
+    assert counters('Reuters') == (1, 0, 0.0)
+
+    stats.article_written(before=('BBC', 'verified'), after=('BBC', 'pending'))
+    assert counters('BBC') == (2, 1, 0.5)
+
+def test_deleting_an_article_decrements_its_source(stats):
+    article = save('a', 'BBC', status='verified')
+    save('b', 'BBC')
+    stats.apply(stats.deltas(after=('BBC', 'verified')) + stats.deltas(after=('BBC', 'pending')))
+
+    article.delete()
+
+    assert counters('BBC') == (1, 0, 0.0)
+
+def test_reconcile_fixes_drifted_counters(stats):
+    save('a', 'BBC', status='verified')
+    save('b', 'https://www.bbc.co.uk/news/2')
+    save('c', 'BBC', status='verified')
+    save('d', 'Unknown Blog')
+    # Drift: one write missed its update, and Reuters counts articles it no longer has
+    stats.apply(stats.deltas(after=('BBC', 'verified')) + stats.deltas(after=('BBC', 'pending')))
+    TrustedSource.objects(name='Reuters').update(set__article_count=4, set__verified_count=1,
+                                                set__verification_rate=0.25)
+
+    result = stats.reconcile()
+
+    assert (result['checked'], result['corrected']) == (2, 2)
+    assert counters('BBC') == (3, 2, pytest.approx(2 / 3))
+    assert counters('Reuters') == (0, 0, 0.0)
+    assert stats.reconcile()['corrected'] == 0
+
+def test_reconcile_leaves_inactive_sources_alone(stats):
+    TrustedSource(name='Gone Daily', url='https://gone.example', domain='gone.example',
+                  article_count=7, is_active=False).save()
+
+    assert stats.reconcile()['checked'] == 2
+    assert counters('Gone Daily') == (7, 0, 0.0)
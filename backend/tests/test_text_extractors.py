@@ -0,0 +1,15 @@
+"""
+Boilerplate handling of the streaming text extractor
+"""
+
+from app.utils.text_extractors import StreamingExtractor
+
+def test_end_tag_closes_boilerplate_opened_inside_it():
+    html = b'<p>foo</p><nav>menu<footer>x</nav><p>after</p>bar<p>baz</p></footer>qux'
+
+    assert StreamingExtractor().extract(html) == 'fooafterbarbazqux'
+
+def test_nested_boilerplate_of_the_same_name():
+    html = b'<nav>a<nav>b</nav>c</nav><p>text</p>'
+
+    assert StreamingExtractor().extract(html) == 'text'
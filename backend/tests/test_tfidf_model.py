@@ -0,0 +1,51 @@
+"""
+Loading the persisted TF-IDF model only from files this process owns
+"""
+
+import os
+
+import pytest
+
+from app.utils.tfidf_model import TfidfModel
+
+TEXTS = ['the minister announced a budget', 'markets fell after the budget', 'a storm hit the coast']
+
+def fitted(path):
+    model = TfidfModel(path=str(path))
+    assert model.fit(TEXTS)
+    return model
+
+def test_reloads_a_model_written_by_this_user(tmp_path):
+    version = fitted(tmp_path / 'model.joblib').version
+
+    assert oct(os.stat(tmp_path / 'model.joblib').st_mode & 0o777) == oct(0o600)
+    assert TfidfModel(path=str(tmp_path / 'model.joblib')).version == version
+
+def test_refuses_a_file_others_can_write(tmp_path):
+    path = tmp_path / 'model.joblib'
+    fitted(path)
+    os.chmod(path, 0o666)
+
+    assert TfidfModel(path=str(path)).version is None
+
+def test_refuses_a_file_owned_by_another_user(tmp_path):
+    if os.geteuid() != 0:
+        pytest.skip('needs root to hand the file to another user')
+    path = tmp_path / 'model.joblib'
+    fitted(path)
+    os.chown(path, 65534, 65534)
+
+    assert TfidfModel(path=str(path)).version is None
+
+def test_refuses_a_symlink(tmp_path):
+    fitted(tmp_path / 'real.joblib')
+    os.symlink(tmp_path / 'real.joblib', tmp_path / 'model.joblib')
+
+    assert TfidfModel(path=str(tmp_path / 'model.joblib')).version is None
+
+def test_default_path_is_not_in_the_temp_directory(monkeypatch):
+    import tempfile
+
+    monkeypatch.delenv('TFIDF_MODEL_PATH', raising=False)
+
+    assert not TfidfModel().path.startswith(tempfile.gettempdir())
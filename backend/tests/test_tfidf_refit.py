@@ -0,0 +1,75 @@
+"""
+The TF-IDF refit job: skipped on an unchanged corpus, staged vectors promoted after publishing
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import Article
+from app.services.tfidf_refit import STAGING_COLLECTION, TfidfRefitJob
+from app.utils.tfidf_model import TfidfModel
+
+TEXTS = [
+    'the minister announced a budget for schools',
+    'markets fell after the budget was announced',
+    'a storm hit the coast overnight',
+    'the election result was contested in court',
+]
+
+@pytest.fixture
+def corpus(mongo):
+    now = datetime.utcnow()
+    for i, text in enumerate(TEXTS):
+        Article(title=f"Article {i}", url=f"https://example.com/{i}", content=text,
+                source='BBC', verified_date=now - timedelta(minutes=i)).save()
+    return mongo
+
+@pytest.fixture
+def job(corpus, tmp_path):
+    return TfidfRefitJob(model=TfidfModel(path=str(tmp_path / 'model.joblib')), refit_interval=3600, batch_size=3)
+
+def test_refit_promotes_a_vector_for_every_article(job, corpus):
+    stats = job.run()
+
+    assert stats['staged'] == stats['promoted'] == len(TEXTS) and stats['caught_up'] == 0
+    assert STAGING_COLLECTION not in corpus.list_collection_names()
+    for article in Article.objects:
+        assert article.tfidf_version == stats['version']
+        assert article.tfidf_vector
+
+def test_unchanged_corpus_skips_the_refit(job):
+    version = job.run()['version']
+
+    assert job.run() is None
+    assert job.model.version == version
+
+def test_new_article_triggers_a_refit(job):
+    version = job.run()['version']
+    Article(title='New', url='https://example.com/new', content='a new budget vote', source='BBC').save()
+
+    stats = job.run()
+    assert stats is not None and stats['version'] != version
+
+def test_articles_edited_after_staging_are_caught_up(job, monkeypatch):
+    stage = job._stage
+
+    def stage_then_edit(version, vectorizer):
+        staged = stage(version, vectorizer)
+        Article.objects(url='https://example.com/0').update(
+            set__content='a storm hit the budget', set__last_updated=datetime.utcnow() + timedelta(seconds=1)
+        )
+        return staged
+    monkeypatch.setattr(job, '_stage', stage_then_edit)
+
+    stats = job.run()
+    assert stats['promoted'] == len(TEXTS) - 1 and stats['caught_up'] == 1
+    edited = Article.objects.get(url='https://example.com/0')
+    assert edited.tfidf_version == stats['version']
+    assert edited.tfidf_vector == job.model.vectorize_for_storage('a storm hit the budget')[0]
+
+def test_run_if_due_waits_for_the_interval(job):
+    assert job.run_if_due() is not None
+    Article(title='New', url='https://example.com/new', content='a new budget vote', source='BBC').save()
+
+    assert job.run_if_due() is None
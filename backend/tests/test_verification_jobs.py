@@ -0,0 +1,125 @@
+"""
+Verification job queue: claiming, lease expiry and renewal, retries
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import VerificationJob
+from app.services.verification_jobs import VerificationJobQueue
+
+def queue(runner=None, **options):
+    options.setdefault('lease', 60)
+    options.setdefault('max_attempts', 2)
+    return VerificationJobQueue(runner=runner or (lambda query, depth, timings: {'query': query}), **options)
+
+def queued(*queries):
+    now = datetime.utcnow()
+    return [VerificationJob(query=query, created_at=now + timedelta(seconds=i)).save()
+            for i, query in enumerate(queries)]
+
+def test_claims_take_the_oldest_job_once(mongo):
+    jobs = queued('first', 'second')
+    jobs_queue = queue()
+
+    first = jobs_queue._claim('worker-a')
+    second = jobs_queue._claim('worker-b')
+
+    assert (first.id, first.worker, first.attempts) == (jobs[0].id, 'worker-a', 1)
+    assert (second.id, second.worker) == (jobs[1].id, 'worker-b')
+    assert jobs_queue._claim('worker-c') is None
+
+def test_expired_lease_is_claimed_again(mongo):
+    job, = queued('query')
+    jobs_queue = queue()
+    jobs_queue._claim('worker-a')
+    assert jobs_queue._claim('worker-b') is None
+
+    VerificationJob.objects(id=job.id).update(set__lease_expires=datetime.utcnow() - timedelta(seconds=1))
+    reclaimed = jobs_queue._claim('worker-b')
+
+    assert (reclaimed.worker, reclaimed.attempts) == ('worker-b', 2)
+
+def test_runs_and_records_the_result(mongo):
+    job, = queued('query')
+    jobs_queue = queue()
+
+    jobs_queue._run(jobs_queue._claim('worker-a'))
+
+    job.reload()
+    assert job.status == 'done' and job.result == {'query': 'query'} and job.lease_expires is None
+    assert jobs_queue.stats['completed'] == 1
+
+def test_failed_runner_fails_the_job(mongo):
+    job, = queued('query')
+
+    def runner(query, depth, timings):
+        raise RuntimeError('backend down')
+    jobs_queue = queue(runner)
+    jobs_queue._run(jobs_queue._claim('worker-a'))
+
+    job.reload()
+    assert (job.status, job.error) == ('failed', 'backend down')
+
+def test_job_abandoned_too_often_is_failed_without_running(mongo):
+    job, = queued('query')
+    ran = []
+    jobs_queue = queue(lambda *args: ran.append(args) or {})
+    for worker in ('worker-a', 'worker-b', 'worker-c'):
+        VerificationJob.objects(id=job.id).update(set__lease_expires=datetime.utcnow() - timedelta(seconds=1))
+        claimed = jobs_queue._claim(worker)
+
+    jobs_queue._run(claimed)
+
+    job.reload()
+    assert claimed.attempts == 3 and ran == []
+    assert job.status == 'failed' and 'abandoned' in job.error
+
+def test_lease_is_renewed_while_the_job_runs(mongo):
+    job, = queued('query')
+    leases = []
+
+    def runner(query, depth, timings):
+        VerificationJob.objects(id=job.id).update(set__lease_expires=datetime.utcnow())
+        jobs_queue.renew_leases()
+        leases.append(VerificationJob.objects.get(id=job.id).lease_expires)
+        return {}
+    jobs_queue = queue(runner)
+    jobs_queue._run(jobs_queue._claim('worker-a'))
+
+    assert leases[0] > datetime.utcnow() + timedelta(seconds=30)
+    assert jobs_queue._running == {}
+
+def test_worker_that_lost_its_lease_discards_its_result(mongo):
+    job, = queued('query')
+
+    def runner(query, depth, timings):
+        # The lease lapsed and another worker took the job over
+        VerificationJob.objects(id=job.id).update(set__lease_expires=datetime.utcnow() - timedelta(seconds=1))
+        assert jobs_queue._claim('worker-b') is not None
+        return {'stale': True}
+    jobs_queue = queue(runner)
+    jobs_queue._run(jobs_queue._claim('worker-a'))
+
+    job.reload()
+    assert (job.status, job.worker, job.result) == ('running', 'worker-b', {})
+    assert jobs_queue.stats['completed'] == 0
+
+def test_started_workers_pick_up_queued_jobs(mongo):
+    import time
+
+    job, = queued('query')
+    jobs_queue = queue(poll_interval=0.05, workers=1)
+    jobs_queue.ensure_started()
+    try:
+        deadline = time.monotonic() + 5
+        while VerificationJob.objects.get(id=job.id).status != 'done' and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert VerificationJob.objects.get(id=job.id).status == 'done'
+    finally:
+        jobs_queue.stop()
+        for thread in jobs_queue._threads:
+            thread.join(timeout=5)
+
+    assert not any(thread.is_alive() for thread in jobs_queue._threads)
@@ -0,0 +1,124 @@
+"""
+Download bounds of the web scraper against local stub servers
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import socket
+import threading
+import time
+
+import pytest
+
+from app.utils import web_scraper
+from app.utils.http_session import PooledSession
+from app.utils.web_scraper import WebScraper
+
+class TarpitHandler(BaseHTTPRequestHandler):
+    """Sends a 200 byte body one byte at a time, just under any read timeout"""
+
+    def do_GET(self):
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', '200')
+            self.end_headers()
+            for _ in range(200):
+                self.wfile.write(b'a')
+                self.wfile.flush()
+                time.sleep(0.1)
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """A small body on a connection that stays open for the next request"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', '5')
+        self.end_headers()
+        self.wfile.write(b'hello')
+
+    def log_message(self, *args):
+        pass
+
+def serve(handler):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+@pytest.fixture
+def tarpit_url():
+    server, url = serve(TarpitHandler)
+    yield url
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def keep_alive_url():
+    server, url = serve(KeepAliveHandler)
+    yield url
+    server.shutdown()
+    server.server_close()
+
+def test_slow_body_is_cut_off_at_the_download_timeout(tarpit_url):
+    scraper = WebScraper(cache=None, session=PooledSession())
+    scraper.timeout = 1
+
+    started = time.monotonic()
+    response = scraper._download(tarpit_url, scraper.headers)
+
+    assert time.monotonic() - started < 2
+    assert response.truncated
+    assert 0 < len(response.content) < 200
+
+def test_host_slot_is_held_while_the_body_streams(tarpit_url):
+    session = PooledSession(max_per_host=1)
+    scraper = WebScraper(cache=None, session=session)
+    scraper.timeout = 0.5
+
+    started = time.monotonic()
+    threads = [
+        threading.Thread(target=scraper._download, args=(tarpit_url, scraper.headers))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # One download at a time: each holds the slot for its full 0.5 s
+    assert time.monotonic() - started >= 1.4
+
+def test_private_socket_path_still_resolves(keep_alive_url):
+    # _iter_body bounds each read through this path; if urllib3 or
+    # http.client rename it, downloads silently lose the per-read bound
+    response = PooledSession().get(keep_alive_url, stream=True, timeout=(1, 1))
+    try:
+        assert isinstance(web_scraper._response_socket(response.raw), socket.socket)
+    finally:
+        response.close()
+
+def test_pooled_socket_gets_its_timeout_back(keep_alive_url, monkeypatch):
+    sockets = []
+    response_socket = web_scraper._response_socket
+
+    def recording(raw):
+        sock = response_socket(raw)
+        sockets.append((sock, sock.gettimeout()))
+        return sock
+    monkeypatch.setattr(web_scraper, '_response_socket', recording)
+    scraper = WebScraper(cache=None, session=PooledSession())
+    scraper.timeout = 0.05
+
+    assert scraper._download(keep_alive_url, scraper.headers).content == b'hello'
+    assert scraper._download(keep_alive_url, scraper.headers).content == b'hello'
+
+    # Both downloads reused one connection, and left its timeout as they found it
+    assert sockets[0][0] is sockets[1][0]
+    assert [sock.gettimeout() for sock, _ in sockets] == [timeout for _, timeout in sockets]
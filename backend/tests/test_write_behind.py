@@ -0,0 +1,118 @@
+"""
+Partial failures of the write-behind writer
+"""
+
+import os
+import subprocess
+
+from bson import ObjectId, json_util
+from pymongo.errors import AutoReconnect, BulkWriteError
+from app.services import write_behind
+from app.services.write_behind import WriteBehindWriter
+
+class FakeCollection:
+    """Keeps documents by _id and fails the next insert_many as told"""
+
+    def __init__(self):
+        self.documents = {}
+        self.fail_after = None
+
+    def insert_many(self, records, ordered=True):
+        errors = []
+        for index, record in enumerate(records):
+            record.setdefault('_id', ObjectId())
+            if self.fail_after is not None and index >= self.fail_after:
+                self.fail_after = None
+                raise AutoReconnect('connection reset')
+            if record['_id'] in self.documents:
+                errors.append({'index': index, 'code': 11000, 'errmsg': 'E11000 duplicate key'})
+            elif record.get('bad'):
+                errors.append({'index': index, 'code': 121, 'errmsg': 'Document failed validation'})
+            else:
+                self.documents[record['_id']] = record
+        if errors:
+            raise BulkWriteError({'writeErrors': errors, 'nInserted': len(records) - len(errors)})
+
+class FakeDocument:
+    collection = FakeCollection()
+
+    @classmethod
+    def _get_collection(cls):
+        return cls.collection
+
+def make_writer(records):
+    FakeDocument.collection = FakeCollection()
+    writer = WriteBehindWriter(FakeDocument, batch_size=10, spill_path='')
+    writer._queue.extend(records)
+    return writer
+
+def test_records_written_before_a_failure_are_not_retried_forever():
+    writer = make_writer([{'n': n} for n in range(5)])
+
+    FakeDocument.collection.fail_after = 3
+    assert writer.flush() == 0
+    assert len(writer._queue) == 5
+
+    # The retry hits duplicate keys for the three stored records
+    assert writer.flush() == 5
+    assert writer.get_stats()['pending'] == 0
+    assert sorted(record['n'] for record in FakeDocument.collection.documents.values()) == [0, 1, 2, 3, 4]
+
+def test_rejected_record_is_dropped_without_blocking_the_queue():
+    writer = make_writer([{'n': 0}, {'n': 1, 'bad': True}, {'n': 2}])
+
+    assert writer.flush() == 2
+    stats = writer.get_stats()
+    assert (stats['pending'], stats['dropped'], stats['flushed']) == (0, 1, 2)
+
+def spilling_writer(tmp_path, **options):
+    FakeDocument.collection = FakeCollection()
+    return WriteBehindWriter(FakeDocument, batch_size=10, spill_path=str(tmp_path / 'spill.ndjson'), **options)
+
+def write_lines(path, numbers):
+    path.write_text(''.join(json_util.dumps({'n': n}) + '\n' for n in numbers))
+
+def stored_numbers():
+    return sorted(record['n'] for record in FakeDocument.collection.documents.values())
+
+def test_spill_file_is_written_outside_the_queue_lock(tmp_path, monkeypatch):
+    writer = spilling_writer(tmp_path, max_queue=1)
+    lock_held = []
+
+    def checking_open(*args, **kwargs):
+        lock_held.append(writer._lock.locked())
+        return open(*args, **kwargs)
+    monkeypatch.setattr(write_behind, 'open', checking_open, raising=False)
+
+    assert writer._overflow([{'n': 0}, {'n': 1}])
+    assert lock_held == [False]
+    assert writer.get_stats()['spilled'] == 2
+    assert len((tmp_path / 'spill.ndjson').read_text().splitlines()) == 2
+
+def test_replay_left_by_a_dead_process_is_picked_up(tmp_path):
+    dead = subprocess.Popen(['true'])
+    dead.wait()
+    write_lines(tmp_path / f"spill.ndjson.{dead.pid}.replay", [0, 1])
+    writer = spilling_writer(tmp_path)
+
+    assert writer.flush() == 2
+    assert stored_numbers() == [0, 1]
+    assert list(tmp_path.iterdir()) == []
+
+def test_replay_of_a_running_process_is_left_alone(tmp_path):
+    leftover = tmp_path / f"spill.ndjson.{os.getppid()}.replay"
+    write_lines(leftover, [0])
+    writer = spilling_writer(tmp_path)
+
+    assert writer.flush() == 0
+    assert leftover.exists()
+
+def test_own_unfinished_replay_is_not_overwritten(tmp_path):
+    write_lines(tmp_path / f"spill.ndjson.{os.getpid()}.replay", [0, 1])
+    write_lines(tmp_path / 'spill.ndjson', [2])
+    writer = spilling_writer(tmp_path)
+    writer._recovered_pid = os.getpid()
+
+    assert writer.flush() == 3
+    assert stored_numbers() == [0, 1, 2]
+    assert writer.get_stats()['replayed'] == 3